@@ -0,0 +1,12 @@
+"""Benchmarks for ecal.get, the caches and the fetchers.
+
+Run them from the root of the repository with::
+
+    python -m benchmarks            # run everything and compare with benchmarks/baselines.json
+    python -m benchmarks --quick    # only the smallest sizes
+    python -m benchmarks -k sqlite  # only the benchmarks whose name contains "sqlite"
+    python -m benchmarks --save     # store the results as the new baselines
+
+The command exits with 1 if any benchmark got slower or used more memory than its baseline allows. Timings
+depend on the machine, so save new baselines on the machine you compare on before relying on them.
+"""
@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+import tempfile
+from .runner import compare, load_baselines, measure, save_baselines
+from .suite import make_benchmarks
+
+DEFAULT_BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+
+def main(argv=None):
+    """Run the benchmarks, print the results and exit with 1 if any of them regressed."""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Benchmark ecal.get, the caches and a synthetic fetcher.')
+    parser.add_argument('-k', '--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--quick', action='store_true', help='only benchmark the smallest sizes')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of timed runs of each benchmark')
+    parser.add_argument('--baselines', default=DEFAULT_BASELINES_PATH, help='the baselines file to compare with')
+    parser.add_argument('--save', action='store_true', help='store the results as the new baselines')
+    parser.add_argument('--time-tolerance', type=float, default=0.5,
+                        help='how much slower than the baseline counts as a regression (default 0.5 = 50%%)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25,
+                        help='how much more peak memory than the baseline counts as a regression')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baselines)
+    results = {}
+
+    print('{:<52} {:>10} {:>12} {:>14} {:>10} {:>9}'.format('benchmark', 'ms', 'ops/s', 'rows/s', 'peak KiB',
+                                                             'vs base'))
+    with tempfile.TemporaryDirectory(prefix='ecal-bench-') as directory:
+        for benchmark in make_benchmarks(directory, quick=args.quick):
+            if args.filter not in benchmark.name:
+                continue
+            result = measure(benchmark, repeat=args.repeat)
+            results[benchmark.name] = result
+
+            baseline = baselines.get(benchmark.name)
+            change = '{:+.0%}'.format(result['seconds'] / baseline['seconds'] - 1) if baseline else 'new'
+            print('{:<52} {:>10.3f} {:>12.1f} {:>14.0f} {:>10.0f} {:>9}'.format(
+                benchmark.name, result['seconds'] * 1000, result['ops_per_second'], result['rows_per_second'],
+                result['peak_kib'], change))
+
+    if args.save:
+        # Keep the baselines for benchmarks that weren't run this time
+        save_baselines(args.baselines, dict(baselines, **results))
+        print('Saved the baselines to {}'.format(args.baselines))
+        return 0
+
+    regressions = compare(results, baselines, time_tolerance=args.time_tolerance,
+                          memory_tolerance=args.memory_tolerance)
+    for regression in regressions:
+        print('REGRESSION {}'.format(regression))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
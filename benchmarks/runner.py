@@ -0,0 +1,117 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+__all__ = [
+    'measure',
+    'compare',
+    'load_baselines',
+    'save_baselines'
+]
+
+
+def measure(benchmark, repeat=5):
+    """Time a benchmark and measure its peak memory.
+
+    Setup isn't timed or traced. The median of the timed runs is used because it is steadier than the mean on a
+    busy machine. Peak memory is measured on one extra run with ``tracemalloc``, which slows the run down too much
+    to time it at the same time.
+
+    Args:
+        benchmark (Benchmark):
+            The benchmark to run.
+        repeat (int):
+            The number of timed runs.
+
+    Returns:
+        dict:
+            The ``seconds`` (median), ``min_seconds``, ``ops_per_second``, ``rows_per_second`` and ``peak_kib``.
+    """
+    times = []
+    rows = 0
+    for _ in range(repeat):
+        state = benchmark.setup()
+        start_time = time.perf_counter()
+        rows = benchmark.run(state)
+        times.append(time.perf_counter() - start_time)
+
+    state = benchmark.setup()
+    tracemalloc.start()
+    try:
+        benchmark.run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    seconds = statistics.median(times)
+    return {
+        'seconds': seconds,
+        'min_seconds': min(times),
+        'ops_per_second': 1.0 / seconds if seconds > 0 else None,
+        'rows_per_second': rows / seconds if seconds > 0 else None,
+        'peak_kib': peak / 1024.0
+    }
+
+
+def compare(results, baselines, time_tolerance=0.5, memory_tolerance=0.25, min_seconds_change=0.001):
+    """Compare results with stored baselines and return the regressions.
+
+    Args:
+        results (dict):
+            The results from ``measure``, keyed by benchmark name.
+        baselines (dict):
+            The stored results, keyed by benchmark name. Benchmarks that have no baseline are skipped.
+        time_tolerance (float):
+            How much slower (as a fraction of the baseline) a benchmark can get before it counts as a regression.
+        memory_tolerance (float):
+            How much more peak memory (as a fraction of the baseline) a benchmark can use.
+        min_seconds_change (float):
+            Time changes smaller than this many seconds are ignored, since they are mostly noise.
+
+    Returns:
+        list:
+            A message for each regression.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+
+        seconds, baseline_seconds = result['seconds'], baseline['seconds']
+        if seconds > baseline_seconds * (1 + time_tolerance) and seconds - baseline_seconds > min_seconds_change:
+            regressions.append('{}: {:.3f} ms is slower than the baseline of {:.3f} ms'.format(
+                name, seconds * 1000, baseline_seconds * 1000))
+
+        peak_kib, baseline_peak_kib = result['peak_kib'], baseline['peak_kib']
+        if peak_kib > baseline_peak_kib * (1 + memory_tolerance) and peak_kib - baseline_peak_kib > 64:
+            regressions.append('{}: {:.0f} KiB peak memory is more than the baseline of {:.0f} KiB'.format(
+                name, peak_kib, baseline_peak_kib))
+
+    return regressions
+
+
+def load_baselines(path):
+    """Return the stored results from a baselines file, or an empty dict if there isn't one."""
+    try:
+        with open(path) as f:
+            return json.load(f)['results']
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(path, results):
+    """Store results as the new baselines, along with a description of the machine they were measured on."""
+    baselines = {
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine()
+        },
+        'results': results
+    }
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
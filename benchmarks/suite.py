@@ -0,0 +1,211 @@
+import os
+import subprocess
+import sys
+import pandas as pd
+import ecal
+from .synthetic_fetcher import SyntheticFetcher
+
+__all__ = [
+    'Benchmark',
+    'make_benchmarks'
+]
+
+HISTORY_START_DATE_STR = '2010-01-01'
+
+
+class Benchmark(object):
+    """A single benchmark: an untimed setup followed by the timed call.
+
+        Attributes:
+            name (str):
+                The name the results are stored under, for example ``sqlite.warm_get[history=4y,range=90d]``.
+    """
+
+    def __init__(self, name, setup, run):
+        """
+        Args:
+            name (str):
+                The name of the benchmark.
+            setup (callable):
+                Called before each run without being timed. It returns the state that is passed to run.
+            run (callable):
+                The call that is timed. It takes the state returned by setup and returns the number of rows it
+                handled, which is used to work out the throughput.
+        """
+        self.name = name
+        self._setup = setup
+        self._run = run
+
+    def setup(self):
+        return self._setup()
+
+    def run(self, state):
+        return self._run(state)
+
+
+class _CacheFactory(object):
+    """Builds empty and pre-filled caches, keeping the pre-filled ones around for the benchmarks that only read."""
+
+    def __init__(self, directory, fetcher):
+        self._directory = directory
+        self._fetcher = fetcher
+        self._history_dfs = {}
+        self._filled_caches = {}
+        self._file_count = 0
+
+    def empty(self, kind):
+        if kind == 'runtime':
+            return ecal.RuntimeCache()
+        if kind == 'compact':
+            return ecal.RuntimeCache(compact=True)
+        if kind == 'columnar':
+            return ecal.ColumnarCache()
+        self._file_count += 1
+        return ecal.SqliteCache(os.path.join(self._directory, 'bench-{}.db'.format(self._file_count)))
+
+    def filled(self, kind, history_years, shared=True):
+        """Return a cache holding ``history_years`` of announcements. Shared caches must not be written to."""
+        key = (kind, history_years)
+        if shared and key in self._filled_caches:
+            return self._filled_caches[key]
+
+        date_list, history_df = self.history(history_years)
+        cache = self.empty(kind)
+        cache.add(date_list, history_df)
+        if shared:
+            self._filled_caches[key] = cache
+        return cache
+
+    def history(self, history_years):
+        if history_years not in self._history_dfs:
+            date_list = _date_list(HISTORY_START_DATE_STR, _history_end_date_str(history_years))
+            self._history_dfs[history_years] = (date_list, self._fetcher.fetch_calendar(date_list[0], date_list[-1]))
+        return self._history_dfs[history_years]
+
+
+def make_benchmarks(directory, quick=False):
+    """Return the benchmarks to run.
+
+    Each cache (``RuntimeCache``, a compact ``RuntimeCache``, ``ColumnarCache`` and ``SqliteCache``) is
+    benchmarked for a cold ``ecal.get`` (nothing cached), a warm ``ecal.get`` (everything cached),
+    ``check_for_missing_dates``, ``add`` and ``fetch_calendar``, over a few range lengths and amounts of cached
+    history. The synthetic fetcher has about 50 announcements on each weekday, like the real API. ``import ecal`` is
+    timed in a fresh interpreter too, so a module-level import of pandas or requests creeping back in shows up as a
+    regression.
+
+    Args:
+        directory (str):
+            A directory for the SqliteCache database files.
+        quick (bool):
+            If True, only the smallest sizes are benchmarked.
+
+    Returns:
+        list:
+            The Benchmark objects.
+    """
+    fetcher = SyntheticFetcher()
+    caches = _CacheFactory(directory, fetcher)
+    history_years_list = [1] if quick else [1, 4]
+    range_days_list = [7, 30] if quick else [7, 90]
+
+    benchmarks = [_import_ecal()]
+    for kind in ['runtime', 'compact', 'columnar', 'sqlite']:
+        for range_days in range_days_list:
+            benchmarks.append(_cold_get(caches, fetcher, kind, range_days))
+
+        for history_years in history_years_list:
+            for range_days in range_days_list:
+                benchmarks.append(_warm_get(caches, fetcher, kind, history_years, range_days))
+            benchmarks.append(_check_for_missing_dates(caches, kind, history_years))
+            benchmarks.append(_add(caches, fetcher, kind, history_years))
+            for range_days in range_days_list:
+                benchmarks.append(_fetch_calendar(caches, kind, history_years, range_days))
+
+    return benchmarks
+
+
+def _import_ecal():
+    # Run from the directory above the package so the interpreter imports this copy of ecal
+    root_directory = os.path.dirname(os.path.dirname(os.path.abspath(ecal.__file__)))
+
+    def run(_):
+        subprocess.run([sys.executable, '-c', 'import ecal'], cwd=root_directory, check=True)
+        return 1
+
+    return Benchmark('import.ecal', lambda: None, run)
+
+
+def _cold_get(caches, fetcher, kind, range_days):
+    start_date_str, end_date_str = _range(HISTORY_START_DATE_STR, range_days)
+
+    def run(cache):
+        return len(ecal.get(start_date_str, end_date_str, fetcher=fetcher, cache=cache))
+
+    return Benchmark('{}.cold_get[range={}d]'.format(kind, range_days), lambda: caches.empty(kind), run)
+
+
+def _warm_get(caches, fetcher, kind, history_years, range_days):
+    start_date_str, end_date_str = _range(_middle_date_str(history_years), range_days)
+
+    def run(cache):
+        return len(ecal.get(start_date_str, end_date_str, fetcher=fetcher, cache=cache))
+
+    return Benchmark('{}.warm_get[history={}y,range={}d]'.format(kind, history_years, range_days),
+                     lambda: caches.filled(kind, history_years), run)
+
+
+def _check_for_missing_dates(caches, kind, history_years):
+    # Ask for every cached date plus a month that isn't cached
+    date_list = _date_list(HISTORY_START_DATE_STR, _range(_history_end_date_str(history_years), 31)[1])
+
+    def run(cache):
+        cache.check_for_missing_dates(date_list)
+        return len(date_list)
+
+    return Benchmark('{}.check_for_missing_dates[history={}y]'.format(kind, history_years),
+                     lambda: caches.filled(kind, history_years), run)
+
+
+def _add(caches, fetcher, kind, history_years):
+    # Add the month after the cached history
+    first_date_str = (pd.Timestamp(_history_end_date_str(history_years)) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    date_list = _date_list(*_range(first_date_str, 30))
+    month_df = fetcher.fetch_calendar(date_list[0], date_list[-1])
+
+    def run(cache):
+        cache.add(date_list, month_df)
+        return len(month_df)
+
+    return Benchmark('{}.add[history={}y]'.format(kind, history_years),
+                     lambda: caches.filled(kind, history_years, shared=False), run)
+
+
+def _fetch_calendar(caches, kind, history_years, range_days):
+    start_date_str, end_date_str = _range(_middle_date_str(history_years), range_days)
+
+    def run(cache):
+        return len(cache.fetch_calendar(start_date_str, end_date_str))
+
+    return Benchmark('{}.fetch_calendar[history={}y,range={}d]'.format(kind, history_years, range_days),
+                     lambda: caches.filled(kind, history_years), run)
+
+
+def _history_end_date_str(history_years):
+    return (pd.Timestamp(HISTORY_START_DATE_STR) + pd.DateOffset(years=history_years) -
+            pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def _middle_date_str(history_years):
+    start_date = pd.Timestamp(HISTORY_START_DATE_STR)
+    end_date = pd.Timestamp(_history_end_date_str(history_years))
+    return (start_date + (end_date - start_date) / 2).strftime('%Y-%m-%d')
+
+
+def _range(start_date_str, days):
+    end_date = pd.Timestamp(start_date_str) + pd.Timedelta(days=days - 1)
+    return start_date_str, end_date.strftime('%Y-%m-%d')
+
+
+def _date_list(start_date_str, end_date_str):
+    return pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d').tolist()
+
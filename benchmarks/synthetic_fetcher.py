@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import ecal
+
+__all__ = [
+    'SyntheticFetcher'
+]
+
+
+class SyntheticFetcher(ecal.AbstractFetcher):
+    """SyntheticFetcher makes up earnings announcements in process so benchmarks don't depend on the network.
+
+    Every weekday gets ``announcements_per_day`` announcements and weekends get none. The announcements for a date
+    are always the same, so repeated runs fetch the same data.
+    """
+
+    WHEN_VALUES = np.array(['bmo', 'amc', '--'], dtype=object)
+
+    def __init__(self, announcements_per_day=50, ticker_count=4000, seed=0):
+        """
+        Args:
+            announcements_per_day (int):
+                The number of announcements on each weekday.
+            ticker_count (int):
+                The number of different tickers to pick from.
+            seed (int):
+                The seed for the made up tickers and announcements.
+        """
+        self._announcements_per_day = announcements_per_day
+        self._seed = seed
+        rng = np.random.RandomState(seed)
+        letters = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+        tickers = {''.join(rng.choice(letters, rng.randint(2, 5))) for _ in range(ticker_count * 2)}
+        self._tickers = np.array(sorted(tickers)[:ticker_count], dtype=object)
+        self.call_count = 0
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        """Returns the made up earnings calendar for a date range.
+
+        Args:
+            start_date_str (str):
+                The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date of the earnings calendar in the format ``YYYY-MM-DD``.
+                If left out, we will fetch only the announcements for the start date.
+
+        Returns:
+            DataFrame:
+                Returns a pandas DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``
+                and a row for each announcement.
+        """
+        self.call_count += 1
+        if end_date_str is None:
+            end_date_str = start_date_str
+
+        dates = pd.date_range(start_date_str, end_date_str)
+        dates = dates[dates.dayofweek < 5]
+
+        date_strs = []
+        tickers = []
+        whens = []
+        for date in dates:
+            # Seed with the date so the same date always gets the same announcements
+            rng = np.random.RandomState((self._seed * 1000003 + date.toordinal()) % (2 ** 32))
+            picks = rng.choice(len(self._tickers), self._announcements_per_day, replace=False)
+            picks.sort()
+            date_strs.append(np.repeat(date.strftime('%Y-%m-%d'), self._announcements_per_day).astype(object))
+            tickers.append(self._tickers[picks])
+            whens.append(self.WHEN_VALUES[rng.randint(0, len(self.WHEN_VALUES), self._announcements_per_day)])
+
+        if not date_strs:
+            return pd.DataFrame(columns=['date', 'ticker', 'when']).set_index('date')
+
+        cal_df = pd.DataFrame({'ticker': np.concatenate(tickers), 'when': np.concatenate(whens)},
+                              index=pd.Index(np.concatenate(date_strs), name='date'))
+        return cal_df[['ticker', 'when']]
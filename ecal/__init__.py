@@ -1,43 +1,157 @@
 """A package for getting a US equity earnings announcement calendar.
+
+Importing the package is cheap: the fetchers, caches and trading calendars (and pandas, requests and sqlite3 with
+them) are only imported the first time they are used, and ``default_fetcher`` and ``default_cache`` are only
+created the first time a call needs them.
 """
-import pandas as pd
-from .abstract_fetcher import AbstractFetcher
-from .runtime_cache import AbstractCache
-from .ecn_fetcher import ECNFetcher
-from .runtime_cache import RuntimeCache
-from .sqlite_cache import SqliteCache
+import datetime
+import importlib
+import threading
+from .single_flight import SingleFlight
+from .instrumentation import Metrics, metrics
+from .calendar_query import CalendarQuery
 
 """
-Some global vars. 
+Some global vars. ``default_fetcher`` and ``default_cache`` are created on first use, unless they have been set.
 """
 name = 'ecal'
-default_fetcher = ECNFetcher()
-default_cache = RuntimeCache()
+default_calendar = None
+default_freshness = None
+# The most days fetched before they are added to the cache, so an interrupted backfill only loses this many
+checkpoint_days = 10
+_single_flight = SingleFlight()
+
+# The names that are imported from a submodule the first time they are used
+_LAZY_ATTRIBUTES = {
+    'AbstractFetcher': 'abstract_fetcher',
+    'ECNFetcher': 'ecn_fetcher',
+    'AsyncECNFetcher': 'async_ecn_fetcher',
+    'CompositeFetcher': 'composite_fetcher',
+    'AbstractCache': 'abstract_cache',
+    'RuntimeCache': 'runtime_cache',
+    'BoundedRuntimeCache': 'bounded_runtime_cache',
+    'ColumnarCache': 'columnar_cache',
+    'SharedColumnarCache': 'shared_columnar_cache',
+    'SqliteCache': 'sqlite_cache',
+    'AbstractRateLimiter': 'rate_limiter',
+    'RateLimiter': 'rate_limiter',
+    'FileRateLimiter': 'rate_limiter',
+    'HttpTransport': 'http_transport',
+    'Prefetcher': 'prefetcher',
+    'AbstractTradingCalendar': 'trading_calendar',
+    'WeekdayCalendar': 'trading_calendar',
+    'NYSECalendar': 'trading_calendar',
+    'FreshnessPolicy': 'freshness',
+    'to_compact': 'dtypes',
+    'to_standard': 'dtypes'
+}
+
+# The defaults that are created the first time they are used, and the class each one is an instance of
+_LAZY_DEFAULTS = {
+    'default_fetcher': 'AsyncECNFetcher',
+    'default_cache': 'RuntimeCache'
+}
+_defaults_lock = threading.Lock()
 
 __all__ = [
     'get',
+    'iter_get',
+    'query',
+    'next_announcement',
+    'previous_announcement',
+    'CalendarQuery',
     'AbstractFetcher',
     'ECNFetcher',
+    'AsyncECNFetcher',
+    'CompositeFetcher',
     'AbstractCache',
     'RuntimeCache',
-    'SqliteCache'
+    'BoundedRuntimeCache',
+    'ColumnarCache',
+    'SharedColumnarCache',
+    'SqliteCache',
+    'AbstractRateLimiter',
+    'RateLimiter',
+    'FileRateLimiter',
+    'HttpTransport',
+    'Prefetcher',
+    'AbstractTradingCalendar',
+    'WeekdayCalendar',
+    'NYSECalendar',
+    'FreshnessPolicy',
+    'Metrics',
+    'metrics'
 ]
 
 
-def get(start_date_str, end_date_str=None, fetcher=None, cache=None):
+def __getattr__(attribute_name):
+    """Import the classes and submodules of the package and create the defaults the first time they are used."""
+    if attribute_name in _LAZY_DEFAULTS:
+        return _default(attribute_name)
+
+    module_name = _LAZY_ATTRIBUTES.get(attribute_name)
+    if module_name is not None:
+        value = getattr(importlib.import_module('.' + module_name, __name__), attribute_name)
+        globals()[attribute_name] = value
+        return value
+
+    if not attribute_name.startswith('_'):
+        try:
+            return importlib.import_module('.' + attribute_name, __name__)
+        except ModuleNotFoundError as e:
+            # Only a missing submodule means there's no such attribute. A missing dependency is a real error.
+            if e.name != __name__ + '.' + attribute_name:
+                raise
+
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, attribute_name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_LAZY_DEFAULTS))
+
+
+def _default(attribute_name):
+    """Return ``default_fetcher`` or ``default_cache``, creating it if it hasn't been used or set yet."""
+    module_globals = globals()
+    if attribute_name not in module_globals:
+        with _defaults_lock:
+            if attribute_name not in module_globals:
+                module_globals[attribute_name] = __getattr__(_LAZY_DEFAULTS[attribute_name])()
+    return module_globals[attribute_name]
+
+
+def get(start_date_str, end_date_str=None, fetcher=None, cache=None, calendar=None, freshness=None, compact=False):
     """
     This function returns an earnings announcement calendar as a DataFrame.
 
+    It is safe to call from several threads at once. If another thread is already fetching some of the dates
+    into the same cache, this call waits for those dates instead of fetching them again.
+
+    Missing dates are added to the cache ``checkpoint_days`` at a time as they are fetched. With a persistent cache
+    like ``SqliteCache``, an interrupted call loses at most that many days of work and calling it again only
+    fetches the dates that are still missing.
+
     Args:
         fetcher (AbstractFetcher):
             The fetcher to use for downloading data. If no fetcher is provided, it will use an instance of
-            ``ECNFetcher``. cache (AbstractCache): The cache to use for storing data. If no cache is provided,
+            ``AsyncECNFetcher``. cache (AbstractCache): The cache to use for storing data. If no cache is provided,
             it will use an instance of ``RuntimeCache``.
         start_date_str (str):
             The start date of the earnings calendar in the format ``YYYY-MM-DD``.
         end_date_str (str):
             The end date of the earnings calendar in the format ``YYYY-MM-DD``. If left out, we will fetch only the
             announcements for the start date.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use for skipping days that can't have announcements. Skipped days are recorded
+            in the cache as having no announcements without using the fetcher. If no calendar is provided, it will
+            use ``default_calendar``, which is None (don't skip any days) unless you set it.
+        freshness (FreshnessPolicy):
+            The policy that decides when cached dates are stale. Stale dates are returned from the cache straight
+            away and fetched again in the background. If no policy is provided, it will use ``default_freshness``,
+            which is None (cached dates never go stale) unless you set it.
+        compact (bool):
+            If True, the calendar is returned in the compact format (see ``ecal.dtypes.to_compact``): ``date`` is a
+            ``DatetimeIndex`` and ``ticker`` and ``when`` are categorical, which takes about a tenth of the memory.
 
     Returns:
         DataFrame:
@@ -57,31 +171,545 @@ def get(start_date_str, end_date_str=None, fetcher=None, cache=None):
 
 
     """
+    import pandas as pd
+
+    if end_date_str is None:
+        end_date_str = start_date_str
+
+    if fetcher is None:
+        fetcher = _default('default_fetcher')
+
+    if cache is None:
+        cache = _default('default_cache')
+
+    if calendar is None:
+        calendar = default_calendar
+
+    if freshness is None:
+        freshness = default_freshness
+
+    with metrics.timer('ecal_get_seconds'):
+        # Create a list of dates strings in the format: YYYY-MM-DD
+        calendar_date_range = pd.date_range(start_date_str, end_date_str)
+        date_list = calendar_date_range.strftime('%Y-%m-%d').tolist()
+
+        # Check the cache to make sure it has all the announcements for the date range
+        missing_dates = _read_cache(cache, 'check_for_missing_dates', date_list)
+        _count_hits_and_misses(date_list, missing_dates)
+        _fill_cache(fetcher, cache, calendar, missing_dates)
+
+        if freshness is not None:
+            missing_dates = set(missing_dates)
+            cached_dates = [date_str for date_str in date_list if date_str not in missing_dates]
+            stale_dates = freshness.stale_dates(_read_cache(cache, 'fetched_at', cached_dates))
+            _refresh_in_background(fetcher, cache, calendar, stale_dates)
+
+        return _calendar_format(_read_cache(cache, 'fetch_calendar', start_date_str, end_date_str), compact)
+
+
+def iter_get(start_date_str, end_date_str=None, chunk='day', fetcher=None, cache=None, calendar=None,
+             compact=False):
+    """
+    This generator yields the earnings announcement calendar for a date range one chunk at a time.
+
+    Chunks that are already cached are yielded straight away. The remaining chunks are then fetched in date order,
+    added to the cache and yielded as soon as each one lands. So callers see their first rows without waiting for
+    the whole range, and only one chunk of uncached announcements is held in memory at a time.
+
+    Args:
+        start_date_str (str):
+            The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+        end_date_str (str):
+            The end date of the earnings calendar in the format ``YYYY-MM-DD``. If left out, we will fetch only the
+            announcements for the start date.
+        chunk (str):
+            How to split up the date range. Can be ``day``, ``week`` or ``month``.
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data. If no fetcher is provided, it will use ``default_fetcher``.
+        cache (AbstractCache):
+            The cache to use for storing data. If no cache is provided, it will use ``default_cache``.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use for skipping days that can't have announcements. If no calendar is
+            provided, it will use ``default_calendar``.
+        compact (bool):
+            If True, the calendar is returned in the compact format (see ``ecal.dtypes.to_compact``): ``date`` is a
+            ``DatetimeIndex`` and ``ticker`` and ``when`` are categorical, which takes about a tenth of the memory.
+
+    Yields:
+        DataFrame:
+            A pandas DataFrame for each chunk, in the same format that ``get`` returns. Chunks with no
+            announcements are yielded as empty DataFrames.
+    """
+    import pandas as pd
+
+    if chunk not in _CHUNK_FREQUENCIES:
+        raise ValueError("chunk must be one of 'day', 'week' or 'month', not {!r}".format(chunk))
+
     if end_date_str is None:
         end_date_str = start_date_str
 
     if fetcher is None:
-        fetcher = default_fetcher
+        fetcher = _default('default_fetcher')
 
     if cache is None:
-        cache = default_cache
+        cache = _default('default_cache')
+
+    if calendar is None:
+        calendar = default_calendar
 
-    # Create a list of dates strings in the format: YYYY-MM-DD
     calendar_date_range = pd.date_range(start_date_str, end_date_str)
     date_list = calendar_date_range.strftime('%Y-%m-%d').tolist()
+    missing_dates = _read_cache(cache, 'check_for_missing_dates', date_list)
+    _count_hits_and_misses(date_list, missing_dates)
+    missing_dates = set(_skip_non_trading_days(cache, calendar, missing_dates))
+
+    chunks = calendar_date_range.groupby(calendar_date_range.to_period(_CHUNK_FREQUENCIES[chunk]))
+
+    uncached_chunks = []
+    for period in sorted(chunks):
+        chunk_date_list = chunks[period].strftime('%Y-%m-%d').tolist()
+        chunk_missing_dates = [date_str for date_str in chunk_date_list if date_str in missing_dates]
+        if chunk_missing_dates:
+            uncached_chunks.append((chunk_date_list, chunk_missing_dates))
+        else:
+            yield _calendar_format(_read_cache(cache, 'fetch_calendar', chunk_date_list[0], chunk_date_list[-1]),
+                                   compact)
+
+    for chunk_date_list, chunk_missing_dates in uncached_chunks:
+        _fill_cache(fetcher, cache, calendar, chunk_missing_dates)
+        yield _calendar_format(_read_cache(cache, 'fetch_calendar', chunk_date_list[0], chunk_date_list[-1]),
+                                   compact)
 
-    # Check the cache to make sure it has all the announcements for the date range
-    missing_dates = cache.check_for_missing_dates(date_list)
+
+def query(start_date_str=None, end_date_str=None, fetcher=None, cache=None, calendar=None, compact=False):
+    """
+    This function returns a lazy query for part of the earnings announcement calendar.
+
+    Nothing is fetched until ``to_frame()`` is called on the query. Filters added with ``tickers()``, ``when()``
+    and ``between()`` are handed to the cache, so ``SqliteCache`` only loads the matching rows:
+
+    .. code-block:: python
+
+        cal_df = ecal.query('2008-01-01', '2017-12-31').tickers(['AAPL', 'MSFT']).when('amc').to_frame()
+
+    Args:
+        start_date_str (str):
+            The start date of the earnings calendar in the format ``YYYY-MM-DD``. It can also be set later with
+            ``between()``.
+        end_date_str (str):
+            The end date of the earnings calendar in the format ``YYYY-MM-DD``. If left out, we will fetch only the
+            announcements for the start date.
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data. If no fetcher is provided, it will use ``default_fetcher``.
+        cache (AbstractCache):
+            The cache to use for storing data. If no cache is provided, it will use ``default_cache``.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use for skipping days that can't have announcements. If no calendar is
+            provided, it will use ``default_calendar``.
+        compact (bool):
+            If True, ``to_frame`` returns the calendar in the compact format (see ``ecal.dtypes.to_compact``).
+
+    Returns:
+        CalendarQuery:
+            The query.
+    """
+    return CalendarQuery(start_date_str, end_date_str, fetcher=fetcher, cache=cache, calendar=calendar,
+                         compact=compact)
+
+
+def next_announcement(tickers, as_of=None, days=90, fetcher=None, cache=None, calendar=None):
+    """
+    This function returns the next earnings announcement of each ticker on or after a date.
+
+    The dates from ``as_of`` to ``days`` later are fetched into the cache first if they aren't there yet. Then each
+    ticker is looked up in the cache's per-ticker index, so asking for thousands of tickers at once is fast.
+
+    Args:
+        tickers (list):
+            The ticker symbols to look for. A single ticker can be passed as a string.
+        as_of (str):
+            The date to look from in the format ``YYYY-MM-DD``. An announcement on this date counts as the next
+            one. If left out, today's date is used.
+        days (int):
+            The number of days from ``as_of`` to look at. If it's None, nothing is fetched and every cached date
+            from ``as_of`` on is looked at.
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data. If no fetcher is provided, it will use ``default_fetcher``.
+        cache (AbstractCache):
+            The cache to use for storing data. If no cache is provided, it will use ``default_cache``.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use for skipping days that can't have announcements. If no calendar is
+            provided, it will use ``default_calendar``.
+
+    Returns:
+        DataFrame:
+            Returns a pandas DataFrame indexed by ``ticker``, in the order they were asked for, that has columns:
+            ``date`` and ``when``. Tickers with no announcement in the range have NaN in both columns. For example:
+
+            .. code-block:: none
+
+                              date when
+                ticker
+                AAPL    2018-02-01  amc
+                MSFT    2018-01-31  amc
+                XYZ            NaN  NaN
+
+    """
+    as_of = _as_of_date(as_of)
+    start_date_str = as_of.strftime('%Y-%m-%d')
+    end_date_str = None
+    if days is not None:
+        end_date_str = (as_of + datetime.timedelta(days=days - 1)).strftime('%Y-%m-%d')
+
+    return _nearest_announcement(tickers, 'next_announcements', start_date_str, end_date_str, fetcher, cache,
+                                 calendar)
+
+
+def previous_announcement(tickers, as_of=None, days=90, fetcher=None, cache=None, calendar=None):
+    """
+    This function returns the last earnings announcement of each ticker before a date.
+
+    The ``days`` dates before ``as_of`` are fetched into the cache first if they aren't there yet. Then each ticker
+    is looked up in the cache's per-ticker index, so asking for thousands of tickers at once is fast.
+
+    Args:
+        tickers (list):
+            The ticker symbols to look for. A single ticker can be passed as a string.
+        as_of (str):
+            The date to look back from in the format ``YYYY-MM-DD``. Announcements on this date don't count. If
+            left out, today's date is used.
+        days (int):
+            The number of days before ``as_of`` to look at. If it's None, nothing is fetched and every cached date
+            before ``as_of`` is looked at.
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data. If no fetcher is provided, it will use ``default_fetcher``.
+        cache (AbstractCache):
+            The cache to use for storing data. If no cache is provided, it will use ``default_cache``.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use for skipping days that can't have announcements. If no calendar is
+            provided, it will use ``default_calendar``.
+
+    Returns:
+        DataFrame:
+            Returns a pandas DataFrame indexed by ``ticker``, in the order they were asked for, that has columns:
+            ``date`` and ``when``. Tickers with no announcement in the range have NaN in both columns.
+    """
+    as_of = _as_of_date(as_of)
+    end_date_str = (as_of - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+    start_date_str = None
+    if days is not None:
+        start_date_str = (as_of - datetime.timedelta(days=days)).strftime('%Y-%m-%d')
+
+    return _nearest_announcement(tickers, 'previous_announcements', start_date_str, end_date_str, fetcher, cache,
+                                 calendar)
+
+
+def _nearest_announcement(tickers, method_name, start_date_str, end_date_str, fetcher, cache, calendar):
+    """Fill the cache for a range if it's bounded and look up each ticker's nearest announcement in it."""
+    import pandas as pd
+
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    tickers = list(tickers)
+
+    if cache is None:
+        cache = _default('default_cache')
+
+    if start_date_str is not None and end_date_str is not None:
+        _ensure_cached(start_date_str, end_date_str, fetcher, cache, calendar)
+
+    if method_name == 'next_announcements':
+        announcements_df = _read_cache(cache, method_name, tickers, start_date_str, end_date_str)
+    else:
+        announcements_df = _read_cache(cache, method_name, tickers, end_date_str, start_date_str)
+
+    return announcements_df.reindex(pd.Index(tickers, name='ticker'))
+
+
+def _as_of_date(as_of):
+    """Return the date to look from, which is today if it's None."""
+    if as_of is None:
+        return datetime.date.today()
+    return datetime.datetime.strptime(as_of, '%Y-%m-%d').date()
+
+
+def _ensure_cached(start_date_str, end_date_str, fetcher, cache, calendar):
+    """Fetch the dates in a range that aren't in the cache yet and add them to it.
+
+    Args:
+        start_date_str (str):
+            The start date in the format ``YYYY-MM-DD``.
+        end_date_str (str):
+            The end date in the format ``YYYY-MM-DD``.
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data. If it's None, ``default_fetcher`` is used.
+        cache (AbstractCache):
+            The cache to fill. If it's None, ``default_cache`` is used.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use for skipping days. If it's None, ``default_calendar`` is used.
+    """
+    import pandas as pd
+
+    if fetcher is None:
+        fetcher = _default('default_fetcher')
+
+    if cache is None:
+        cache = _default('default_cache')
+
+    if calendar is None:
+        calendar = default_calendar
+
+    date_list = pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d').tolist()
+    missing_dates = _read_cache(cache, 'check_for_missing_dates', date_list)
+    _count_hits_and_misses(date_list, missing_dates)
+    _fill_cache(fetcher, cache, calendar, missing_dates)
+
+
+_CHUNK_FREQUENCIES = {
+    'day': 'D',
+    'week': 'W',
+    'month': 'M'
+}
+
+
+def _fill_cache(fetcher, cache, calendar, missing_dates):
+    """Fetch the missing dates and add them to the cache.
+
+    This is safe to call from several threads at once. A date that another thread is already fetching into the
+    same cache isn't fetched again. Instead we wait for that thread and then check the cache again, in case its
+    fetch failed.
+
+    Args:
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data.
+        cache (AbstractCache):
+            The cache to add the announcements to.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use for skipping days. If it's None, no days are skipped.
+        missing_dates (list):
+            The dates that aren't in the cache in the format ``YYYY-MM-DD``.
+    """
+    while missing_dates:
+        claimed, in_flight = _single_flight.claim([(id(cache), date_str) for date_str in missing_dates])
+        claimed_dates = [date_str for _, date_str in claimed]
+        try:
+            if claimed_dates:
+                # Another thread may have finished fetching some of these since we looked in the cache
+                dates_to_fetch = _read_cache(cache, 'check_for_missing_dates', claimed_dates)
+                dates_to_fetch = _skip_non_trading_days(cache, calendar, dates_to_fetch)
+                _fetch_into_cache(fetcher, cache, dates_to_fetch)
+        finally:
+            _single_flight.release(claimed)
+
+        if not in_flight:
+            return
+
+        for event in in_flight:
+            event.wait()
+
+        claimed_dates = set(claimed_dates)
+        missing_dates = _read_cache(cache, 'check_for_missing_dates', [date_str for date_str in missing_dates
+                                                                        if date_str not in claimed_dates])
+
+
+def _refresh_in_background(fetcher, cache, calendar, stale_dates):
+    """Fetch stale dates again on a daemon thread and replace them in the cache.
+
+    Dates that another thread is already fetching are left alone.
+
+    Args:
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data.
+        cache (AbstractCache):
+            The cache to add the announcements to.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use for skipping days. If it's None, no days are skipped.
+        stale_dates (list):
+            The dates to fetch again in the format ``YYYY-MM-DD``.
+
+    Returns:
+        Thread:
+            The thread doing the refresh, or None if there was nothing to refresh.
+    """
+    if not stale_dates:
+        return None
+
+    claimed, _ = _single_flight.claim([(id(cache), date_str) for date_str in stale_dates])
+    if not claimed:
+        return None
+
+    def refresh():
+        try:
+            dates_to_fetch = _skip_non_trading_days(cache, calendar, [date_str for _, date_str in claimed])
+            _fetch_into_cache(fetcher, cache, dates_to_fetch)
+        except Exception as e:
+            # The dates are still stale so the next call to get will try again
+            print(e)
+        finally:
+            _single_flight.release(claimed)
+
+    thread = threading.Thread(target=refresh, name='ecal-refresh', daemon=True)
+    thread.start()
+    return thread
+
+
+def _skip_non_trading_days(cache, calendar, missing_dates):
+    """Record the missing dates that aren't trading days in the cache as having no announcements.
+
+    Args:
+        cache (AbstractCache):
+            The cache to record the non-trading days in.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use. If it's None, no days are skipped.
+        missing_dates (list):
+            The dates that aren't in the cache in the format ``YYYY-MM-DD``.
+
+    Returns:
+        list:
+            The missing dates that still have to be fetched.
+    """
+    if calendar is None or not missing_dates:
+        return missing_dates
+
+    non_trading_days = calendar.non_trading_days(missing_dates)
+    if not non_trading_days:
+        return missing_dates
+
+    _write_cache(cache, non_trading_days, _empty_calendar())
+
+    non_trading_days = set(non_trading_days)
+    return [date_str for date_str in missing_dates if date_str not in non_trading_days]
+
+
+def _empty_calendar():
+    """Return an empty earnings calendar DataFrame."""
+    import pandas as pd
 
     col_names = ['date', 'ticker', 'when']
-    uncached_announcements_df = pd.DataFrame(columns=col_names)
-    uncached_announcements_df = uncached_announcements_df.set_index('date')
+    empty_df = pd.DataFrame(columns=col_names)
+    empty_df = empty_df.set_index('date')
+    return empty_df
+
+
+def _fetch_into_cache(fetcher, cache, dates):
+    """Fetch dates and add them to the cache a batch at a time.
+
+    Each batch is a span of at most ``checkpoint_days`` consecutive days. It's added to the cache as soon as it has
+    been fetched and the threads waiting for its dates are woken up, so if the process is interrupted during a long
+    backfill, a persistent cache keeps every batch that finished and the next call only fetches the rest.
+
+    Args:
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data.
+        cache (AbstractCache):
+            The cache to add the announcements to.
+        dates (list):
+            The dates to fetch in the format ``YYYY-MM-DD``. The caller must have claimed them from
+            ``_single_flight``.
+    """
+    import pandas as pd
+
+    for batch_start_date_str, batch_end_date_str in _contiguous_spans(dates, checkpoint_days):
+        batch_date_list = pd.date_range(batch_start_date_str, batch_end_date_str).strftime('%Y-%m-%d').tolist()
+        _write_cache(cache, batch_date_list, _fetch_missing_dates(fetcher, batch_date_list))
+        _single_flight.release([(id(cache), date_str) for date_str in batch_date_list])
+
+
+def _fetch_missing_dates(fetcher, missing_dates):
+    """Fetch the announcements for dates that aren't in the cache.
+
+    The dates are grouped into spans of consecutive days and the fetcher is called once for each span, so fetchers
+    that can fetch a range at once (like ``AsyncECNFetcher``) get the whole span. The results are joined together
+    once at the end instead of after every call, which would copy the rows fetched so far over and over again.
+
+    Args:
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data.
+        missing_dates (list):
+            The dates to fetch in the format ``YYYY-MM-DD``.
+
+    Returns:
+        DataFrame:
+            A pandas DataFrame indexed by ``date`` with all the announcements for the dates.
+    """
+    import pandas as pd
+
+    results_dfs = [_empty_calendar()]
+
+    for span_start_date_str, span_end_date_str in _contiguous_spans(missing_dates):
+        with metrics.timer('ecal_fetch_seconds', fetcher=type(fetcher).__name__):
+            results_dfs.append(fetcher.fetch_calendar(span_start_date_str, span_end_date_str))
+
+    with metrics.timer('ecal_concat_seconds'):
+        return pd.concat(results_dfs)
+
+
+def _contiguous_spans(date_list, max_days=None):
+    """Group dates into spans of consecutive days.
+
+    Args:
+        date_list (list):
+            The dates in the format ``YYYY-MM-DD``, in any order.
+        max_days (int):
+            If given, longer spans are split so no span has more than this many days.
+
+    Returns:
+        list:
+            The first and last date of each span, in date order. For example ``['2018-01-01', '2018-01-02',
+            '2018-01-04']`` becomes ``[('2018-01-01', '2018-01-02'), ('2018-01-04', '2018-01-04')]``.
+    """
+    spans = []
+    previous_date = None
+    span_days = 0
+    for date_str in sorted(set(date_list)):
+        date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+        if previous_date is not None and date - previous_date == _ONE_DAY and \
+                (max_days is None or span_days < max_days):
+            spans[-1] = (spans[-1][0], date_str)
+            span_days += 1
+        else:
+            spans.append((date_str, date_str))
+            span_days = 1
+        previous_date = date
+    return spans
+
+
+_ONE_DAY = datetime.timedelta(days=1)
+
+
+def _calendar_format(cal_df, compact):
+    """Return a calendar DataFrame in the compact format if compact is True, or the standard format otherwise."""
+    from .dtypes import to_compact, to_standard
+
+    return to_compact(cal_df) if compact else to_standard(cal_df)
+
+
+def _read_cache(cache, method_name, *args):
+    """Call a method that reads from the cache, recording how long it took.
+
+    Args:
+        cache (AbstractCache):
+            The cache to read from.
+        method_name (str):
+            The name of the method to call, for example ``fetch_calendar``.
+        args:
+            The arguments to pass to the method.
+
+    Returns:
+        Whatever the method returns.
+    """
+    with metrics.timer('ecal_cache_read_seconds', cache=type(cache).__name__, operation=method_name):
+        return getattr(cache, method_name)(*args)
 
-    for date_str in missing_dates:
-        results_df = fetcher.fetch_calendar(date_str)
-        uncached_announcements_df = pd.concat([uncached_announcements_df, results_df])
 
-    cache.add(missing_dates, uncached_announcements_df)
+def _write_cache(cache, dates, announcements_df):
+    """Add announcements to the cache, recording how long it took."""
+    with metrics.timer('ecal_cache_write_seconds', cache=type(cache).__name__, operation='add'):
+        cache.add(dates, announcements_df)
 
-    return cache.fetch_calendar(start_date_str, end_date_str)
 
+def _count_hits_and_misses(date_list, missing_dates):
+    """Count the requested dates that were and weren't in the cache."""
+    if metrics.enabled:
+        metrics.increment('ecal_cache_hits_total', len(date_list) - len(missing_dates))
+        metrics.increment('ecal_cache_misses_total', len(missing_dates))
@@ -10,6 +10,10 @@ class AbstractCache(object):
             * check_for_missing_dates
             * add
             * fetch_calendar
+            * fetched_at
+
+        Derived classes can override:
+            * query
 
     """
 
@@ -33,6 +37,11 @@ class AbstractCache(object):
     def add(self, missing_dates, uncached_announcements):
         """Add the uncached announcements to the cache.
 
+        If some of the dates are already in the cache, their old announcements are replaced. ``ecal.get`` adds
+        long ranges a few days at a time as they are fetched, so a persistent cache should have saved the dates
+        (for example committed them) by the time this returns. Then an interrupted backfill can pick up where it
+        stopped.
+
         Args:
             missing_dates (list):
                 The dates that were fetched and should be added to the cache index. Even dates that have no data
@@ -59,3 +68,99 @@ class AbstractCache(object):
                 Each row represents a single earnings announcement.
         """
         raise NotImplementedError('AbstractCache is an abstract base class')
+
+    def fetched_at(self, date_list):
+        """Look in the cache for when dates were fetched.
+
+        Args:
+            date_list (list):
+                The list of dates to look for.
+
+        Returns:
+            dict:
+                The time (as returned by ``time.time()``) each date in the cache was last added, keyed by date.
+                Dates that aren't in the cache are left out. The time is None if the cache doesn't know it.
+        """
+        raise NotImplementedError('AbstractCache is an abstract base class')
+
+    def query(self, start_date_str, end_date_str=None, tickers=None, when=None):
+        """Returns the announcements from the cache that match some filters as a pandas DataFrame.
+
+        This is what ``CalendarQuery.to_frame`` calls. It filters the result of ``fetch_calendar``. Derived classes
+        can override it to apply the filters before the rows are loaded, like ``SqliteCache`` does in SQL.
+
+        Args:
+            start_date_str (str):
+                The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date of the earnings calendar in the format ``YYYY-MM-DD``.
+                If left out, we will fetch only the announcements for the start date.
+            tickers (list):
+                The ticker symbols to keep. None keeps them all.
+            when (list):
+                The ``when`` values to keep. None keeps them all.
+
+        Returns:
+            DataFrame:
+                Returns a pandas DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``.
+                Each row represents a single earnings announcement.
+        """
+        cal_df = self.fetch_calendar(start_date_str, end_date_str)
+        if tickers is not None:
+            cal_df = cal_df[cal_df['ticker'].isin(tickers)]
+        if when is not None:
+            cal_df = cal_df[cal_df['when'].isin(when)]
+        return cal_df
+
+    def next_announcements(self, tickers, start_date_str, end_date_str=None):
+        """Look in the cache for the first announcement of each ticker on or after a date.
+
+        This filters the result of ``query``. Derived classes should override it with something that doesn't
+        load the whole date range, like the per-ticker indexes of ``RuntimeCache`` and ``SqliteCache``.
+
+        Args:
+            tickers (list):
+                The ticker symbols to look for.
+            start_date_str (str):
+                The first date to look at in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The last date to look at in the format ``YYYY-MM-DD``. If left out, all the later cached dates are
+                looked at.
+
+        Returns:
+            DataFrame:
+                A pandas DataFrame indexed by ``ticker``, that has columns: ``date`` and ``when``, with a row for
+                each ticker that has an announcement in the range.
+        """
+        cal_df = self.query(start_date_str, end_date_str or '9999-12-31', tickers=list(tickers))
+        return _by_ticker(cal_df, keep='first')
+
+    def previous_announcements(self, tickers, end_date_str, start_date_str=None):
+        """Look in the cache for the last announcement of each ticker on or before a date.
+
+        This filters the result of ``query``. Derived classes should override it with something that doesn't
+        load the whole date range, like the per-ticker indexes of ``RuntimeCache`` and ``SqliteCache``.
+
+        Args:
+            tickers (list):
+                The ticker symbols to look for.
+            end_date_str (str):
+                The last date to look at in the format ``YYYY-MM-DD``.
+            start_date_str (str):
+                The first date to look at in the format ``YYYY-MM-DD``. If left out, all the earlier cached dates
+                are looked at.
+
+        Returns:
+            DataFrame:
+                A pandas DataFrame indexed by ``ticker``, that has columns: ``date`` and ``when``, with a row for
+                each ticker that has an announcement in the range.
+        """
+        cal_df = self.query(start_date_str or '0001-01-01', end_date_str, tickers=list(tickers))
+        return _by_ticker(cal_df, keep='last')
+
+
+def _by_ticker(cal_df, keep):
+    """Turn a calendar sorted by date into one row per ticker, keeping its first or last announcement."""
+    cal_df = cal_df.rename_axis('date').reset_index().sort_values('date', kind='mergesort')
+    cal_df = cal_df.drop_duplicates('ticker', keep=keep)
+    return cal_df.set_index('ticker')[['date', 'when']]
@@ -0,0 +1,122 @@
+import asyncio
+import concurrent.futures
+import pandas as pd
+from .ecn_fetcher import ECNFetcher
+from .http_transport import HttpTransport
+from .instrumentation import metrics
+
+__all__ = [
+    'AsyncECNFetcher'
+]
+
+
+class AsyncECNFetcher(ECNFetcher):
+    """This class fetches earnings announcements from ``api.earningscalendar.net`` using an asyncio engine.
+
+    ``ECNFetcher`` waits for each response before it starts sleeping for the next call. AsyncECNFetcher instead
+    starts a request every ``rate_limit`` seconds and lets the responses overlap while they are in flight, so a
+    slow response never pushes the next request back. ``fetch_calendar`` keeps the same synchronous contract as
+    every other fetcher and simply runs the async engine to completion.
+    """
+
+    def __init__(self, rate_limit=1.0, max_in_flight=8, rate_limiter=None, transport=None,
+                 url='https://api.earningscalendar.net/'):
+        """
+        Args:
+
+            rate_limit (float):
+                The time (in seconds) between the start of two calls to the API.
+            max_in_flight (int):
+                The maximum number of requests that can be waiting on a response at the same time.
+            rate_limiter (AbstractRateLimiter):
+                The rate limiter that schedules calls to the API. If left out, the fetcher uses its own
+                ``RateLimiter`` with an interval of ``rate_limit``.
+            transport (HttpTransport):
+                The transport used to call the API. If left out, the fetcher uses its own ``HttpTransport`` with
+                a connection for every request that can be in flight.
+            url (str):
+                The URL of the API. Point this at an ``ecal.stub_server.StubECNServer`` to test offline.
+        """
+        if transport is None:
+            transport = HttpTransport(pool_size=max_in_flight)
+        super().__init__(rate_limit, rate_limiter, transport, url)
+        self._max_in_flight = max_in_flight
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        """Returns the earnings calendar as a pandas DataFrame.
+
+        Args:
+            start_date_str (str):
+                The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date of the earnings calendar in the format ``YYYY-MM-DD``.
+                If left out, we will fetch only the announcements for the start date.
+
+        Returns:
+            DataFrame:
+                Returns a pandas DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``
+                and a row for each announcement.
+        """
+        return _run_coroutine(self.fetch_calendar_async(start_date_str, end_date_str))
+
+    async def fetch_calendar_async(self, start_date_str, end_date_str=None):
+        """Coroutine version of ``fetch_calendar`` for callers that already run an event loop.
+
+        Args:
+            start_date_str (str):
+                The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date of the earnings calendar in the format ``YYYY-MM-DD``.
+                If left out, we will fetch only the announcements for the start date.
+
+        Returns:
+            DataFrame:
+                Returns a pandas DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``
+                and a row for each announcement.
+        """
+        if end_date_str is None:
+            end_date_str = start_date_str
+
+        date_list = pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d').tolist()
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self._max_in_flight)
+
+        # requests is blocking, so the HTTP calls themselves run in worker threads while the event loop
+        # does the scheduling.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_in_flight) as executor:
+            tasks = [self._fetch_date(loop, executor, semaphore, date_str) for date_str in date_list]
+            results_list = await asyncio.gather(*tasks)
+
+        announcements_list = []
+        for date_str, results in zip(date_list, results_list):
+            for result in results:
+                row = [date_str, result['ticker'], result['when']]
+                announcements_list.append(row)
+
+        df = pd.DataFrame(announcements_list, columns=['date', 'ticker', 'when'])
+        df.set_index('date', inplace=True)
+        return df
+
+    async def _fetch_date(self, loop, executor, semaphore, date_str):
+        """Wait for a free slot and then request the announcements for a date in a worker thread."""
+        async with semaphore:
+            delay = self._rate_limiter.reserve()
+            metrics.observe('ecal_rate_limit_sleep_seconds', delay)
+            await asyncio.sleep(delay)
+            return await loop.run_in_executor(executor, self._request_announcements, date_str)
+
+
+def _run_coroutine(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    ``asyncio.run`` can't be used from a thread that already has a running event loop (a Jupyter notebook for
+    example), so in that case the coroutine is run on its own loop in a helper thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
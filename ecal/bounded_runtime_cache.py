@@ -0,0 +1,177 @@
+import collections
+import datetime
+import pandas as pd
+from .runtime_cache import RuntimeCache
+from .instrumentation import metrics
+
+__all__ = [
+    'BoundedRuntimeCache'
+]
+
+
+class BoundedRuntimeCache(RuntimeCache):
+    """BoundedRuntimeCache is a RuntimeCache that evicts dates to stay under a size limit.
+
+    It's meant for long-running processes that read many different date ranges, where a plain ``RuntimeCache``
+    would grow until the process runs out of memory. Whole dates are evicted, least recently used first, and
+    removed from the cache index at the same time, so an evicted date is simply fetched again the next time it's
+    asked for:
+
+    .. code-block:: python
+
+        import ecal
+
+        ecal.default_cache = ecal.BoundedRuntimeCache(max_rows=500000)
+
+    When a limit is passed, dates are evicted until the cache is down to ``EVICTION_TARGET`` of the limit, so the
+    cost of dropping rows is shared by several adds. The dates being added are never evicted by their own add, so
+    a limit should be bigger than the largest range read at once.
+
+        Attributes:
+            rows (int):
+                The number of announcements in the cache.
+            bytes (int):
+                An estimate of the memory used by the announcements in the cache.
+            evictions (int):
+                The number of times dates have been evicted.
+            evicted_dates (int):
+                The number of dates evicted so far.
+            evicted_rows (int):
+                The number of announcements evicted so far.
+    """
+
+    EVICTION_TARGET = 0.9
+
+    def __init__(self, max_rows=None, max_bytes=None, date_window=None, compact=False):
+        """
+        Args:
+            max_rows (int):
+                The most announcements to keep. None means no limit.
+            max_bytes (int):
+                The most memory (in bytes) the announcements can use. None means no limit.
+            date_window (int):
+                If given, dates more than this many days before or after the latest date of the most recent add
+                are evicted.
+            compact (bool):
+                If True, store the announcements in the compact format, as ``RuntimeCache`` does.
+        """
+        super().__init__(compact=compact)
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.date_window = date_window
+        self.rows = 0
+        self.bytes = 0
+        self.evictions = 0
+        self.evicted_dates = 0
+        self.evicted_rows = 0
+
+        # The rows and bytes of each cached date, from least to most recently used
+        self._date_sizes = collections.OrderedDict()
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        """Returns the earnings calendar from the cache as a pandas DataFrame and marks its dates as used.
+
+        Args:
+            start_date_str (str):
+                The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date of the earnings calendar in the format ``YYYY-MM-DD``.
+                If left out, we will fetch only the announcements for the start date.
+
+        Returns:
+            DataFrame:
+                Returns a pandas DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``
+                and a row for each announcement.
+        """
+        with self._lock:
+            self._touch(_date_strs(start_date_str, start_date_str if end_date_str is None else end_date_str))
+            return super().fetch_calendar(start_date_str, end_date_str)
+
+    def _added(self, dates, chunk_df):
+        """Record the size of the dates that were just added and evict other dates if the cache is too big."""
+        chunk_rows = len(chunk_df)
+        row_bytes = 0
+        date_rows = {}
+        if chunk_rows:
+            # The categories of compact frames are shared, so only the codes and the index count towards them
+            row_bytes = chunk_df.memory_usage(index=True, deep=not self._compact).sum() / chunk_rows
+            index = chunk_df.index
+            if isinstance(index, pd.DatetimeIndex):
+                index = index.strftime('%Y-%m-%d')
+            date_rows = pd.Series(index).value_counts().to_dict()
+
+        for date_str in dates:
+            old_rows, old_bytes = self._date_sizes.pop(date_str, (0, 0))
+            rows = date_rows.get(date_str, 0)
+            self._date_sizes[date_str] = (rows, int(rows * row_bytes))
+            self.rows += rows - old_rows
+            self.bytes += int(rows * row_bytes) - old_bytes
+
+        self._evict(set(dates))
+
+    def _touch(self, date_strs):
+        """Mark the cached dates as the most recently used."""
+        for date_str in date_strs:
+            if date_str in self._date_sizes:
+                self._date_sizes.move_to_end(date_str)
+
+    def _evict(self, protected_dates):
+        """Evict dates until the cache is within its limits, leaving the protected dates alone."""
+        evicted = []
+
+        if self.date_window is not None and protected_dates:
+            latest_date = _parse_date(max(protected_dates))
+            window = datetime.timedelta(days=self.date_window)
+            evicted = [date_str for date_str in self._date_sizes
+                       if abs(_parse_date(date_str) - latest_date) > window]
+
+        rows = self.rows - sum(self._date_sizes[date_str][0] for date_str in evicted)
+        size = self.bytes - sum(self._date_sizes[date_str][1] for date_str in evicted)
+        if _over(rows, self.max_rows, 1.0) or _over(size, self.max_bytes, 1.0):
+            already_evicted = set(evicted)
+            for date_str, (date_rows, date_bytes) in self._date_sizes.items():
+                if not (_over(rows, self.max_rows, self.EVICTION_TARGET) or
+                        _over(size, self.max_bytes, self.EVICTION_TARGET)):
+                    break
+                if date_str in protected_dates or date_str in already_evicted:
+                    continue
+                evicted.append(date_str)
+                rows -= date_rows
+                size -= date_bytes
+
+        if evicted:
+            self._remove_dates(evicted)
+
+    def _remove_dates(self, date_strs):
+        """Remove dates and their announcements from the cache."""
+        evicted_rows = 0
+        for date_str in date_strs:
+            date_rows, date_bytes = self._date_sizes.pop(date_str)
+            evicted_rows += date_rows
+            self.rows -= date_rows
+            self.bytes -= date_bytes
+            self._index_set.discard(date_str)
+            self._fetched_at.pop(date_str, None)
+
+        if evicted_rows:
+            self._drop_rows(date_strs)
+
+        self.evictions += 1
+        self.evicted_dates += len(date_strs)
+        self.evicted_rows += evicted_rows
+        metrics.increment('ecal_cache_evicted_dates_total', len(date_strs), cache=type(self).__name__)
+        metrics.increment('ecal_cache_evicted_rows_total', evicted_rows, cache=type(self).__name__)
+
+
+def _over(value, limit, fraction):
+    return limit is not None and value > limit * fraction
+
+
+def _parse_date(date_str):
+    return datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+
+
+def _date_strs(start_date_str, end_date_str):
+    start_date = _parse_date(start_date_str)
+    return [(start_date + datetime.timedelta(days=i)).strftime('%Y-%m-%d')
+            for i in range((_parse_date(end_date_str) - start_date).days + 1)]
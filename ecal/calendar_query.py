@@ -0,0 +1,147 @@
+__all__ = [
+    'CalendarQuery'
+]
+
+WHEN_VALUES = ('bmo', 'amc', '--')
+
+
+class CalendarQuery(object):
+    """CalendarQuery describes the part of the earnings calendar a caller wants, without fetching anything yet.
+
+    Each method returns a new query with one more filter. The filters are handed to the cache when ``to_frame`` is
+    called, so ``SqliteCache`` applies them in SQL and only the matching rows are ever loaded:
+
+    .. code-block:: python
+
+        import ecal
+
+        cal_df = ecal.query('2008-01-01', '2017-12-31').tickers(['AAPL', 'MSFT']).when('amc').to_frame()
+
+    """
+
+    def __init__(self, start_date_str=None, end_date_str=None, tickers=None, when=None, fetcher=None, cache=None,
+                 calendar=None, compact=False):
+        """
+        Args:
+            start_date_str (str):
+                The start date in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date in the format ``YYYY-MM-DD``. If left out, only the start date is queried.
+            tickers (list):
+                The ticker symbols to keep. None keeps them all.
+            when (list):
+                The ``when`` values to keep. None keeps them all.
+            fetcher (AbstractFetcher):
+                The fetcher to use for dates that aren't cached. If no fetcher is provided, it will use
+                ``ecal.default_fetcher``.
+            cache (AbstractCache):
+                The cache to query. If no cache is provided, it will use ``ecal.default_cache``.
+            calendar (AbstractTradingCalendar):
+                The trading calendar to use for skipping days. If no calendar is provided, it will use
+                ``ecal.default_calendar``.
+            compact (bool):
+                If True, ``to_frame`` returns the calendar in the compact format of ``ecal.dtypes.to_compact``.
+        """
+        self._start_date_str = start_date_str
+        self._end_date_str = end_date_str
+        self._tickers = tickers
+        self._when = when
+        self._fetcher = fetcher
+        self._cache = cache
+        self._calendar = calendar
+        self._compact = compact
+
+    def between(self, start_date_str, end_date_str=None):
+        """Return a query for a different date range.
+
+        Args:
+            start_date_str (str):
+                The start date in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date in the format ``YYYY-MM-DD``. If left out, only the start date is queried.
+
+        Returns:
+            CalendarQuery:
+                The new query.
+        """
+        return self._replace(start_date_str=start_date_str, end_date_str=end_date_str)
+
+    def tickers(self, tickers):
+        """Return a query that only keeps announcements for some tickers.
+
+        Args:
+            tickers (list):
+                The ticker symbols to keep. A single ticker can be passed as a string.
+
+        Returns:
+            CalendarQuery:
+                The new query.
+        """
+        if isinstance(tickers, str):
+            tickers = [tickers]
+        return self._replace(tickers=list(tickers))
+
+    def when(self, *when):
+        """Return a query that only keeps announcements made at some times of day.
+
+        Args:
+            when (str):
+                One or more of ``bmo`` (before market open), ``amc`` (after market close) or ``--`` (no time
+                reported).
+
+        Returns:
+            CalendarQuery:
+                The new query.
+
+        Raises:
+            ValueError:
+                If a value isn't one of the above.
+        """
+        for value in when:
+            if value not in WHEN_VALUES:
+                raise ValueError("when must be 'bmo', 'amc' or '--', not {!r}".format(value))
+        return self._replace(when=list(when))
+
+    def to_frame(self):
+        """Fetch any dates in the range that aren't cached yet and return the matching announcements.
+
+        Returns:
+            DataFrame:
+                A pandas DataFrame indexed by ``date`` and that has columns: ``ticker``, and ``when``, in the same
+                format ``ecal.get`` returns.
+
+        Raises:
+            ValueError:
+                If the query has no date range.
+        """
+        # Imported here because the package imports this module while it is being initialized
+        from . import _calendar_format, _ensure_cached, _read_cache, default_cache
+
+        if self._start_date_str is None:
+            raise ValueError('the query needs a date range. Call between() first.')
+
+        end_date_str = self._start_date_str if self._end_date_str is None else self._end_date_str
+        cache = default_cache if self._cache is None else self._cache
+        _ensure_cached(self._start_date_str, end_date_str, self._fetcher, cache, self._calendar)
+
+        cal_df = _read_cache(cache, 'query', self._start_date_str, end_date_str, self._tickers, self._when)
+        return _calendar_format(cal_df, self._compact)
+
+    def __repr__(self):
+        return 'CalendarQuery(start_date_str={!r}, end_date_str={!r}, tickers={!r}, when={!r})'.format(
+            self._start_date_str, self._end_date_str, self._tickers, self._when)
+
+    def _replace(self, **changes):
+        """Return a copy of this query with some of its arguments changed."""
+        kwargs = {
+            'start_date_str': self._start_date_str,
+            'end_date_str': self._end_date_str,
+            'tickers': self._tickers,
+            'when': self._when,
+            'fetcher': self._fetcher,
+            'cache': self._cache,
+            'calendar': self._calendar,
+            'compact': self._compact
+        }
+        kwargs.update(changes)
+        return CalendarQuery(**kwargs)
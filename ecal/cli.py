@@ -0,0 +1,233 @@
+import argparse
+import datetime
+import sys
+import time
+
+__all__ = [
+    'backfill',
+    'BackfillProgress',
+    'main'
+]
+
+CALENDARS = ('none', 'weekday', 'nyse')
+
+
+def backfill(start_date_str, end_date_str, fetcher, cache, calendar=None, progress=None):
+    """Fetch every date in a range that isn't in the cache yet and add it to the cache.
+
+    Dates are fetched and added ``ecal.checkpoint_days`` at a time, so if the backfill is interrupted, calling it
+    again with the same cache only fetches the dates that are still missing.
+
+    Args:
+        start_date_str (str):
+            The first date to backfill in the format ``YYYY-MM-DD``.
+        end_date_str (str):
+            The last date to backfill in the format ``YYYY-MM-DD``.
+        fetcher (AbstractFetcher):
+            The fetcher to use for downloading data. It paces itself with its own rate limiter.
+        cache (AbstractCache):
+            The cache to fill.
+        calendar (AbstractTradingCalendar):
+            The trading calendar to use for skipping days that can't have announcements. If it's None, no days are
+            skipped.
+        progress (callable):
+            If given, called with a ``BackfillProgress`` after every batch.
+
+    Returns:
+        BackfillProgress:
+            The progress once the backfill has finished.
+    """
+    # Imported here so that ecal --help doesn't have to import pandas
+    import ecal
+
+    date_list = _date_list(start_date_str, end_date_str)
+    missing_dates = cache.check_for_missing_dates(date_list)
+    status = BackfillProgress(len(date_list), len(date_list) - len(missing_dates))
+
+    for batch_start_date_str, batch_end_date_str in ecal._contiguous_spans(missing_dates, ecal.checkpoint_days):
+        ecal._ensure_cached(batch_start_date_str, batch_end_date_str, fetcher, cache, calendar)
+        status.add_batch(len(_date_list(batch_start_date_str, batch_end_date_str)),
+                         len(cache.fetch_calendar(batch_start_date_str, batch_end_date_str)))
+        if progress is not None:
+            progress(status)
+
+    return status
+
+
+class BackfillProgress(object):
+    """How far a backfill has got.
+
+        Attributes:
+            total_dates (int):
+                The number of dates in the range.
+            cached_dates (int):
+                The number of dates that were already in the cache when the backfill started.
+            fetched_dates (int):
+                The number of dates fetched so far.
+            announcements (int):
+                The number of announcements fetched so far.
+    """
+
+    def __init__(self, total_dates, cached_dates):
+        self.total_dates = total_dates
+        self.cached_dates = cached_dates
+        self.fetched_dates = 0
+        self.announcements = 0
+        self._start_time = time.monotonic()
+
+    def add_batch(self, dates, announcements):
+        self.fetched_dates += dates
+        self.announcements += announcements
+
+    @property
+    def elapsed(self):
+        """The time (in seconds) since the backfill started."""
+        return time.monotonic() - self._start_time
+
+    @property
+    def remaining_dates(self):
+        return self.total_dates - self.cached_dates - self.fetched_dates
+
+    @property
+    def eta(self):
+        """The estimated time (in seconds) until the backfill finishes, or None before the first batch."""
+        if not self.fetched_dates:
+            return None
+        return self.elapsed / self.fetched_dates * self.remaining_dates
+
+    def __str__(self):
+        done_dates = self.cached_dates + self.fetched_dates
+        percent = 100.0 * done_dates / self.total_dates if self.total_dates else 100.0
+        return '{}/{} dates ({:.1f}%), {} announcements, {:.2f} dates/s, ETA {}'.format(
+            done_dates, self.total_dates, percent, self.announcements, _per_second(self.fetched_dates, self.elapsed),
+            _format_duration(self.eta))
+
+
+def main(argv=None):
+    """Run the ecal command line tool."""
+    parser = argparse.ArgumentParser(prog='ecal', description='Tools for the ecal earnings announcement calendar.')
+    subparsers = parser.add_subparsers(dest='command')
+
+    backfill_parser = subparsers.add_parser(
+        'backfill', help='fetch a range of dates into a cache',
+        description='Fetch every date in a range that is not cached yet. Run it again to resume after an '
+                    'interruption.')
+    backfill_parser.add_argument('--start', required=True, help='the first date to backfill (YYYY-MM-DD)')
+    backfill_parser.add_argument('--end', help='the last date to backfill (YYYY-MM-DD). Defaults to today')
+    backfill_parser.add_argument('--cache', default='sqlite:ecal.db',
+                                 help='sqlite:PATH for a SqliteCache, or runtime (default sqlite:ecal.db)')
+    backfill_parser.add_argument('--calendar', choices=CALENDARS, default='none',
+                                 help='skip days that this trading calendar has no trading on (default none)')
+    backfill_parser.add_argument('--rate-limit', type=float, default=1.0,
+                                 help='the seconds between the start of two API calls (default 1.0)')
+    backfill_parser.add_argument('--rate-limit-file',
+                                 help='share the rate limit with other processes through this lock file')
+    backfill_parser.add_argument('--max-in-flight', type=int, default=8,
+                                 help='the most API calls waiting on a response at once (default 8)')
+    backfill_parser.add_argument('--url', default='https://api.earningscalendar.net/', help='the URL of the API')
+    backfill_parser.add_argument('--quiet', action='store_true', help='only print the summary')
+
+    args = parser.parse_args(argv)
+    if args.command != 'backfill':
+        parser.print_help()
+        return 2
+
+    try:
+        start_date_str = _parse_date(args.start)
+        end_date_str = _parse_date(args.end) if args.end else datetime.date.today().strftime('%Y-%m-%d')
+        cache = _make_cache(args.cache)
+    except ValueError as e:
+        parser.error(str(e))
+
+    return _run_backfill(args, start_date_str, end_date_str, cache)
+
+
+def _run_backfill(args, start_date_str, end_date_str, cache):
+    """Run the backfill command with parsed arguments and return the exit code."""
+    import ecal
+
+    rate_limiter = None
+    if args.rate_limit_file:
+        rate_limiter = ecal.FileRateLimiter(args.rate_limit_file, interval=args.rate_limit)
+    fetcher = ecal.AsyncECNFetcher(rate_limit=args.rate_limit, max_in_flight=args.max_in_flight,
+                                   rate_limiter=rate_limiter, url=args.url)
+    calendar = _make_calendar(args.calendar)
+
+    progress = None
+    if not args.quiet:
+        end = '\r' if sys.stderr.isatty() else '\n'
+        progress = lambda status: print(status, end=end, file=sys.stderr, flush=True)
+
+    status = None
+    try:
+        status = backfill(start_date_str, end_date_str, fetcher, cache, calendar, progress)
+    except KeyboardInterrupt:
+        print('\nInterrupted. The dates fetched so far are in the cache, so run the same command to resume.',
+              file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(e)
+        return 1
+    finally:
+        if progress is not None and status is not None and sys.stderr.isatty():
+            print(file=sys.stderr)
+
+    print('Backfilled {} to {}: {} dates were already cached, fetched {} dates and {} announcements in {} '
+          '({:.2f} dates/s, {:.1f} announcements/s).'.format(
+              start_date_str, end_date_str, status.cached_dates, status.fetched_dates, status.announcements,
+              _format_duration(status.elapsed), _per_second(status.fetched_dates, status.elapsed),
+              _per_second(status.announcements, status.elapsed)))
+    return 0
+
+
+def _make_cache(spec):
+    """Return the cache described by a ``--cache`` argument."""
+    import ecal
+
+    if spec == 'runtime':
+        return ecal.RuntimeCache()
+    kind, _, path = spec.partition(':')
+    if kind == 'sqlite' and path:
+        return ecal.SqliteCache(path)
+    raise ValueError('--cache must be sqlite:PATH or runtime, not {!r}'.format(spec))
+
+
+def _make_calendar(calendar_name):
+    """Return the trading calendar named by a ``--calendar`` argument."""
+    import ecal
+
+    if calendar_name == 'weekday':
+        return ecal.WeekdayCalendar()
+    if calendar_name == 'nyse':
+        return ecal.NYSECalendar()
+    return None
+
+
+def _parse_date(date_str):
+    """Check that a date is in the format ``YYYY-MM-DD`` and return it."""
+    try:
+        datetime.datetime.strptime(date_str, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError('dates must be in the format YYYY-MM-DD, not {!r}'.format(date_str))
+    return date_str
+
+
+def _date_list(start_date_str, end_date_str):
+    start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d').date()
+    end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d').date()
+    return [(start_date + datetime.timedelta(days=i)).strftime('%Y-%m-%d')
+            for i in range((end_date - start_date).days + 1)]
+
+
+def _per_second(count, seconds):
+    return count / seconds if seconds > 0 else 0.0
+
+
+def _format_duration(seconds):
+    if seconds is None:
+        return '--:--:--'
+    return str(datetime.timedelta(seconds=int(round(seconds))))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,356 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from .abstract_cache import AbstractCache
+
+__all__ = [
+    'ColumnarCache'
+]
+
+"""
+The codes of the ``when`` values. Anything else is stored as MISSING_WHEN and read back as None.
+"""
+WHEN_VALUES = ('bmo', 'amc', '--')
+MISSING_WHEN = 255
+
+_WHEN_LOOKUP = np.array(list(WHEN_VALUES) + [None] * (256 - len(WHEN_VALUES)), dtype=object)
+
+# Day ordinals are days since 1970-01-01 and can be negative, so they're offset to make the ticker keys sortable
+_DAY_OFFSET = 2 ** 31
+
+
+class ColumnarCache(AbstractCache):
+    """ColumnarCache keeps earnings announcements in memory as NumPy arrays instead of a DataFrame of strings.
+
+    Each announcement takes 9 bytes: an ``int32`` day ordinal, an ``int32`` id into a table of ticker symbols and a
+    ``uint8`` code for ``when``. Ten years of US announcements fit in a couple of megabytes. The arrays are kept
+    sorted by day, so a date range is found with ``np.searchsorted`` and a DataFrame is only built for the rows
+    that are returned:
+
+    .. code-block:: python
+
+        import ecal
+
+        ecal.default_cache = ecal.ColumnarCache()
+
+        Attributes:
+            _days (ndarray):
+                The day of each announcement, as days since 1970-01-01, in increasing order.
+            _ticker_ids (ndarray):
+                The id of the ticker of each announcement in the symbol table.
+            _whens (ndarray):
+                The code of the ``when`` of each announcement.
+            _symbols (list):
+                The symbol table. Each ticker is stored once and its id is its position in the list.
+            _symbol_ids (dict):
+                The id of each ticker in the symbol table.
+            _index_set (set):
+                Set containing all the dates that earnings announcements have been fetched for.
+            _fetched_at (dict):
+                The time (as returned by ``time.time()``) each date was added to the cache.
+            _lock (RLock):
+                Lock that makes the cache safe to share between threads.
+    """
+
+    def __init__(self):
+        self._days = np.empty(0, dtype=np.int32)
+        self._ticker_ids = np.empty(0, dtype=np.int32)
+        self._whens = np.empty(0, dtype=np.uint8)
+        self._symbols = []
+        self._symbol_ids = {}
+        self._symbol_array = np.empty(0, dtype=object)
+        self._ticker_keys = None
+        self._index_set = set()
+        self._fetched_at = {}
+        self._lock = threading.RLock()
+
+    @property
+    def nbytes(self):
+        """The memory (in bytes) used by the announcement arrays, leaving out the symbol table."""
+        return self._days.nbytes + self._ticker_ids.nbytes + self._whens.nbytes
+
+    def check_for_missing_dates(self, date_list):
+        """Look in the cache for dates and return the dates that aren't in the cache.
+
+        Args:
+            date_list (list):
+                The list of dates to check the cache for.
+
+        Returns:
+            list:
+                The dates from the date_list that are not in the cache.
+        """
+        with self._lock:
+            return [date for date in date_list if date not in self._index_set]
+
+    def add(self, missing_dates, uncached_announcements):
+        """Add the uncached announcements to the cache.
+
+        If some of the dates are already in the cache, their old announcements are replaced.
+
+        Args:
+            missing_dates (list):
+                The dates that were fetched and should be added to the cache index. Even dates that have no data
+                should be added to the cache index so that if requested again, we return nothing for them without
+                using the fetcher.
+            uncached_announcements (DataFrame):
+                A Dataframe containing uncached announcements that should be added to the cache.
+        """
+        fetched_time = time.time()
+        missing_dates_set = set(missing_dates)
+
+        days = np.empty(0, dtype=np.int32)
+        whens = np.empty(0, dtype=np.uint8)
+        tickers = np.empty(0, dtype=object)
+        if uncached_announcements is not None and len(uncached_announcements):
+            days = _to_days(uncached_announcements.index)
+            whens = _to_when_codes(uncached_announcements['when'])
+            tickers = np.asarray(uncached_announcements['ticker'], dtype=object)
+
+        with self._lock:
+            ticker_ids = self._intern(tickers)
+
+            all_days, all_ticker_ids, all_whens = self._days, self._ticker_ids, self._whens
+            if not missing_dates_set.isdisjoint(self._index_set):
+                keep = ~np.isin(all_days, _to_days(list(missing_dates_set)))
+                all_days, all_ticker_ids, all_whens = all_days[keep], all_ticker_ids[keep], all_whens[keep]
+
+            all_days = np.concatenate([all_days, days])
+            all_ticker_ids = np.concatenate([all_ticker_ids, ticker_ids])
+            all_whens = np.concatenate([all_whens, whens])
+
+            # New days usually come after the cached ones. If not, a stable sort keeps the order within each day.
+            if len(all_days) and np.any(all_days[1:] < all_days[:-1]):
+                order = np.argsort(all_days, kind='stable')
+                all_days, all_ticker_ids, all_whens = all_days[order], all_ticker_ids[order], all_whens[order]
+
+            self._days, self._ticker_ids, self._whens = all_days, all_ticker_ids, all_whens
+            self._ticker_keys = None
+            self._index_set |= missing_dates_set
+            for date in missing_dates:
+                self._fetched_at[date] = fetched_time
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        """Returns the earnings calendar from the cache as a pandas DataFrame.
+
+        Args:
+            start_date_str (str):
+                The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date of the earnings calendar in the format ``YYYY-MM-DD``.
+                If left out, we will fetch only the announcements for the start date.
+
+        Returns:
+            DataFrame:
+                Returns a pandas DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``
+                and a row for each announcement.
+        """
+        return self.query(start_date_str, end_date_str)
+
+    def query(self, start_date_str, end_date_str=None, tickers=None, when=None):
+        """Returns the announcements from the cache that match some filters as a pandas DataFrame.
+
+        The filters are applied to the arrays, so a DataFrame is only built for the matching rows.
+
+        Args:
+            start_date_str (str):
+                The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date of the earnings calendar in the format ``YYYY-MM-DD``.
+                If left out, we will fetch only the announcements for the start date.
+            tickers (list):
+                The ticker symbols to keep. None keeps them all.
+            when (list):
+                The ``when`` values to keep. None keeps them all.
+
+        Returns:
+            DataFrame:
+                Returns a pandas DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``
+                and a row for each announcement.
+        """
+        if end_date_str is None:
+            end_date_str = start_date_str
+
+        with self._lock:
+            start = np.searchsorted(self._days, _to_day(start_date_str), side='left')
+            end = np.searchsorted(self._days, _to_day(end_date_str), side='right')
+            days = self._days[start:end]
+            ticker_ids = self._ticker_ids[start:end]
+            whens = self._whens[start:end]
+            symbol_array = self._symbol_array
+
+            if tickers is not None:
+                keep = np.isin(ticker_ids, [self._symbol_ids[t] for t in tickers if t in self._symbol_ids])
+                days, ticker_ids, whens = days[keep], ticker_ids[keep], whens[keep]
+            if when is not None:
+                keep = np.isin(whens, _to_when_codes(when))
+                days, ticker_ids, whens = days[keep], ticker_ids[keep], whens[keep]
+
+        # Building the frame from a single 2D block is several times faster than from a dict of columns
+        values = np.empty((len(days), 2), dtype=object)
+        values[:, 0] = symbol_array[ticker_ids]
+        values[:, 1] = _WHEN_LOOKUP[whens]
+        return pd.DataFrame(values, index=pd.Index(_to_date_strs(days), dtype=object, name='date'),
+                            columns=['ticker', 'when'])
+
+    def fetched_at(self, date_list):
+        """Look in the cache for when dates were fetched.
+
+        Args:
+            date_list (list):
+                The list of dates to look for.
+
+        Returns:
+            dict:
+                The time (as returned by ``time.time()``) each date in the cache was last added, keyed by date.
+                Dates that aren't in the cache are left out.
+        """
+        with self._lock:
+            return {date: self._fetched_at.get(date) for date in date_list if date in self._index_set}
+
+    def next_announcements(self, tickers, start_date_str, end_date_str=None):
+        """Look in the cache for the first announcement of each ticker on or after a date.
+
+        All the tickers are looked up at once with a binary search of the announcements sorted by ticker and day.
+
+        Args:
+            tickers (list):
+                The ticker symbols to look for.
+            start_date_str (str):
+                The first date to look at in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The last date to look at in the format ``YYYY-MM-DD``. If left out, all the later cached dates are
+                looked at.
+
+        Returns:
+            DataFrame:
+                A pandas DataFrame indexed by ``ticker``, that has columns: ``date`` and ``when``, with a row for
+                each ticker that has an announcement in the range.
+        """
+        last_day = None if end_date_str is None else _to_day(end_date_str)
+        return self._nearest_announcements(tickers, _to_day(start_date_str), 'left', 0, _to_day(start_date_str),
+                                           last_day)
+
+    def previous_announcements(self, tickers, end_date_str, start_date_str=None):
+        """Look in the cache for the last announcement of each ticker on or before a date.
+
+        All the tickers are looked up at once with a binary search of the announcements sorted by ticker and day.
+
+        Args:
+            tickers (list):
+                The ticker symbols to look for.
+            end_date_str (str):
+                The last date to look at in the format ``YYYY-MM-DD``.
+            start_date_str (str):
+                The first date to look at in the format ``YYYY-MM-DD``. If left out, all the earlier cached dates
+                are looked at.
+
+        Returns:
+            DataFrame:
+                A pandas DataFrame indexed by ``ticker``, that has columns: ``date`` and ``when``, with a row for
+                each ticker that has an announcement in the range.
+        """
+        first_day = None if start_date_str is None else _to_day(start_date_str)
+        return self._nearest_announcements(tickers, _to_day(end_date_str), 'right', -1, first_day,
+                                           _to_day(end_date_str))
+
+    def _nearest_announcements(self, tickers, day, side, step, first_day, last_day):
+        """Find the announcement of each ticker next to a day in the ticker keys.
+
+        Args:
+            tickers (list):
+                The ticker symbols to look for.
+            day (int):
+                The day to search for.
+            side (str):
+                The side to pass to ``np.searchsorted``.
+            step (int):
+                Added to the position found by the search to get the announcement, -1 to look before the day.
+            first_day (int):
+                The first day an announcement can be on, or None.
+            last_day (int):
+                The last day an announcement can be on, or None.
+        """
+        rows = np.empty(0, dtype=np.int64)
+        with self._lock:
+            keys, order = self._get_ticker_keys()
+            found_tickers = np.asarray([ticker for ticker in dict.fromkeys(tickers) if ticker in self._symbol_ids],
+                                       dtype=object)
+            if len(keys) and len(found_tickers):
+                ticker_ids = np.array([self._symbol_ids[ticker] for ticker in found_tickers], dtype=np.int64)
+                positions = np.searchsorted(keys, _ticker_key(ticker_ids, day), side=side) + step
+                valid = (positions >= 0) & (positions < len(keys))
+                rows = order[np.where(valid, positions, 0)]
+
+                # The announcement found can belong to the next or previous ticker, or be out of the range
+                valid &= self._ticker_ids[rows] == ticker_ids
+                if first_day is not None:
+                    valid &= self._days[rows] >= first_day
+                if last_day is not None:
+                    valid &= self._days[rows] <= last_day
+                found_tickers, rows = found_tickers[valid], rows[valid]
+            else:
+                found_tickers = found_tickers[:0]
+
+            days = self._days[rows]
+            whens = self._whens[rows]
+
+        return pd.DataFrame({'date': _to_date_strs(days), 'when': _WHEN_LOOKUP[whens]},
+                            index=pd.Index(found_tickers, dtype=object, name='ticker'),
+                            columns=['date', 'when'])
+
+    def _get_ticker_keys(self):
+        """Return the announcements' keys sorted by ticker and then day, and the row of each key."""
+        if self._ticker_keys is None:
+            keys = _ticker_key(self._ticker_ids.astype(np.int64), self._days.astype(np.int64))
+            order = np.argsort(keys, kind='stable')
+            self._ticker_keys = (keys[order], order)
+        return self._ticker_keys
+
+    def _intern(self, tickers):
+        """Return the symbol table id of each ticker, adding the tickers that aren't in the table yet."""
+        codes, uniques = pd.factorize(tickers)
+        unique_ids = np.empty(len(uniques), dtype=np.int32)
+        new_symbols = []
+        for i, ticker in enumerate(uniques):
+            ticker_id = self._symbol_ids.get(ticker)
+            if ticker_id is None:
+                ticker_id = self._symbol_ids[ticker] = len(self._symbols) + len(new_symbols)
+                new_symbols.append(ticker)
+            unique_ids[i] = ticker_id
+
+        if new_symbols:
+            self._symbols.extend(new_symbols)
+            self._symbol_array = np.asarray(self._symbols, dtype=object)
+        return unique_ids[codes] if len(codes) else np.empty(0, dtype=np.int32)
+
+
+def _ticker_key(ticker_ids, days):
+    """Combine ticker ids and days into one int64 key that sorts by ticker and then day."""
+    return (ticker_ids << 32) + (np.asarray(days, dtype=np.int64) + _DAY_OFFSET)
+
+
+def _to_day(date_str):
+    """Return the day ordinal of a date in the format ``YYYY-MM-DD``."""
+    # An int32 and not a Python int, or np.searchsorted copies the whole day array to int64 to compare them
+    return np.datetime64(date_str, 'D').astype(np.int32)
+
+
+def _to_days(dates):
+    """Return the day ordinals of the dates in an index or list as an int32 array."""
+    if isinstance(dates, pd.DatetimeIndex):
+        return dates.values.astype('datetime64[D]').astype(np.int32)
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int32)
+
+
+def _to_date_strs(days):
+    """Return day ordinals as an object array of dates in the format ``YYYY-MM-DD``."""
+    # A range has far fewer days than announcements, so only format each day once
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    return np.datetime_as_string(unique_days.astype('datetime64[D]'), unit='D').astype(object)[inverse]
+
+
+def _to_when_codes(whens):
+    """Return the codes of ``when`` values as a uint8 array."""
+    return pd.Categorical(np.asarray(whens, dtype=object), categories=WHEN_VALUES).codes.astype(np.uint8)
@@ -0,0 +1,158 @@
+import collections
+import concurrent.futures
+import time
+import pandas as pd
+from .abstract_fetcher import AbstractFetcher
+
+__all__ = [
+    'CompositeFetcher'
+]
+
+
+class CompositeFetcher(AbstractFetcher):
+    """CompositeFetcher gets earnings announcements from several fetchers as if they were one.
+
+    By default the fetchers are tried in order. If a fetcher raises an error, the next one is called straight away.
+    If a fetcher is slower than its usual ``hedge_percentile`` latency, a hedged request is sent to the next fetcher
+    and whichever answers first wins. With ``merge=True`` every fetcher is called and their announcements are
+    combined. Either way duplicate (date, ticker, when) rows are dropped.
+
+        Attributes:
+            _latencies (dict):
+                A ``deque`` for each fetcher with its recent latencies (in seconds per day fetched).
+    """
+
+    def __init__(self, fetchers, hedge_percentile=95, min_samples=10, max_samples=100, merge=False):
+        """
+        Args:
+            fetchers (list):
+                The ``AbstractFetcher`` instances to use, primary first.
+            hedge_percentile (float):
+                The latency percentile of a fetcher after which a hedged request is sent to the next one.
+                ``None`` turns hedging off so the next fetcher is only used when one fails.
+            min_samples (int):
+                The number of calls a fetcher must have made before its latency is used for hedging.
+            max_samples (int):
+                The number of recent calls kept for each fetcher's latency percentile.
+            merge (bool):
+                If True, call every fetcher and combine their announcements instead of using the first answer.
+        """
+        if not fetchers:
+            raise ValueError('CompositeFetcher needs at least one fetcher')
+
+        self._fetchers = list(fetchers)
+        self._hedge_percentile = hedge_percentile
+        self._min_samples = min_samples
+        self._merge = merge
+        self._latencies = {id(fetcher): collections.deque(maxlen=max_samples) for fetcher in self._fetchers}
+
+        # Requests that lose a hedge can't be cancelled, so they finish in the background on this pool.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=2 * len(self._fetchers))
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        """Returns the earnings calendar as a pandas DataFrame.
+
+        Args:
+            start_date_str (str):
+                The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date of the earnings calendar in the format ``YYYY-MM-DD``.
+                If left out, we will fetch only the announcements for the start date.
+
+        Returns:
+            DataFrame:
+                Returns a pandas DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``
+                and a row for each announcement.
+
+        Raises:
+            Exception:
+                The error from the last fetcher if none of them succeeded.
+        """
+        if end_date_str is None:
+            end_date_str = start_date_str
+
+        num_days = len(pd.date_range(start_date_str, end_date_str))
+
+        if self._merge:
+            df = self._fetch_merged(start_date_str, end_date_str, num_days)
+        else:
+            df = self._fetch_hedged(start_date_str, end_date_str, num_days)
+
+        return self._drop_duplicates(df)
+
+    def _fetch_hedged(self, start_date_str, end_date_str, num_days):
+        """Return the first successful answer, calling the next fetcher when one fails or is slow."""
+        pending = {}
+        next_fetcher = 0
+        last_error = None
+
+        while True:
+            if not pending:
+                if next_fetcher == len(self._fetchers):
+                    raise last_error
+                future = self._submit(self._fetchers[next_fetcher], start_date_str, end_date_str, num_days)
+                pending[future] = self._fetchers[next_fetcher]
+                next_fetcher += 1
+
+            # Only hedge if there is another fetcher to hedge to
+            timeout = None
+            if next_fetcher < len(self._fetchers):
+                timeout = self._hedge_delay(self._fetchers[next_fetcher - 1], num_days)
+
+            done, _ = concurrent.futures.wait(pending, timeout=timeout,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+
+            if not done:
+                # The latest fetcher is slow so send a hedged request to the next one
+                future = self._submit(self._fetchers[next_fetcher], start_date_str, end_date_str, num_days)
+                pending[future] = self._fetchers[next_fetcher]
+                next_fetcher += 1
+                continue
+
+            for future in done:
+                del pending[future]
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+
+    def _fetch_merged(self, start_date_str, end_date_str, num_days):
+        """Call every fetcher and concatenate the answers of the ones that succeeded."""
+        futures = [self._submit(fetcher, start_date_str, end_date_str, num_days) for fetcher in self._fetchers]
+
+        results = []
+        last_error = None
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                last_error = e
+
+        if not results:
+            raise last_error
+
+        return pd.concat(results).sort_index(kind='mergesort')
+
+    def _submit(self, fetcher, start_date_str, end_date_str, num_days):
+        """Call a fetcher on the thread pool, recording how long it takes if it succeeds."""
+
+        def timed_fetch():
+            start_time = time.monotonic()
+            df = fetcher.fetch_calendar(start_date_str, end_date_str)
+            self._latencies[id(fetcher)].append((time.monotonic() - start_time) / num_days)
+            return df
+
+        return self._executor.submit(timed_fetch)
+
+    def _hedge_delay(self, fetcher, num_days):
+        """Return how long (in seconds) to wait for a fetcher before hedging, or None to wait for it to finish."""
+        latencies = self._latencies[id(fetcher)]
+        if self._hedge_percentile is None or len(latencies) < self._min_samples:
+            return None
+        return pd.Series(list(latencies)).quantile(self._hedge_percentile / 100.0) * num_days
+
+    def _drop_duplicates(self, df):
+        """Drop the rows that have the same date, ticker and when."""
+        df = df.rename_axis('date').reset_index()
+        df = df.drop_duplicates(subset=['date', 'ticker', 'when'])
+        return df.set_index('date')
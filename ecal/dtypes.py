@@ -0,0 +1,134 @@
+import threading
+import pandas as pd
+
+__all__ = [
+    'WHEN_DTYPE',
+    'to_compact',
+    'to_standard',
+    'is_compact',
+    'concat_compact'
+]
+
+"""
+The ``when`` column only ever has these three values, so a categorical stores it in one byte per row.
+"""
+WHEN_DTYPE = pd.CategoricalDtype(['bmo', 'amc', '--'])
+
+
+class _TickerCategories(object):
+    """The ticker categories shared by every compact calendar.
+
+    Tickers are only ever appended, so a ticker keeps the same code for the life of the process and compact frames
+    from different calls can be joined without falling back to object columns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes = {}
+        self._categories = pd.Index([], dtype=object)
+
+    def categories(self, tickers):
+        """Return the shared categories after adding any tickers that haven't been seen yet.
+
+        Args:
+            tickers (iterable):
+                The tickers that are about to be stored.
+
+        Returns:
+            Index:
+                Every ticker seen so far, in the order they were first seen.
+        """
+        with self._lock:
+            new_tickers = [ticker for ticker in pd.unique(tickers) if ticker not in self._codes]
+            if new_tickers:
+                for ticker in new_tickers:
+                    self._codes[ticker] = len(self._codes)
+                self._categories = self._categories.append(pd.Index(new_tickers, dtype=object))
+            return self._categories
+
+
+_ticker_categories = _TickerCategories()
+
+
+def is_compact(cal_df):
+    """Return True if a calendar DataFrame is in the compact format."""
+    return isinstance(cal_df.index, pd.DatetimeIndex) or isinstance(cal_df['ticker'].dtype, pd.CategoricalDtype)
+
+
+def to_compact(cal_df):
+    """Convert a calendar DataFrame to the compact format.
+
+    The compact format has the same rows and columns but is an order of magnitude smaller: ``date`` is a
+    ``DatetimeIndex``, ``ticker`` is categorical with categories shared by all compact calendars and ``when`` is
+    categorical with the categories ``bmo``, ``amc`` and ``--``.
+
+    Args:
+        cal_df (DataFrame):
+            A calendar DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``. It can already be
+            compact, in which case its ticker categories are brought up to date.
+
+    Returns:
+        DataFrame:
+            The compact calendar.
+    """
+    tickers = cal_df['ticker']
+    if isinstance(tickers.dtype, pd.CategoricalDtype):
+        ticker_values = tickers.cat.set_categories(_ticker_categories.categories(tickers.cat.categories)).values
+    else:
+        ticker_values = pd.Categorical(tickers.values, categories=_ticker_categories.categories(tickers.values))
+
+    return pd.DataFrame({'ticker': ticker_values, 'when': pd.Categorical(cal_df['when'].values, dtype=WHEN_DTYPE)},
+                        index=_date_index(cal_df.index),
+                        columns=['ticker', 'when'])
+
+
+def _date_index(index):
+    """Return the dates of a calendar as a ``DatetimeIndex``."""
+    if not isinstance(index, pd.DatetimeIndex):
+        index = pd.to_datetime(index, format='%Y-%m-%d')
+    return pd.DatetimeIndex(index, name='date')
+
+
+def to_standard(cal_df):
+    """Convert a calendar DataFrame back from the compact format.
+
+    Args:
+        cal_df (DataFrame):
+            A calendar DataFrame in either format.
+
+    Returns:
+        DataFrame:
+            The calendar indexed by ``date`` strings in the format ``YYYY-MM-DD``, with ``ticker`` and ``when`` as
+            strings. Frames that aren't compact are returned as they are.
+    """
+    if not is_compact(cal_df):
+        return cal_df
+
+    index = cal_df.index
+    if isinstance(index, pd.DatetimeIndex):
+        index = pd.Index(index.strftime('%Y-%m-%d'), dtype=object, name='date')
+
+    return pd.DataFrame({'ticker': cal_df['ticker'].astype(object).values,
+                         'when': cal_df['when'].astype(object).values},
+                        index=index, columns=['ticker', 'when'])
+
+
+def concat_compact(cal_dfs):
+    """Join compact calendar DataFrames together.
+
+    ``pd.concat`` turns categorical columns into object columns unless every frame has the same categories, so the
+    frames are all brought up to the same ticker categories first.
+
+    Args:
+        cal_dfs (list):
+            The compact calendars to join.
+
+    Returns:
+        DataFrame:
+            The joined compact calendar.
+    """
+    cal_dfs = [cal_df if isinstance(cal_df['ticker'].dtype, pd.CategoricalDtype) else to_compact(cal_df)
+               for cal_df in cal_dfs]
+    categories = _ticker_categories.categories(pd.Index([]).append([cal_df['ticker'].cat.categories
+                                                                    for cal_df in cal_dfs]))
+    return pd.concat([cal_df.assign(ticker=cal_df['ticker'].cat.set_categories(categories)) for cal_df in cal_dfs])
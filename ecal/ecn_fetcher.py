@@ -1,8 +1,9 @@
-import time
 import datetime
-import requests
 import pandas as pd
 from .abstract_fetcher import AbstractFetcher
+from .rate_limiter import RateLimiter
+from .http_transport import HttpTransport
+from .instrumentation import metrics
 
 __all__ = [
     'ECNFetcher'
@@ -13,17 +14,34 @@ class ECNFetcher(AbstractFetcher):
     """This class fetches earnings announcements from ``api.earningscalendar.net``.
 
     One of the main things ECNFetcher does is prevent calling the API too many times to prevent throttling.
+    Pass the same ``rate_limiter`` to several fetchers (or a ``FileRateLimiter`` to fetchers in several processes)
+    to keep all of them under the API's limit together.
     """
 
-    def __init__(self, rate_limit=1.5):
+    def __init__(self, rate_limit=1.0, rate_limiter=None, transport=None, url='https://api.earningscalendar.net/'):
         """
         Args:
 
             rate_limit (float):
-                The time (in seconds) to wait in between calls to the API.
+                The time (in seconds) to wait in between calls to the API. If the API throttles us the fetcher
+                backs off from this and ramps back to it after a run of successful calls.
+            rate_limiter (AbstractRateLimiter):
+                The rate limiter that spaces out calls to the API. If left out, the fetcher uses its own
+                ``RateLimiter`` with an interval of ``rate_limit``.
+            transport (HttpTransport):
+                The transport used to call the API. If left out, the fetcher uses its own ``HttpTransport`` with
+                the default timeouts and retry policy.
+            url (str):
+                The URL of the API. Point this at an ``ecal.stub_server.StubECNServer`` to test offline.
         """
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(rate_limit)
+        if transport is None:
+            transport = HttpTransport()
         self._rate_limit = rate_limit
-        self._last_call_time = time.time()
+        self._rate_limiter = rate_limiter
+        self._transport = transport
+        self._url = url
 
     def fetch_calendar(self, start_date_str, end_date_str=None):
         """Returns the earnings calendar as a pandas DataFrame.
@@ -90,18 +108,28 @@ class ECNFetcher(AbstractFetcher):
 
         """
         # Be sure not to exceed the api throttling of 1 call per second
-        current_time = time.time()
-        if current_time <= self._last_call_time + 1:
-            time.sleep(self._rate_limit)
+        self._rate_limiter.acquire()
+        return self._request_announcements(date_str)
 
+    def _request_announcements(self, date_str):
+        """Call the API for a date. The caller must wait for a slot from the rate limiter first.
+
+        Args:
+            date_str (str):
+                A date in the format ``YYYY-MM-DD``
+
+        Returns:
+            list:
+                A list of earnings announcements for a date. See ``_earnings_announcements_for_date``.
+        """
         formatted_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').strftime('%Y%m%d')
         payload = {'date': formatted_date}
-        self._last_call_time = time.time()
-        r = requests.get('https://api.earningscalendar.net/', params=payload)
+        r = self._transport.get(self._url, params=payload, rate_limiter=self._rate_limiter)
 
         try:
-            raw_announcements_list = r.json()
-            transformed_announcements_list = self._transform(raw_announcements_list)
+            with metrics.timer('ecal_json_parse_seconds'):
+                raw_announcements_list = r.json()
+                transformed_announcements_list = self._transform(raw_announcements_list)
             return transformed_announcements_list
         except ValueError as e:
             print(e)
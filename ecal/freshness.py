@@ -0,0 +1,72 @@
+import datetime
+import time
+
+__all__ = [
+    'FreshnessPolicy'
+]
+
+
+class FreshnessPolicy(object):
+    """FreshnessPolicy decides when a cached date is stale and should be fetched again.
+
+    Calendars for upcoming dates keep changing while the calendar for a date long gone doesn't, so recent and
+    future dates get their own time to live. ``ecal.get`` still returns stale dates straight from the cache but
+    refreshes them in the background.
+
+    .. code-block:: python
+
+        import ecal
+
+        # Refetch today and later dates after 6 hours. Never refetch dates before today.
+        ecal.default_freshness = ecal.FreshnessPolicy(future_ttl=6 * 60 * 60)
+
+    """
+
+    def __init__(self, future_ttl=6 * 60 * 60, past_ttl=None, recent_days=0):
+        """
+        Args:
+            future_ttl (float):
+                The time (in seconds) after which recent and future dates are stale. None means never.
+            past_ttl (float):
+                The time (in seconds) after which older dates are stale. None means never.
+            recent_days (int):
+                The number of days before today that still count as recent. By default, today and later dates
+                are recent.
+        """
+        self.future_ttl = future_ttl
+        self.past_ttl = past_ttl
+        self.recent_days = recent_days
+
+    def stale_dates(self, fetched_at, now=None, today=None):
+        """Return the dates that were fetched too long ago.
+
+        Args:
+            fetched_at (dict):
+                The time (as returned by ``time.time()``) each date was fetched, keyed by date in the format
+                ``YYYY-MM-DD``. A time of None means it isn't known when the date was fetched, which is
+                treated as stale.
+            now (float):
+                The current time. If left out, ``time.time()`` is used.
+            today (date):
+                Today's date. If left out, ``datetime.date.today()`` is used.
+
+        Returns:
+            list:
+                The stale dates, sorted.
+        """
+        if now is None:
+            now = time.time()
+        if today is None:
+            today = datetime.date.today()
+
+        first_recent_date_str = (today - datetime.timedelta(days=self.recent_days)).strftime('%Y-%m-%d')
+
+        stale_dates_list = []
+        for date_str, fetched_time in fetched_at.items():
+            ttl = self.future_ttl if date_str >= first_recent_date_str else self.past_ttl
+            if ttl is None:
+                continue
+            if fetched_time is None or now - fetched_time > ttl:
+                stale_dates_list.append(date_str)
+
+        return sorted(stale_dates_list)
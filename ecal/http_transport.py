@@ -0,0 +1,145 @@
+import datetime
+import email.utils
+import random
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from .instrumentation import metrics
+
+__all__ = [
+    'HttpTransport'
+]
+
+
+class HttpTransport(object):
+    """HttpTransport sends HTTP requests for fetchers over a pool of keep-alive connections.
+
+    Every request has a connect and read timeout so a hung socket can't stall ``ecal.get`` forever. Connection
+    errors, timeouts and ``5xx`` responses are retried after a jittered exponential backoff. ``429`` responses are
+    retried after the server's ``Retry-After`` and are reported to the rate limiter so it can slow down.
+
+        Attributes:
+            _session (Session):
+                The ``requests.Session`` that owns the connection pool.
+    """
+
+    THROTTLED_STATUS_CODE = 429
+    RETRY_STATUS_CODES = frozenset([500, 502, 503, 504])
+
+    def __init__(self, connect_timeout=3.05, read_timeout=10.0, max_retries=3, backoff_factor=0.5,
+                 max_backoff=30.0, pool_size=10):
+        """
+        Args:
+            connect_timeout (float):
+                The time (in seconds) to wait for a connection to the server.
+            read_timeout (float):
+                The time (in seconds) to wait for the server to send data once connected.
+            max_retries (int):
+                The number of times a failed request is retried before giving up.
+            backoff_factor (float):
+                The base of the backoff. Before retry ``n`` (starting at 0) we sleep a random time between 0 and
+                ``backoff_factor * 2 ** n`` seconds.
+            max_backoff (float):
+                The longest time (in seconds) to sleep before a retry.
+            pool_size (int):
+                The maximum number of connections kept open to a host.
+        """
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._max_backoff = max_backoff
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+    def get(self, url, params=None, rate_limiter=None):
+        """Send a GET request, retrying it if it fails.
+
+        Args:
+            url (str):
+                The URL to request.
+            params (dict):
+                The query string parameters.
+            rate_limiter (AbstractRateLimiter):
+                If given, every retry waits for a slot from it and it is told whether the server throttled us.
+                The caller is responsible for pacing the first attempt.
+
+        Returns:
+            Response:
+                The ``requests.Response`` of the first attempt that didn't fail.
+
+        Raises:
+            requests.RequestException:
+                If the last attempt failed with a connection error, a timeout, a ``429`` or a ``5xx`` response.
+        """
+        attempt = 0
+        while True:
+            throttled = False
+            retry_after = None
+            try:
+                with metrics.timer('ecal_http_request_seconds'):
+                    r = self._session.get(url, params=params, timeout=(self._connect_timeout, self._read_timeout))
+                if metrics.enabled:
+                    metrics.increment('ecal_http_bytes_received_total', len(r.content))
+                if r.status_code == self.THROTTLED_STATUS_CODE:
+                    throttled = True
+                    metrics.increment('ecal_http_throttled_total')
+                    retry_after = _parse_retry_after(r.headers.get('Retry-After'))
+                    if rate_limiter is not None:
+                        rate_limiter.throttled(retry_after)
+                elif r.status_code not in self.RETRY_STATUS_CODES:
+                    if rate_limiter is not None:
+                        rate_limiter.succeeded()
+                    return r
+                if attempt >= self._max_retries:
+                    r.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self._max_retries:
+                    raise
+
+            # When we were throttled the rate limiter has already pushed its next slot back far enough
+            if not throttled or rate_limiter is None:
+                delay = self._backoff(attempt) if retry_after is None else retry_after
+                metrics.observe('ecal_http_retry_sleep_seconds', delay)
+                time.sleep(delay)
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            metrics.increment('ecal_http_retries_total')
+            attempt += 1
+
+    def close(self):
+        """Close all the pooled connections."""
+        self._session.close()
+
+    def _backoff(self, attempt):
+        """Return the time (in seconds) to sleep before retry number ``attempt``, with full jitter."""
+        return random.uniform(0, min(self._max_backoff, self._backoff_factor * 2 ** attempt))
+
+
+def _parse_retry_after(value):
+    """Convert a ``Retry-After`` header, either a number of seconds or an HTTP date, to seconds from now.
+
+    Returns:
+        float:
+            The time (in seconds) to wait, or ``None`` if the header is missing or can't be parsed.
+    """
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_time = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_time is None:
+        return None
+    if retry_time.tzinfo is None:
+        retry_time = retry_time.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_time - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
@@ -0,0 +1,267 @@
+import bisect
+import threading
+import time
+
+__all__ = [
+    'Metrics',
+    'metrics'
+]
+
+
+class Metrics(object):
+    """Metrics collects counters and timing histograms from ``ecal.get``, the fetchers and the caches.
+
+    It is disabled by default, in which case recording a metric is a single attribute check. Once enabled, the
+    metrics can be read with ``snapshot()``, dumped in the Prometheus text format with ``to_prometheus()`` or pushed
+    somewhere else as they are recorded with a callback:
+
+    .. code-block:: python
+
+        import ecal
+
+        ecal.metrics.enable()
+        ecal.metrics.add_callback(lambda name, labels, value: print(name, labels, value))
+
+        cal_df = ecal.get('2018-01-01', '2018-01-31')
+        print(ecal.metrics.to_prometheus())
+
+    The metrics that ecal records are:
+
+        * ``ecal_get_seconds``: the time each call to ``ecal.get`` took.
+        * ``ecal_cache_hits_total`` and ``ecal_cache_misses_total``: the dates that were and weren't cached.
+        * ``ecal_cache_read_seconds`` and ``ecal_cache_write_seconds``: the time spent reading from and adding to
+          the cache, labelled by ``cache`` and ``operation``.
+        * ``ecal_cache_evicted_dates_total`` and ``ecal_cache_evicted_rows_total``: the dates and announcements
+          evicted by ``BoundedRuntimeCache``, labelled by ``cache``.
+        * ``ecal_fetch_seconds``: the time each call to a fetcher took, labelled by ``fetcher``.
+        * ``ecal_concat_seconds``: the time spent joining fetched announcements together.
+        * ``ecal_rate_limit_sleep_seconds``: the time spent waiting for the rate limiter.
+        * ``ecal_http_request_seconds``: the time each HTTP request to the API took.
+        * ``ecal_http_bytes_received_total``: the size of the response bodies.
+        * ``ecal_http_retries_total`` and ``ecal_http_throttled_total``: retried and throttled requests.
+        * ``ecal_http_retry_sleep_seconds``: the time spent backing off before retries.
+        * ``ecal_json_parse_seconds``: the time spent parsing responses.
+
+        Attributes:
+            enabled (bool):
+                Whether metrics are being recorded.
+    """
+
+    DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            enabled (bool):
+                Whether to start recording straight away.
+            buckets (tuple):
+                The upper bounds (in seconds) of the histogram buckets, in increasing order.
+        """
+        self.enabled = enabled
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._callbacks = []
+
+    def enable(self):
+        """Start recording metrics."""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording metrics. The metrics recorded so far are kept."""
+        self.enabled = False
+
+    def reset(self):
+        """Forget all the metrics recorded so far."""
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def add_callback(self, callback):
+        """Call a function every time a metric is recorded.
+
+        Args:
+            callback (callable):
+                Called with the metric name, a dict of its labels and the value (the amount added to a counter
+                or the time observed by a histogram). It is called on the thread that recorded the metric, so it
+                should be quick.
+        """
+        with self._lock:
+            self._callbacks = self._callbacks + [callback]
+
+    def remove_callback(self, callback):
+        """Stop calling a function added with ``add_callback``."""
+        with self._lock:
+            self._callbacks = [c for c in self._callbacks if c is not callback]
+
+    def increment(self, name, value=1, **labels):
+        """Add to a counter.
+
+        Args:
+            name (str):
+                The name of the counter.
+            value (float):
+                The amount to add.
+            labels:
+                Labels that tell apart counters with the same name, for example ``cache='SqliteCache'``.
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            callbacks = self._callbacks
+        for callback in callbacks:
+            callback(name, labels, value)
+
+    def observe(self, name, seconds, **labels):
+        """Record a time in a histogram.
+
+        Args:
+            name (str):
+                The name of the histogram.
+            seconds (float):
+                The time to record.
+            labels:
+                Labels that tell apart histograms with the same name.
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self._buckets)
+            histogram.observe(seconds)
+            callbacks = self._callbacks
+        for callback in callbacks:
+            callback(name, labels, seconds)
+
+    def timer(self, name, **labels):
+        """Return a context manager that records the time spent inside it in a histogram.
+
+        .. code-block:: python
+
+            with metrics.timer('ecal_cache_write_seconds', cache='RuntimeCache'):
+                cache.add(dates, announcements_df)
+
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def snapshot(self):
+        """Return a copy of the metrics recorded so far.
+
+        Returns:
+            dict:
+                ``counters`` maps ``(name, labels)`` to the count and ``histograms`` maps ``(name, labels)`` to a
+                dict with the ``count``, ``sum`` and cumulative ``buckets`` of the histogram. ``labels`` is a
+                sorted tuple of ``(label, value)`` pairs.
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'histograms': {key: histogram.to_dict() for key, histogram in self._histograms.items()}
+            }
+
+    def to_prometheus(self):
+        """Return the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str:
+                The metrics, ready to be served from a ``/metrics`` endpoint.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        last_name = None
+        for (name, labels), value in sorted(snapshot['counters'].items()):
+            if name != last_name:
+                lines.append('# TYPE {} counter'.format(name))
+                last_name = name
+            lines.append('{}{} {}'.format(name, _format_labels(labels), _format_value(value)))
+
+        last_name = None
+        for (name, labels), histogram in sorted(snapshot['histograms'].items()):
+            if name != last_name:
+                lines.append('# TYPE {} histogram'.format(name))
+                last_name = name
+            for upper_bound, count in histogram['buckets']:
+                le = '+Inf' if upper_bound == float('inf') else _format_value(upper_bound)
+                lines.append('{}_bucket{} {}'.format(name, _format_labels(labels + (('le', le),)), count))
+            lines.append('{}_sum{} {}'.format(name, _format_labels(labels), _format_value(histogram['sum'])))
+            lines.append('{}_count{} {}'.format(name, _format_labels(labels), histogram['count']))
+
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+class _Histogram(object):
+    """The bucket counts, count and sum of the times recorded for one histogram."""
+
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self._bucket_counts[bisect.bisect_left(self._buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def to_dict(self):
+        cumulative_counts = []
+        total = 0
+        for upper_bound, count in zip(self._buckets + (float('inf'),), self._bucket_counts):
+            total += count
+            cumulative_counts.append((upper_bound, total))
+        return {'count': self.count, 'sum': self.sum, 'buckets': cumulative_counts}
+
+
+class _Timer(object):
+    """Records the time spent inside a ``with`` block."""
+
+    def __init__(self, metrics, name, labels):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+        self._start_time = None
+
+    def __enter__(self):
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._metrics.observe(self._name, time.perf_counter() - self._start_time, **self._labels)
+
+
+class _NullTimer(object):
+    """Stands in for a ``_Timer`` when metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(label, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                          for label, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+"""
+The metrics that ecal records to. Call ``ecal.metrics.enable()`` to start recording.
+"""
+metrics = Metrics()
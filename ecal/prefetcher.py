@@ -0,0 +1,120 @@
+import datetime
+import threading
+
+__all__ = [
+    'Prefetcher'
+]
+
+
+class Prefetcher(object):
+    """Prefetcher keeps a sliding window of dates around today filled in a cache from a background thread.
+
+    Once started, the window from ``today - days_back`` to ``today + days_ahead`` is warmed straight away and
+    then again every ``interval`` seconds, so foreground calls to ``ecal.get`` for recent and upcoming dates are
+    served from the cache instead of waiting on the fetcher.
+
+    .. code-block:: python
+
+        import ecal
+
+        prefetcher = ecal.Prefetcher(days_back=5, days_ahead=21)
+        prefetcher.start()
+        ...
+        prefetcher.stop()
+
+        Attributes:
+            last_error (Exception):
+                The error raised by the most recent pass that failed, or None.
+    """
+
+    def __init__(self, fetcher=None, cache=None, days_back=7, days_ahead=30, interval=3600.0):
+        """
+        Args:
+            fetcher (AbstractFetcher):
+                The fetcher to use for downloading data. If no fetcher is provided, it will use
+                ``ecal.default_fetcher``.
+            cache (AbstractCache):
+                The cache to keep warm. If no cache is provided, it will use ``ecal.default_cache``.
+            days_back (int):
+                The number of days before today to keep in the cache.
+            days_ahead (int):
+                The number of days after today to keep in the cache.
+            interval (float):
+                The time (in seconds) between passes over the window.
+        """
+        self._fetcher = fetcher
+        self._cache = cache
+        self._days_back = days_back
+        self._days_ahead = days_ahead
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    def window(self, today=None):
+        """Return the first and last date of the window to keep warm.
+
+        Args:
+            today (date):
+                The date to center the window on. If left out, today's date is used.
+
+        Returns:
+            tuple:
+                The start and end dates of the window in the format ``YYYY-MM-DD``.
+        """
+        if today is None:
+            today = datetime.date.today()
+        start_date = today - datetime.timedelta(days=self._days_back)
+        end_date = today + datetime.timedelta(days=self._days_ahead)
+        return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+
+    def warm(self):
+        """Make one pass over the window, fetching and caching any dates that are missing."""
+        # Imported here because the package imports this module while it is being initialized
+        from . import get
+
+        start_date_str, end_date_str = self.window()
+        get(start_date_str, end_date_str, fetcher=self._fetcher, cache=self._cache)
+
+    def start(self):
+        """Start warming the cache on a daemon thread. Does nothing if it's already running."""
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ecal-prefetcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the background thread, waiting for a pass that is in progress to finish.
+
+        Args:
+            timeout (float):
+                The longest time (in seconds) to wait for the thread to finish.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        """Return True if the background thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self):
+        """Warm the cache every interval until stopped."""
+        while not self._stop_event.is_set():
+            try:
+                self.warm()
+                self.last_error = None
+            except Exception as e:
+                # Keep going. The next pass will retry whatever is still missing.
+                print(e)
+                self.last_error = e
+            self._stop_event.wait(self._interval)
@@ -0,0 +1,279 @@
+import contextlib
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+from .instrumentation import metrics
+
+__all__ = [
+    'AbstractRateLimiter',
+    'RateLimiter',
+    'FileRateLimiter'
+]
+
+
+class AbstractRateLimiter(object):
+    """AbstractRateLimiter is the base class for all rate limiters.
+
+    A rate limiter hands out call slots that are ``interval`` seconds apart. Callers reserve a slot and then wait
+    until it starts, so every caller sharing a limiter runs at exactly the allowed rate without sleeping any longer
+    than needed.
+
+    The interval adapts to the server. Each time a call is throttled the interval is multiplied by ``backoff``
+    (up to ``max_interval``) and after ``recovery_calls`` successful calls in a row it is multiplied by ``recovery``
+    until it is back at ``min_interval``.
+
+        Derived classes must implement:
+            * reserve
+
+        Derived classes that adapt to the server should also implement:
+            * throttled
+            * succeeded
+
+    """
+
+    def __init__(self, interval=1.0, max_interval=60.0, backoff=2.0, recovery=0.8, recovery_calls=10):
+        """
+        Args:
+            interval (float):
+                The time (in seconds) between the start of two calls when the server isn't throttling us.
+            max_interval (float):
+                The longest interval to back off to.
+            backoff (float):
+                The factor the interval is multiplied by each time a call is throttled.
+            recovery (float):
+                The factor the interval is multiplied by after a run of successful calls.
+            recovery_calls (int):
+                The number of successful calls in a row before the interval is decreased.
+        """
+        self.min_interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.recovery = recovery
+        self.recovery_calls = recovery_calls
+
+    def reserve(self):
+        """Reserve the next call slot.
+
+        Returns:
+            float:
+                The time (in seconds) to wait before the reserved call may start.
+        """
+        raise NotImplementedError('AbstractRateLimiter is an abstract base class')
+
+    def throttled(self, retry_after=None):
+        """Tell the rate limiter that the server throttled a call (for example with a ``429`` response).
+
+        Args:
+            retry_after (float):
+                The time (in seconds) the server asked us to wait before calling again, if it said.
+        """
+        pass
+
+    def succeeded(self):
+        """Tell the rate limiter that a call went through without being throttled."""
+        pass
+
+    def acquire(self):
+        """Reserve the next call slot and sleep until it starts.
+
+        Returns:
+            float:
+                The time (in seconds) that was spent sleeping.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        metrics.observe('ecal_rate_limit_sleep_seconds', delay)
+        return delay
+
+    def _slower(self, interval):
+        """Return the interval to use after a throttled call."""
+        return min(self.max_interval, interval * self.backoff)
+
+    def _faster(self, interval, successes):
+        """Return the interval and success count to use after a successful call."""
+        successes += 1
+        if interval > self.min_interval and successes >= self.recovery_calls:
+            return max(self.min_interval, interval * self.recovery), 0
+        return interval, successes
+
+
+class RateLimiter(AbstractRateLimiter):
+    """RateLimiter spaces calls ``interval`` seconds apart for every thread in a process that shares it.
+
+        Attributes:
+            interval (float):
+                The current time (in seconds) between the start of two calls.
+            _next_call_time (float):
+                The ``time.monotonic()`` time at which the next call is allowed to start.
+    """
+
+    def __init__(self, interval=1.0, **kwargs):
+        """
+        Args:
+            interval (float):
+                The time (in seconds) between the start of two calls when the server isn't throttling us.
+            kwargs:
+                The adaptive pacing options described in ``AbstractRateLimiter``.
+        """
+        super().__init__(interval, **kwargs)
+        self.interval = interval
+        self._successes = 0
+        self._next_call_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserve the next call slot.
+
+        Returns:
+            float:
+                The time (in seconds) to wait before the reserved call may start.
+        """
+        with self._lock:
+            now = time.monotonic()
+            call_time = max(now, self._next_call_time)
+            self._next_call_time = call_time + self.interval
+        return call_time - now
+
+    def throttled(self, retry_after=None):
+        """Tell the rate limiter that the server throttled a call (for example with a ``429`` response).
+
+        Args:
+            retry_after (float):
+                The time (in seconds) the server asked us to wait before calling again, if it said.
+        """
+        with self._lock:
+            self.interval = self._slower(self.interval)
+            self._successes = 0
+            pause = self.interval if retry_after is None else retry_after
+            self._next_call_time = max(self._next_call_time, time.monotonic() + pause)
+
+    def succeeded(self):
+        """Tell the rate limiter that a call went through without being throttled."""
+        with self._lock:
+            self.interval, self._successes = self._faster(self.interval, self._successes)
+
+
+class FileRateLimiter(AbstractRateLimiter):
+    """FileRateLimiter spaces calls ``interval`` seconds apart for every process on a host that uses the same file.
+
+    The time of the next free slot, the current interval and the run of successful calls are stored in the file
+    and updated under an exclusive lock on it, so it works like a token bucket that holds a single token and is
+    shared by the whole fleet. Threads in one process can share an instance too.
+
+        Attributes:
+            path (str):
+                The path to the lock file holding the shared state.
+    """
+
+    def __init__(self, path=None, interval=1.0, **kwargs):
+        """
+        Args:
+            path (str):
+                The path to the lock file. Every process that should share the rate limit has to use the same
+                path. If left out, a file named ``ecal-rate-limit.lock`` in the temp directory is used.
+            interval (float):
+                The time (in seconds) between the start of two calls when the server isn't throttling us.
+            kwargs:
+                The adaptive pacing options described in ``AbstractRateLimiter``.
+        """
+        super().__init__(interval, **kwargs)
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(), 'ecal-rate-limit.lock')
+        self.path = path
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        """float: The current time (in seconds) between the start of two calls, as shared through the file."""
+        with self._lock, open(self.path, 'a+') as f:
+            _lock_file(f)
+            try:
+                return self._read_state(f)[1]
+            finally:
+                _unlock_file(f)
+
+    def reserve(self):
+        """Reserve the next call slot.
+
+        Returns:
+            float:
+                The time (in seconds) to wait before the reserved call may start.
+        """
+        now = time.time()
+        with self._shared_state() as state:
+            call_time = max(now, state[0])
+            state[0] = call_time + state[1]
+        return call_time - now
+
+    def throttled(self, retry_after=None):
+        """Tell the rate limiter that the server throttled a call (for example with a ``429`` response).
+
+        Args:
+            retry_after (float):
+                The time (in seconds) the server asked us to wait before calling again, if it said.
+        """
+        with self._shared_state() as state:
+            state[1] = self._slower(state[1])
+            state[2] = 0
+            pause = state[1] if retry_after is None else retry_after
+            state[0] = max(state[0], time.time() + pause)
+
+    def succeeded(self):
+        """Tell the rate limiter that a call went through without being throttled."""
+        with self._shared_state() as state:
+            state[1], state[2] = self._faster(state[1], state[2])
+
+    @contextlib.contextmanager
+    def _shared_state(self):
+        """Lock the file and yield its state as a mutable ``[next_call_time, interval, successes]`` list.
+
+        The state is written back to the file when the block exits. Slots are compared across processes so they
+        use the wall clock rather than ``time.monotonic()``.
+        """
+        with self._lock, open(self.path, 'a+') as f:
+            _lock_file(f)
+            try:
+                state = self._read_state(f)
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write('{!r} {!r} {:d}'.format(*state))
+                f.flush()
+            finally:
+                _unlock_file(f)
+
+    def _read_state(self, f):
+        """Parse the state stored in the lock file, falling back to the defaults if it's empty or corrupt."""
+        f.seek(0)
+        try:
+            next_call_time, interval, successes = f.read().split()
+            return [float(next_call_time), float(interval), int(successes)]
+        except ValueError:
+            return [0.0, self.min_interval, 0]
+
+
+def _lock_file(f):
+    """Block until this process holds an exclusive lock on an open file."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:  # pragma: no cover - Windows
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f):
+    """Release a lock taken with ``_lock_file``."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -1,5 +1,9 @@
+import threading
+import time
+import numpy as np
 import pandas as pd
 from .abstract_cache import AbstractCache
+from .dtypes import concat_compact, to_compact
 
 __all__ = [
     'RuntimeCache'
@@ -9,24 +13,71 @@ __all__ = [
 class RuntimeCache(AbstractCache):
     """RuntimeCache keeps a DataFrame of earnings announcements in memory so that repeated calls to ecal.get are fast.
 
+    New announcements are appended as separate chunks and only merged into the main DataFrame every
+    ``MAX_PENDING_CHUNKS`` adds, or once the chunks hold as many rows as the DataFrame, so adding to a big cache
+    doesn't copy the whole cache every time. Everything is kept sorted by date, so reading a date range is a binary
+    search of the DataFrame and of each chunk.
+
+    With ``compact=True`` the announcements are stored in the compact format of ``ecal.dtypes.to_compact``, which
+    takes about a tenth of the memory, and ``fetch_calendar`` returns compact frames.
+
         Attributes:
             _cache_df (DataFrame):
-                DataFrame storing all the earnings announcements that have been fetched.
+                DataFrame storing all the earnings announcements that have been fetched, sorted by date. Reading
+                it merges in the pending chunks first.
+            _chunks (list):
+                The DataFrames added since the pending chunks were last merged into ``_cache_df``, each sorted by
+                date. None of their dates are in ``_cache_df`` or in another chunk.
             _index_set (set):
                 Set containing all the dates that earnings announcements have been fetched for.
                 This set is needed because some days don't have earnings announcements
                 (so they won't appear in the cache.
+            _fetched_at (dict):
+                The time (as returned by ``time.time()``) each date was added to the cache.
+            _ticker_index (dict):
+                For each ticker, a sorted array of its announcement dates and an array of the matching ``when``
+                values. It's built the first time it's needed after the cache changes.
+            _lock (RLock):
+                Lock that makes the cache safe to share between threads.
     """
 
-    def __init__(self):
+    MAX_PENDING_CHUNKS = 16
+
+    def __init__(self, compact=False):
+        """
+        Args:
+            compact (bool):
+                If True, store the announcements with a ``DatetimeIndex`` and categorical ``ticker`` and ``when``
+                columns.
+        """
+        self._lock = threading.RLock()
+        self._compact = compact
 
         # Create the cache
         col_names = ['date', 'ticker', 'when']
-        self._cache_df = pd.DataFrame(columns=col_names)
-        self._cache_df = self._cache_df.set_index('date')
+        cache_df = pd.DataFrame(columns=col_names)
+        cache_df = cache_df.set_index('date')
+        if compact:
+            cache_df = to_compact(cache_df)
+        self._cache_df = cache_df
 
         # And the cache index
         self._index_set = set()
+        self._fetched_at = {}
+
+    @property
+    def _cache_df(self):
+        with self._lock:
+            self._merge_chunks()
+            return self._base_df
+
+    @_cache_df.setter
+    def _cache_df(self, cache_df):
+        with self._lock:
+            self._base_df = cache_df
+            self._chunks = []
+            self._chunk_rows = 0
+            self._ticker_index = None
 
     def check_for_missing_dates(self, date_list):
         """Look in the cache for dates and return the dates that aren't in the cache.
@@ -41,15 +92,18 @@ class RuntimeCache(AbstractCache):
 
         """
         missing_dates_list = []
-        for date in date_list:
-            if date not in self._index_set:
-                missing_dates_list.append(date)
+        with self._lock:
+            for date in date_list:
+                if date not in self._index_set:
+                    missing_dates_list.append(date)
 
         return missing_dates_list
 
     def add(self, missing_dates, uncached_announcements):
         """Add the uncached announcements to the cache.
 
+        If some of the dates are already in the cache, their old announcements are replaced.
+
         Args:
             missing_dates (list):
                 The dates that were fetched and should be added to the cache index. Even dates that have no data
@@ -58,11 +112,37 @@ class RuntimeCache(AbstractCache):
             uncached_announcements (DataFrame):
                 A Dataframe containing uncached announcements that should be added to the cache.
         """
-        # add all the dates to the index set
-        self._index_set |= set(missing_dates)
+        fetched_time = time.time()
+        missing_dates_set = set(missing_dates)
+
+        # Threads can add dates out of order, so each chunk is sorted by date on its own before it's stored
+        chunk_df = uncached_announcements
+        if chunk_df is None:
+            chunk_df = self._base_df.iloc[:0]
+        elif self._compact:
+            chunk_df = to_compact(chunk_df)
+        chunk_df = chunk_df.sort_index(kind='mergesort')
+
+        with self._lock:
+            if missing_dates_set.isdisjoint(self._index_set):
+                if len(chunk_df):
+                    self._chunks.append(chunk_df)
+                    self._chunk_rows += len(chunk_df)
+                    if len(self._chunks) > self.MAX_PENDING_CHUNKS or self._chunk_rows >= len(self._base_df):
+                        self._merge_chunks()
+            else:
+                # Dates are only refreshed now and then, so drop their old announcements and merge straight away
+                self._drop_rows(missing_dates_set)
+                self._chunks = [chunk_df]
+                self._merge_chunks()
 
-        # add the uncached announcements to the cache
-        self._cache_df = pd.concat([self._cache_df, uncached_announcements])
+            # add all the dates to the index set once their announcements are in the cache
+            self._index_set |= missing_dates_set
+            self._ticker_index = None
+            for date in missing_dates:
+                self._fetched_at[date] = fetched_time
+
+            self._added(missing_dates, chunk_df)
 
     def fetch_calendar(self, start_date_str, end_date_str=None):
         """Returns the earnings calendar from the cache as a pandas DataFrame.
@@ -82,4 +162,162 @@ class RuntimeCache(AbstractCache):
         if end_date_str is None:
             end_date_str = start_date_str
 
-        return self._cache_df[start_date_str:end_date_str]
+        start_key, end_key = start_date_str, end_date_str
+        if self._compact:
+            # Searching a DatetimeIndex with strings parses them each time, so look the dates up as timestamps
+            start_key, end_key = pd.Timestamp(start_date_str), pd.Timestamp(end_date_str)
+
+        with self._lock:
+            slices = [_slice_by_date(cal_df, start_key, end_key) for cal_df in [self._base_df] + self._chunks]
+
+        found = [cal_df for cal_df in slices if len(cal_df)]
+        if len(found) <= 1:
+            return found[0] if found else slices[0]
+
+        # The chunks never share a date, so unless their date ranges interleave, putting them in order of their
+        # first date is enough to sort the rows
+        found.sort(key=lambda cal_df: cal_df.index[0])
+        in_order = all(previous.index[-1] < cal_df.index[0] for previous, cal_df in zip(found, found[1:]))
+        joined_df = concat_compact(found) if self._compact else pd.concat(found)
+        return joined_df if in_order else joined_df.sort_index(kind='mergesort')
+
+    def fetched_at(self, date_list):
+        """Look in the cache for when dates were fetched.
+
+        Args:
+            date_list (list):
+                The list of dates to look for.
+
+        Returns:
+            dict:
+                The time (as returned by ``time.time()``) each date in the cache was last added, keyed by date.
+                Dates that aren't in the cache are left out.
+        """
+        with self._lock:
+            return {date: self._fetched_at.get(date) for date in date_list if date in self._index_set}
+
+    def next_announcements(self, tickers, start_date_str, end_date_str=None):
+        """Look in the cache for the first announcement of each ticker on or after a date.
+
+        Each ticker is looked up with a binary search of its sorted dates.
+
+        Args:
+            tickers (list):
+                The ticker symbols to look for.
+            start_date_str (str):
+                The first date to look at in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The last date to look at in the format ``YYYY-MM-DD``. If left out, all the later cached dates are
+                looked at.
+
+        Returns:
+            DataFrame:
+                A pandas DataFrame indexed by ``ticker``, that has columns: ``date`` and ``when``, with a row for
+                each ticker that has an announcement in the range.
+        """
+        rows = []
+        ticker_index = self._get_ticker_index()
+        for ticker in dict.fromkeys(tickers):
+            if ticker not in ticker_index:
+                continue
+            dates, whens = ticker_index[ticker]
+            i = np.searchsorted(dates, start_date_str, side='left')
+            if i < len(dates) and (end_date_str is None or dates[i] <= end_date_str):
+                rows.append((ticker, dates[i], whens[i]))
+
+        return pd.DataFrame(rows, columns=['ticker', 'date', 'when']).set_index('ticker')
+
+    def previous_announcements(self, tickers, end_date_str, start_date_str=None):
+        """Look in the cache for the last announcement of each ticker on or before a date.
+
+        Each ticker is looked up with a binary search of its sorted dates.
+
+        Args:
+            tickers (list):
+                The ticker symbols to look for.
+            end_date_str (str):
+                The last date to look at in the format ``YYYY-MM-DD``.
+            start_date_str (str):
+                The first date to look at in the format ``YYYY-MM-DD``. If left out, all the earlier cached dates
+                are looked at.
+
+        Returns:
+            DataFrame:
+                A pandas DataFrame indexed by ``ticker``, that has columns: ``date`` and ``when``, with a row for
+                each ticker that has an announcement in the range.
+        """
+        rows = []
+        ticker_index = self._get_ticker_index()
+        for ticker in dict.fromkeys(tickers):
+            if ticker not in ticker_index:
+                continue
+            dates, whens = ticker_index[ticker]
+            i = np.searchsorted(dates, end_date_str, side='right') - 1
+            if i >= 0 and (start_date_str is None or dates[i] >= start_date_str):
+                rows.append((ticker, dates[i], whens[i]))
+
+        return pd.DataFrame(rows, columns=['ticker', 'date', 'when']).set_index('ticker')
+
+    def _added(self, dates, chunk_df):
+        """Called with the lock held after dates have been added. Derived classes can override it to track them.
+
+        Args:
+            dates (list):
+                The dates that were added in the format ``YYYY-MM-DD``.
+            chunk_df (DataFrame):
+                Their announcements, as they are stored.
+        """
+        pass
+
+    def _drop_rows(self, dates):
+        """Drop the announcements for some dates from the cache. The caller must hold the lock.
+
+        The dates stay in the cache index, so the caller must also remove them from it unless they're about to be
+        added again.
+        """
+        self._merge_chunks()
+        dates = pd.to_datetime(list(dates), format='%Y-%m-%d') if self._compact else list(dates)
+        self._base_df = self._base_df[~self._base_df.index.isin(dates)]
+        self._ticker_index = None
+
+    def _merge_chunks(self):
+        """Merge the pending chunks into the main DataFrame. The caller must hold the lock."""
+        if not self._chunks:
+            return
+        frames = [self._base_df] + self._chunks
+        cache_df = concat_compact(frames) if self._compact else pd.concat(frames)
+        # sort_index returns straight away when the chunks came after everything else, which is the usual case
+        self._base_df = cache_df.sort_index(kind='mergesort')
+        self._chunks = []
+        self._chunk_rows = 0
+
+    def _get_ticker_index(self):
+        """Return the per-ticker index, building it if the cache has changed since it was last built."""
+        with self._lock:
+            if self._ticker_index is None:
+                tickers = np.asarray(self._cache_df['ticker'], dtype=object)
+                dates = self._cache_df.index
+                if isinstance(dates, pd.DatetimeIndex):
+                    dates = dates.strftime('%Y-%m-%d')
+                dates = np.asarray(dates, dtype=object)
+                whens = np.asarray(self._cache_df['when'], dtype=object)
+
+                # Group the rows by ticker. The sort is stable and the cache is sorted by date, so each ticker's
+                # dates stay sorted.
+                order = np.argsort(tickers, kind='mergesort')
+                sorted_tickers = tickers[order]
+                starts = np.flatnonzero(np.r_[True, sorted_tickers[1:] != sorted_tickers[:-1]])
+                ends = np.r_[starts[1:], len(order)]
+                self._ticker_index = {
+                    sorted_tickers[start]: (dates[order[start:end]], whens[order[start:end]])
+                    for start, end in zip(starts, ends)
+                }
+            return self._ticker_index
+
+
+def _slice_by_date(cal_df, start_key, end_key):
+    """Return the rows of a calendar sorted by date from start_key to end_key, with a binary search."""
+    index = cal_df.index
+    start = index.searchsorted(start_key, side='left')
+    end = index.searchsorted(end_key, side='right')
+    return cal_df.iloc[start:end]
@@ -0,0 +1,249 @@
+import contextlib
+import os
+import shutil
+import threading
+import numpy as np
+from .columnar_cache import ColumnarCache, _to_date_strs, _to_day, _to_days
+from .rate_limiter import _lock_file, _unlock_file
+
+__all__ = [
+    'SharedColumnarCache'
+]
+
+# The arrays saved in each generation of the cache
+_ARRAY_NAMES = ('days', 'ticker_ids', 'whens', 'symbols', 'covered_days', 'fetched_at')
+
+# How many times to look for the current generation again if a writer replaces it while it's being opened
+_LOAD_ATTEMPTS = 5
+
+
+class SharedColumnarCache(ColumnarCache):
+    """SharedColumnarCache is a ColumnarCache stored in memory-mapped files that many processes can share.
+
+    Every process that opens the same directory maps the same files, so a pool of workers holds one copy of the
+    calendar between them and reads it without copying it. Put the directory on a RAM-backed file system like
+    ``/dev/shm`` to keep it out of the disk altogether.
+
+    The cache is saved as a series of generations. Writers take an exclusive lock on a file in the directory, write
+    a new generation next to the current one and then switch a ``CURRENT`` file to point to it, so readers never
+    see a half-written generation and never have to lock anything. Each read checks whether ``CURRENT`` has
+    changed and maps the new generation if it has.
+
+    ``populate`` fetches a range while holding the writer lock, so when all the workers of a pool ask for the same
+    range, the first one to get the lock fetches it and the others find it cached:
+
+    .. code-block:: python
+
+        import multiprocessing
+        import ecal
+
+        cache = ecal.SharedColumnarCache('/dev/shm/ecal')
+
+        def work(ticker):
+            cache.populate('2010-01-01', '2017-12-31')
+            return ecal.query('2010-01-01', '2017-12-31', cache=cache).tickers(ticker).to_frame()
+
+        with multiprocessing.Pool(32) as pool:
+            frames = pool.map(work, tickers)
+
+        Attributes:
+            directory (str):
+                The directory holding the cache files.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str):
+                The directory to keep the cache files in. Every process that should share the cache has to use
+                the same directory. It's created if it doesn't exist.
+        """
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._current_path = os.path.join(directory, 'CURRENT')
+        self._lock_path = os.path.join(directory, 'writer.lock')
+        self._generation = 0
+        self._current_stat = None
+
+        # The writer lock is held for the whole of populate, so it's kept apart from the lock that readers take
+        self._writer_lock = threading.RLock()
+        self._writer_file = None
+        self._writer_depth = 0
+
+        self._refresh()
+
+    def __getstate__(self):
+        # Locks and memory maps can't be pickled, so a pickled cache just opens the same directory again
+        return {'directory': self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state['directory'])
+
+    def check_for_missing_dates(self, date_list):
+        self._refresh()
+        return super().check_for_missing_dates(date_list)
+
+    def query(self, start_date_str, end_date_str=None, tickers=None, when=None):
+        self._refresh()
+        return super().query(start_date_str, end_date_str, tickers, when)
+
+    def fetched_at(self, date_list):
+        self._refresh()
+        return super().fetched_at(date_list)
+
+    def next_announcements(self, tickers, start_date_str, end_date_str=None):
+        self._refresh()
+        return super().next_announcements(tickers, start_date_str, end_date_str)
+
+    def previous_announcements(self, tickers, end_date_str, start_date_str=None):
+        self._refresh()
+        return super().previous_announcements(tickers, end_date_str, start_date_str)
+
+    def add(self, missing_dates, uncached_announcements):
+        """Add the uncached announcements to the cache and save them as a new generation.
+
+        Args:
+            missing_dates (list):
+                The dates that were fetched and should be added to the cache index.
+            uncached_announcements (DataFrame):
+                A Dataframe containing uncached announcements that should be added to the cache.
+        """
+        with self._writing(), self._lock:
+            # Another process may have added dates since we last looked, so start from the newest generation
+            self._refresh()
+            super().add(missing_dates, uncached_announcements)
+            self._save()
+
+    def populate(self, start_date_str, end_date_str=None, fetcher=None, calendar=None):
+        """Fetch the dates in a range that aren't cached yet, while holding the writer lock.
+
+        Processes that call this for the same range at the same time wait for each other, so each date is only
+        fetched once.
+
+        Args:
+            start_date_str (str):
+                The start date in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date in the format ``YYYY-MM-DD``. If left out, only the start date is fetched.
+            fetcher (AbstractFetcher):
+                The fetcher to use for downloading data. If no fetcher is provided, it will use
+                ``ecal.default_fetcher``.
+            calendar (AbstractTradingCalendar):
+                The trading calendar to use for skipping days. If no calendar is provided, it will use
+                ``ecal.default_calendar``.
+        """
+        from . import _ensure_cached
+
+        if end_date_str is None:
+            end_date_str = start_date_str
+
+        # Checking first means that once the range is cached, nobody waits for the lock
+        date_strs = _to_date_strs(np.arange(_to_day(start_date_str), _to_day(end_date_str) + 1)).tolist()
+        if not self.check_for_missing_dates(date_strs):
+            return
+
+        with self._writing():
+            _ensure_cached(start_date_str, end_date_str, fetcher, self, calendar)
+
+    @contextlib.contextmanager
+    def _writing(self):
+        """Hold the lock file that makes one process at a time write to the cache. It can be taken again."""
+        with self._writer_lock:
+            if self._writer_depth == 0:
+                self._writer_file = open(self._lock_path, 'a+')
+                _lock_file(self._writer_file)
+            self._writer_depth += 1
+            try:
+                yield
+            finally:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    _unlock_file(self._writer_file)
+                    self._writer_file.close()
+                    self._writer_file = None
+
+    def _refresh(self):
+        """Map the current generation of the cache if it has changed since it was last mapped."""
+        for _ in range(_LOAD_ATTEMPTS):
+            try:
+                stat = os.stat(self._current_path)
+            except FileNotFoundError:
+                return
+            current_stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if current_stat == self._current_stat:
+                return
+
+            with self._lock:
+                try:
+                    with open(self._current_path) as f:
+                        generation = int(f.read())
+                    self._load(generation)
+                except (FileNotFoundError, ValueError):
+                    # A writer replaced the generation while we were opening it, so look again
+                    continue
+                self._current_stat = current_stat
+                return
+
+    def _load(self, generation):
+        """Map the arrays of a generation and rebuild the symbol table and cache index from them."""
+        path = self._generation_path(generation)
+        arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r') for name in _ARRAY_NAMES}
+
+        symbols = arrays['symbols'].tolist()
+        date_strs = _to_date_strs(arrays['covered_days']).tolist()
+        self._days = arrays['days']
+        self._ticker_ids = arrays['ticker_ids']
+        self._whens = arrays['whens']
+        self._symbols = symbols
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+        self._symbol_array = np.asarray(symbols, dtype=object)
+        self._index_set = set(date_strs)
+        self._fetched_at = dict(zip(date_strs, arrays['fetched_at'].tolist()))
+        self._ticker_keys = None
+        self._generation = generation
+
+    def _save(self):
+        """Write the cache as a new generation, point ``CURRENT`` at it and map it. The writer lock must be held."""
+        generation = self._generation + 1
+        date_strs = sorted(self._index_set)
+        arrays = {
+            'days': self._days,
+            'ticker_ids': self._ticker_ids,
+            'whens': self._whens,
+            'symbols': np.array(self._symbols, dtype=str),
+            'covered_days': _to_days(date_strs),
+            'fetched_at': np.array([self._fetched_at.get(date_str, np.nan) for date_str in date_strs],
+                                   dtype=np.float64)
+        }
+
+        # A writer that died part way through can leave either of these behind
+        path = self._generation_path(generation)
+        temp_path = path + '.tmp'
+        for stale_path in (temp_path, path):
+            shutil.rmtree(stale_path, ignore_errors=True)
+
+        os.makedirs(temp_path)
+        for name, array in arrays.items():
+            np.save(os.path.join(temp_path, name + '.npy'), array)
+        os.replace(temp_path, path)
+
+        temp_current_path = self._current_path + '.tmp'
+        with open(temp_current_path, 'w') as f:
+            f.write(str(generation))
+        os.replace(temp_current_path, self._current_path)
+
+        stat = os.stat(self._current_path)
+        self._load(generation)
+        self._current_stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        # Keep the previous generation for readers that are opening it right now. Processes that still have older
+        # ones mapped keep their mappings after the files are removed.
+        for name in os.listdir(self.directory):
+            if name.startswith('generation-') and name not in (os.path.basename(path),
+                                                               os.path.basename(self._generation_path(
+                                                                   generation - 1))):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def _generation_path(self, generation):
+        return os.path.join(self.directory, 'generation-{:010d}'.format(generation))
@@ -0,0 +1,68 @@
+import threading
+
+__all__ = [
+    'SingleFlight'
+]
+
+
+class SingleFlight(object):
+    """SingleFlight makes sure only one thread at a time does the work for a key.
+
+    ``ecal.get`` uses it so that when several threads ask for overlapping dates at once, each date is fetched by
+    one of them while the others wait for that fetch instead of calling the fetcher again.
+
+    .. code-block:: python
+
+        claimed, in_flight = single_flight.claim(keys)
+        try:
+            ...  # do the work for the claimed keys
+        finally:
+            single_flight.release(claimed)
+        for event in in_flight:
+            event.wait()
+
+        Attributes:
+            _in_flight (dict):
+                A ``threading.Event`` for each key that a thread is working on. It's set when the work is done.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def claim(self, keys):
+        """Claim the keys that no other thread is working on.
+
+        Args:
+            keys (list):
+                The keys the caller wants to work on.
+
+        Returns:
+            tuple:
+                A list of the keys claimed by the caller, who must ``release`` them when done, and a list of
+                ``threading.Event`` for the keys other threads are working on, which are set when they are done.
+        """
+        claimed = []
+        in_flight = []
+        with self._lock:
+            for key in keys:
+                event = self._in_flight.get(key)
+                if event is None:
+                    self._in_flight[key] = threading.Event()
+                    claimed.append(key)
+                elif event not in in_flight:
+                    in_flight.append(event)
+        return claimed, in_flight
+
+    def release(self, keys):
+        """Release claimed keys and wake up the threads waiting for them. This must be called even if the work fails.
+
+        Args:
+            keys (list):
+                The keys returned by ``claim``.
+        """
+        with self._lock:
+            for key in keys:
+                event = self._in_flight.pop(key, None)
+                if event is not None:
+                    event.set()
@@ -1,5 +1,11 @@
+import contextlib
+import os
+import random
+import threading
+import time
 import pandas as pd
 from .abstract_cache import AbstractCache
+from .instrumentation import metrics
 import sqlite3
 
 __all__ = [
@@ -41,39 +47,182 @@ REPLACE INTO cached_dates (date) VALUES ('2018-01-01'),('2018-01-02'),('2018-01-
 class SqliteCache(AbstractCache):
     """SqliteCache provides persistent storage for earnings announcements so repeated calls to ``ecal.get()`` are fast.
 
+    Each thread gets its own connection to the database, so threads read at the same time instead of taking turns.
+    The database is put in WAL journal mode, where readers don't block the writer and the writer doesn't block
+    readers, so many threads and processes can share one file. Writes that find the database locked wait for up to
+    ``busy_timeout`` seconds and are then retried a few times after a jittered backoff. A process that was forked
+    from one using the cache opens new connections instead of using the ones it inherited.
+
         Attributes:
             _conn (Connection):
-                The sqlite3 database connection.
+                The sqlite3 database connection of the current thread. It's opened the first time the thread uses
+                it.
+            _lock (RLock):
+                Lock that protects the open connections. An in-memory database has only one connection,
+                which threads share under this lock.
 
     """
 
-    def __init__(self, db_file_path='ecal.db'):
+    # The most tickers to pass to sqlite as parameters. Older versions of sqlite allow at most 999 parameters.
+    MAX_SQL_TICKERS = 900
+
+    def __init__(self, db_file_path='ecal.db', journal_mode='WAL', synchronous='NORMAL', cache_size=-16000,
+                 mmap_size=256 * 1024 * 1024, busy_timeout=30.0, max_retries=5, retry_backoff=0.05):
         """"
 
             Args:
                 db_file_path (str):
                     A string containing the file path to the sqlite database file.
+                journal_mode (str):
+                    The sqlite journal mode. The default, ``WAL``, lets readers and a writer work at the same time.
+                    None leaves the database's journal mode alone.
+                synchronous (str):
+                    How often sqlite waits for data to reach the disk. ``NORMAL`` is safe in WAL mode: a power cut
+                    can lose the last transactions but never corrupts the database.
+                cache_size (int):
+                    The page cache of each connection, in pages or, if it's negative, in KiB.
+                mmap_size (int):
+                    The most bytes of the database file each connection reads through a memory map. 0 turns
+                    memory-mapped reads off.
+                busy_timeout (float):
+                    The time (in seconds) to wait for another connection to finish writing before giving up.
+                max_retries (int):
+                    The number of times to retry an operation that gave up because the database was locked.
+                retry_backoff (float):
+                    The base of the backoff. Before retry ``n`` (starting at 0) we sleep a random time between 0
+                    and ``retry_backoff * 2 ** n`` seconds.
 
         """
-
-        self._conn = self._create_connection(db_file_path)
-        if self._conn is not None:
+        self._db_file_path = db_file_path
+        self._pragmas = [('synchronous', synchronous), ('cache_size', cache_size), ('mmap_size', mmap_size)]
+        self._busy_timeout = busy_timeout
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._connections = {}
+        self._inherited_connections = []
+        self._shared_conn = None
+
+        conn = self._create_connection(db_file_path)
+        if conn is not None:
+            if db_file_path in (':memory:', '') or db_file_path.startswith('file::memory:'):
+                # Every connection to an in-memory database gets its own database, so they all have to share one
+                self._shared_conn = conn
+            else:
+                self._local.conn = conn
+                self._local.pid = self._pid
+
+            if journal_mode is not None:
+                self._set_journal_mode(journal_mode)
             self._create_cached_dates_table()
             self._create_announcements_table()
+            self._create_fetch_times_table()
+            self._create_ticker_index()
         else:
             print('Error! cannot create the database connection.')
 
+    @property
+    def _conn(self):
+        if self._shared_conn is not None:
+            return self._shared_conn
+
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            if self._pid != pid:
+                self._forked(pid)
+            self._local.conn = self._create_connection(self._db_file_path)
+            self._local.pid = pid
+        return self._local.conn
+
+    def close(self):
+        """Close every connection this process has opened to the database."""
+        with self._lock:
+            connections, self._connections = self._connections, {}
+            self._local = threading.local()
+        for conn in connections.values():
+            conn.close()
+
     def _create_connection(self, db_file):
         """ create a database connection to a SQLite database """
         conn = None
         try:
-            conn = sqlite3.connect(db_file)
-            # print(sqlite3.version)
+            # Writes start with BEGIN IMMEDIATE, which takes the write lock straight away. A deferred transaction
+            # that reads first could find that another connection wrote in the meantime and fail without waiting.
+            conn = sqlite3.connect(db_file, timeout=self._busy_timeout, isolation_level='IMMEDIATE',
+                                   check_same_thread=False)
+            for name, value in self._pragmas:
+                if value is not None:
+                    conn.execute('PRAGMA {} = {};'.format(name, value))
         except sqlite3.Error as e:
             print(e)
+            return conn
+
+        with self._lock:
+            # Close the connections of threads that have finished, so a pool that replaces its threads doesn't
+            # leave their connections open
+            for thread in [thread for thread in self._connections if not thread.is_alive()]:
+                self._connections.pop(thread).close()
+            self._connections[threading.current_thread()] = conn
 
         return conn
 
+    def _forked(self, pid):
+        """Forget the connections and lock inherited from the process this one was forked from."""
+        # Another thread of the parent may have held the lock when it forked, and it will never be released here
+        self._lock = threading.RLock()
+
+        # Connections can't be used across a fork. Closing an inherited one could checkpoint and remove the WAL file
+        # under the parent, so they're kept open but never used again.
+        self._inherited_connections.extend(self._connections.values())
+        self._connections = {}
+        self._pid = pid
+
+    def _set_journal_mode(self, journal_mode):
+        try:
+            self._retry(lambda conn: conn.execute('PRAGMA journal_mode = {};'.format(journal_mode)))
+        except sqlite3.Error as e:
+            print(e)
+
+    @contextlib.contextmanager
+    def _connection(self):
+        """Yield the connection of the current thread, holding the lock if it's shared with other threads."""
+        if self._shared_conn is not None:
+            with self._lock:
+                yield self._shared_conn
+        else:
+            yield self._conn
+
+    def _retry(self, operation, write=False):
+        """Run an operation on the connection of the current thread, retrying it while the database is locked.
+
+        Args:
+            operation (callable):
+                Called with the connection. It's called again from the start if it is retried.
+            write (bool):
+                If True, the operation is run in a transaction that's committed when it returns or rolled back if
+                it raises.
+
+        Returns:
+            Whatever the operation returns.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self._connection() as conn:
+                    if write:
+                        with conn:
+                            return operation(conn)
+                    return operation(conn)
+            except sqlite3.OperationalError as e:
+                if attempt >= self._max_retries or not _is_busy_error(e):
+                    raise
+                metrics.increment('ecal_sqlite_busy_retries_total')
+                time.sleep(random.uniform(0, self._retry_backoff * 2 ** attempt))
+                attempt += 1
+
     def _create_cached_dates_table(self):
 
         sql = ('CREATE TABLE IF NOT EXISTS cached_dates ('
@@ -97,6 +246,29 @@ class SqliteCache(AbstractCache):
         except sqlite3.Error as e:
             print(e)
 
+    def _create_fetch_times_table(self):
+
+        # This is kept apart from cached_dates so caches created before fetch times were recorded still work.
+        # Their dates just have no fetch time.
+        sql = ('CREATE TABLE IF NOT EXISTS fetch_times ('
+               'date text NOT NULL PRIMARY KEY,'
+               'fetched_at real NOT NULL);')
+        try:
+            c = self._conn.cursor()
+            c.execute(sql)
+        except sqlite3.Error as e:
+            print(e)
+
+    def _create_ticker_index(self):
+
+        # Lets next_announcements and previous_announcements find a ticker's nearest date with one index seek
+        sql = 'CREATE INDEX IF NOT EXISTS announcements_ticker_date ON announcements (ticker, date);'
+        try:
+            c = self._conn.cursor()
+            c.execute(sql)
+        except sqlite3.Error as e:
+            print(e)
+
     def _create_string_of_rows_for_VALUES_clause(self, str_list):
         """Create a string that can be passed into the SQL VALUES clause to create a row for each string in str_list.
 
@@ -167,7 +339,7 @@ class SqliteCache(AbstractCache):
                 'SELECT date FROM cached_dates;').format(date_list_str)
 
         try:
-            df = pd.read_sql(sql, self._conn, index_col='column1')
+            df = self._retry(lambda conn: pd.read_sql(sql, conn, index_col='column1'))
         except Exception as e:
             print(e)
             # create an empty dataframe to return
@@ -179,6 +351,8 @@ class SqliteCache(AbstractCache):
     def add(self, missing_dates, uncached_announcements_df):
         """Add the uncached announcements to the cache.
 
+        If some of the dates are already in the cache, their old announcements are replaced.
+
         Args:
             missing_dates (list):
                 The dates that were fetched and should be added to the cache index.
@@ -208,27 +382,31 @@ class SqliteCache(AbstractCache):
                 '(date) '
                 'VALUES {};').format(date_list_str)
 
-        cur = self._conn.cursor()
-        cur.execute(sql)
-        self._conn.commit()
+        # The dates and their announcements are committed together (or rolled back together if something fails)
+        # so no other thread or process ever sees a cached date without its announcements.
+        fetched_time = time.time()
+        announcement_rows = []
+        if uncached_announcements_df is not None:
+            # first generate a list of tuples for each row in the dataframe
+            announcement_rows = list(uncached_announcements_df.itertuples())
 
-        if uncached_announcements_df is None:
-            return
+        def write(conn):
+            cur = conn.cursor()
+            cur.execute(sql)
 
-        #
-        # Add the uncached announcements to the announcements table
-        #
+            # Record when the dates were fetched
+            cur.executemany('REPLACE INTO fetch_times (date, fetched_at) VALUES (?, ?);',
+                            [(date, fetched_time) for date in missing_dates])
 
-        # first generate a list of tuples for each row in the dataframe
-        values = list(uncached_announcements_df.itertuples())
+            # Remove the old announcements for dates that are being refreshed
+            cur.execute('DELETE FROM announcements WHERE date IN (VALUES {});'.format(date_list_str))
 
-        sql = ('REPLACE INTO announcements'
-               '(date, ticker, period)'
-               'VALUES (?, ?, ?);')
+            # Add the uncached announcements to the announcements table
+            cur.executemany('REPLACE INTO announcements'
+                            '(date, ticker, period)'
+                            'VALUES (?, ?, ?);', announcement_rows)
 
-        cur = self._conn.cursor()
-        cur.executemany(sql, values)
-        self._conn.commit()
+        self._retry(write, write=True)
 
     def fetch_calendar(self, start_date_str, end_date_str=None):
         """Returns the earnings calendar from the cache as a pandas DataFrame.
@@ -254,10 +432,166 @@ class SqliteCache(AbstractCache):
         sql = "SELECT * FROM announcements WHERE date BETWEEN ? AND ?;"
 
         try:
-            df = pd.read_sql(sql, self._conn, index_col='date', params=values)
+            df = self._retry(lambda conn: pd.read_sql(sql, conn, index_col='date', params=values))
+            df.rename(columns={'period': 'when'}, inplace=True)
+        except Exception as e:
+            print(e)
+            # create an empty dataframe to return
+            df = pd.DataFrame({'A': []})
+        return df
+
+    def query(self, start_date_str, end_date_str=None, tickers=None, when=None):
+        """Returns the announcements from the cache that match some filters as a pandas DataFrame.
+
+        The filters are applied in SQL so only the matching rows are read from the database.
+
+        Args:
+            start_date_str (str):
+                The start date of the earnings calendar in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The end date of the earnings calendar in the format ``YYYY-MM-DD``.
+                If left out, we will fetch only the announcements for the start date.
+            tickers (list):
+                The ticker symbols to keep. None keeps them all.
+            when (list):
+                The ``when`` values to keep. None keeps them all.
+
+        Returns:
+            DataFrame:
+                Returns a pandas DataFrame indexed by ``date``, that has columns: ``ticker``, and ``when``
+                and a row for each announcement.
+        """
+        if end_date_str is None:
+            end_date_str = start_date_str
+
+        # Create a query like this one:
+        # SELECT date, ticker, period FROM announcements
+        # WHERE date BETWEEN '2018-01-01' AND '2018-01-05' AND ticker IN ('AAPL', 'MSFT') AND period IN ('amc');
+        sql = 'SELECT date, ticker, period FROM announcements WHERE date BETWEEN ? AND ?'
+        values = [start_date_str, end_date_str]
+
+        # sqlite limits the number of parameters in a statement, so filter long ticker lists in pandas instead
+        filter_tickers_in_sql = tickers is not None and len(tickers) <= self.MAX_SQL_TICKERS
+        if filter_tickers_in_sql:
+            sql += ' AND ticker IN ({})'.format(','.join('?' * len(tickers)))
+            values.extend(tickers)
+        if when is not None:
+            sql += ' AND period IN ({})'.format(','.join('?' * len(when)))
+            values.extend(when)
+        sql += ' ORDER BY date, ticker;'
+
+        try:
+            df = self._retry(lambda conn: pd.read_sql(sql, conn, index_col='date', params=values))
             df.rename(columns={'period': 'when'}, inplace=True)
         except Exception as e:
             print(e)
             # create an empty dataframe to return
             df = pd.DataFrame({'A': []})
+            return df
+
+        if tickers is not None and not filter_tickers_in_sql:
+            df = df[df['ticker'].isin(tickers)]
         return df
+
+    def next_announcements(self, tickers, start_date_str, end_date_str=None):
+        """Look in the cache for the first announcement of each ticker on or after a date.
+
+        Each ticker is looked up with a seek on the ``(ticker, date)`` index.
+
+        Args:
+            tickers (list):
+                The ticker symbols to look for.
+            start_date_str (str):
+                The first date to look at in the format ``YYYY-MM-DD``.
+            end_date_str (str):
+                The last date to look at in the format ``YYYY-MM-DD``. If left out, all the later cached dates are
+                looked at.
+
+        Returns:
+            DataFrame:
+                A pandas DataFrame indexed by ``ticker``, that has columns: ``date`` and ``when``, with a row for
+                each ticker that has an announcement in the range.
+        """
+        return self._nearest_announcements(tickers, start_date_str, end_date_str or '9999-12-31', 'ASC')
+
+    def previous_announcements(self, tickers, end_date_str, start_date_str=None):
+        """Look in the cache for the last announcement of each ticker on or before a date.
+
+        Each ticker is looked up with a seek on the ``(ticker, date)`` index.
+
+        Args:
+            tickers (list):
+                The ticker symbols to look for.
+            end_date_str (str):
+                The last date to look at in the format ``YYYY-MM-DD``.
+            start_date_str (str):
+                The first date to look at in the format ``YYYY-MM-DD``. If left out, all the earlier cached dates
+                are looked at.
+
+        Returns:
+            DataFrame:
+                A pandas DataFrame indexed by ``ticker``, that has columns: ``date`` and ``when``, with a row for
+                each ticker that has an announcement in the range.
+        """
+        return self._nearest_announcements(tickers, start_date_str or '0001-01-01', end_date_str, 'DESC')
+
+    def _nearest_announcements(self, tickers, start_date_str, end_date_str, order):
+        """Return the earliest (order ``ASC``) or latest (order ``DESC``) announcement of each ticker in a range."""
+
+        """
+        Create a query like this one, which finds each ticker's date with a correlated subquery that sqlite answers
+        with a single seek on the announcements_ticker_date index:
+            WITH wanted(ticker) AS (VALUES ('AAPL'),('MSFT'))
+            SELECT a.ticker, a.date, a.period
+            FROM wanted JOIN announcements a ON a.ticker = wanted.ticker AND a.date = (
+                SELECT date FROM announcements
+                WHERE ticker = wanted.ticker AND date BETWEEN '2018-01-01' AND '9999-12-31'
+                ORDER BY date ASC LIMIT 1);
+        """
+        rows = []
+        tickers = list(dict.fromkeys(tickers))
+        for i in range(0, len(tickers), self.MAX_SQL_TICKERS):
+            chunk = tickers[i:i + self.MAX_SQL_TICKERS]
+            sql = ('WITH wanted(ticker) AS (VALUES {}) '
+                   'SELECT a.ticker, a.date, a.period '
+                   'FROM wanted JOIN announcements a ON a.ticker = wanted.ticker AND a.date = ('
+                   'SELECT date FROM announcements '
+                   'WHERE ticker = wanted.ticker AND date BETWEEN ? AND ? '
+                   'ORDER BY date {} LIMIT 1);').format(','.join(['(?)'] * len(chunk)), order)
+            params = chunk + [start_date_str, end_date_str]
+            rows.extend(self._retry(lambda conn: conn.execute(sql, params).fetchall()))
+
+        df = pd.DataFrame(rows, columns=['ticker', 'date', 'when'])
+        return df.set_index('ticker')
+
+    def fetched_at(self, date_list):
+        """Look in the cache for when dates were fetched.
+
+        Args:
+            date_list (list):
+                The list of dates to look for.
+
+        Returns:
+            dict:
+                The time (as returned by ``time.time()``) each date in the cache was last added, keyed by date.
+                Dates that aren't in the cache are left out. The time is None for dates cached before fetch times
+                were recorded.
+        """
+        if not date_list:
+            return {}
+
+        date_list_str = self._create_string_of_rows_for_VALUES_clause(date_list)
+
+        sql = ('SELECT cached_dates.date, fetch_times.fetched_at '
+               'FROM cached_dates LEFT JOIN fetch_times ON cached_dates.date = fetch_times.date '
+               'WHERE cached_dates.date IN (VALUES {});').format(date_list_str)
+
+        rows = self._retry(lambda conn: conn.execute(sql).fetchall())
+
+        return {date: fetched_time for date, fetched_time in rows}
+
+
+def _is_busy_error(e):
+    """Return True if an sqlite error means the database was locked by another connection."""
+    message = str(e).lower()
+    return 'locked' in message or 'busy' in message
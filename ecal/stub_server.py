@@ -0,0 +1,261 @@
+import argparse
+import datetime
+import json
+import random
+import string
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+__all__ = [
+    'StubECNServer'
+]
+
+
+class StubECNServer(object):
+    """StubECNServer is a local stand-in for ``api.earningscalendar.net``.
+
+    It answers ``GET /?date=YYYYMMDD`` with the same JSON list the real API returns, using either recorded
+    announcements or synthetic ones. Latency, throttling, malformed bodies and dropped connections can be injected
+    so fetchers can be benchmarked and tested without a network:
+
+    .. code-block:: python
+
+        import ecal
+        from ecal.stub_server import StubECNServer
+
+        with StubECNServer(latency=0.2, rate_limit=1.0) as server:
+            fetcher = ecal.AsyncECNFetcher(url=server.url)
+            cal_df = fetcher.fetch_calendar('2018-01-01', '2018-01-31')
+
+    It can also be run on its own with ``python -m ecal.stub_server``.
+
+        Attributes:
+            request_count (int):
+                The number of requests the server has received.
+            throttled_count (int):
+                The number of requests that were answered with a ``429``.
+    """
+
+    def __init__(self, announcements=None, host='127.0.0.1', port=0, latency=0.0, rate_limit=None,
+                 retry_after=1, throttle_rate=0.0, malformed_rate=0.0, drop_rate=0.0, seed=0,
+                 announcements_per_day=50):
+        """
+        Args:
+            announcements (dict):
+                Recorded announcements to serve, keyed by date in the format ``YYYY-MM-DD``. Each value is the list
+                the API returned for that date. Dates that aren't in the dict have no announcements. If left out,
+                synthetic announcements are served for every weekday.
+            host (str):
+                The address to listen on.
+            port (int):
+                The port to listen on. 0 picks a free port.
+            latency (float or callable):
+                The time (in seconds) to wait before answering, or a function with no arguments that returns it,
+                for example ``lambda: random.lognormvariate(-2, 0.5)``.
+            rate_limit (float):
+                If set, requests that arrive less than this many seconds after the last one that was answered are
+                throttled, like the real API.
+            retry_after (float):
+                The ``Retry-After`` header sent with throttled responses. None leaves the header out.
+            throttle_rate (float):
+                The probability that any request is throttled.
+            malformed_rate (float):
+                The probability that a response body isn't valid JSON.
+            drop_rate (float):
+                The probability that the connection is closed without a response.
+            seed (int):
+                The seed for the synthetic announcements and the injected faults.
+            announcements_per_day (int):
+                The average number of synthetic announcements on a weekday.
+        """
+        self._announcements = announcements
+        self._latency = latency
+        self._rate_limit = rate_limit
+        self._retry_after = retry_after
+        self._throttle_rate = throttle_rate
+        self._malformed_rate = malformed_rate
+        self._drop_rate = drop_rate
+        self._seed = seed
+        self._announcements_per_day = announcements_per_day
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._last_answer_time = None
+        self._tickers = _synthetic_tickers(random.Random(seed), 4 * announcements_per_day + 100)
+        self.request_count = 0
+        self.throttled_count = 0
+
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """str: The base URL to give a fetcher, for example ``http://127.0.0.1:54321/``."""
+        host, port = self._httpd.server_address[:2]
+        return 'http://{}:{}/'.format(host, port)
+
+    def start(self):
+        """Start serving on a daemon thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='ecal-stub-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            # shutdown() waits for serve_forever() to return, so it would block if the server was never started
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def announcements_for_date(self, date_str):
+        """Return the list of announcements the server sends for a date.
+
+        Args:
+            date_str (str):
+                A date in the format ``YYYY-MM-DD``.
+
+        Returns:
+            list:
+                The announcements as dicts with ``ticker``, ``when`` and ``cap_mm`` keys.
+        """
+        if self._announcements is not None:
+            return self._announcements.get(date_str, [])
+
+        date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+        if date.weekday() >= 5:
+            return []
+
+        # Seed with the date so the same date always gets the same announcements
+        rng = random.Random('{}-{}'.format(self._seed, date_str))
+        count = rng.randint(0, 2 * self._announcements_per_day)
+        tickers = sorted(rng.sample(self._tickers, count))
+        return [{'ticker': ticker, 'when': rng.choice(['bmo', 'amc', '--']), 'cap_mm': rng.randint(50, 500000)}
+                for ticker in tickers]
+
+    def _respond(self, handler):
+        """Work out and send the response to a request."""
+        with self._lock:
+            self.request_count += 1
+            roll = self._random.random()
+            latency = self._latency() if callable(self._latency) else self._latency
+
+        if latency > 0:
+            time.sleep(latency)
+
+        if roll < self._drop_rate:
+            handler.close_connection = True
+            return
+        roll -= self._drop_rate
+
+        with self._lock:
+            now = time.monotonic()
+            throttled = roll < self._throttle_rate or (self._rate_limit is not None and
+                                                       self._last_answer_time is not None and
+                                                       now - self._last_answer_time < self._rate_limit)
+            if throttled:
+                self.throttled_count += 1
+            else:
+                self._last_answer_time = now
+        roll -= self._throttle_rate
+
+        if throttled:
+            handler.send_response(429)
+            if self._retry_after is not None:
+                handler.send_header('Retry-After', str(self._retry_after))
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        query = parse_qs(urlparse(handler.path).query)
+        try:
+            date_str = datetime.datetime.strptime(query['date'][0], '%Y%m%d').strftime('%Y-%m-%d')
+        except (KeyError, ValueError):
+            body = b'{"error": "date must be given as YYYYMMDD"}'
+            handler.send_response(400)
+        else:
+            if roll < self._malformed_rate:
+                body = b'[{"ticker": "AEHR", "when": '
+            else:
+                body = json.dumps(self.announcements_for_date(date_str)).encode('utf-8')
+            handler.send_response(200)
+
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+def _make_handler(server):
+    """Create the request handler class for a StubECNServer."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            server._respond(self)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def _synthetic_tickers(rng, count):
+    """Return a sorted list of unique made up ticker symbols."""
+    tickers = set()
+    while len(tickers) < count:
+        tickers.add(''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(2, 4))))
+    return sorted(tickers)
+
+
+def main(argv=None):
+    """Run a StubECNServer until interrupted."""
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for api.earningscalendar.net.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--recorded', help='a JSON file of announcements keyed by date (YYYY-MM-DD)')
+    parser.add_argument('--latency', type=float, default=0.0, help='the mean latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='the standard deviation of the latency')
+    parser.add_argument('--rate-limit', type=float, help='throttle calls closer together than this many seconds')
+    parser.add_argument('--retry-after', type=float, default=1)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    announcements = None
+    if args.recorded:
+        with open(args.recorded) as f:
+            announcements = json.load(f)
+
+    latency = args.latency
+    if args.jitter:
+        latency_random = random.Random(args.seed)
+        latency = lambda: max(0.0, latency_random.gauss(args.latency, args.jitter))
+
+    server = StubECNServer(announcements, args.host, args.port, latency=latency, rate_limit=args.rate_limit,
+                           retry_after=args.retry_after, throttle_rate=args.throttle_rate,
+                           malformed_rate=args.malformed_rate, drop_rate=args.drop_rate, seed=args.seed)
+    print('Serving on {}'.format(server.url))
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
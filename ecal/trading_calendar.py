@@ -0,0 +1,91 @@
+import pandas as pd
+from dateutil.relativedelta import MO
+from pandas.tseries.holiday import AbstractHolidayCalendar, Holiday, GoodFriday, USLaborDay, USMemorialDay, \
+    USPresidentsDay, USThanksgivingDay, nearest_workday, sunday_to_monday
+from pandas.tseries.offsets import DateOffset
+
+__all__ = [
+    'AbstractTradingCalendar',
+    'WeekdayCalendar',
+    'NYSECalendar'
+]
+
+
+class AbstractTradingCalendar(object):
+    """AbstractTradingCalendar is the base class for trading calendars.
+
+    A trading calendar tells ``ecal.get`` which days can't have earnings announcements so they can be recorded in
+    the cache as empty without calling the fetcher.
+
+        Derived classes must implement:
+            * non_trading_days
+
+    """
+
+    def non_trading_days(self, date_list):
+        """Return the dates that aren't trading days.
+
+        Args:
+            date_list (list):
+                The dates to check in the format ``YYYY-MM-DD``.
+
+        Returns:
+            list:
+                The dates from the date_list that aren't trading days, in the same order.
+        """
+        raise NotImplementedError('AbstractTradingCalendar is an abstract base class')
+
+
+class WeekdayCalendar(AbstractTradingCalendar):
+    """WeekdayCalendar treats every Saturday and Sunday as a non-trading day."""
+
+    def non_trading_days(self, date_list):
+        """Return the dates that aren't trading days.
+
+        Args:
+            date_list (list):
+                The dates to check in the format ``YYYY-MM-DD``.
+
+        Returns:
+            list:
+                The dates from the date_list that aren't trading days, in the same order.
+        """
+        if not date_list:
+            return []
+        dates = pd.to_datetime(date_list)
+        return [date_str for date_str, closed in zip(date_list, self._closed(dates)) if closed]
+
+    def _closed(self, dates):
+        """Return a boolean array that is True for each date the market is closed."""
+        return dates.dayofweek >= 5
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """The regular NYSE holiday rules. One-off closures (for example after 9/11 or Hurricane Sandy) aren't included.
+    """
+    rules = [
+        # When New Year's Day is a Saturday, the NYSE doesn't close on the Friday before
+        Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+        Holiday('Martin Luther King Jr. Day', start_date='1998-01-01', month=1, day=1,
+                offset=DateOffset(weekday=MO(3))),
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', start_date='2022-01-01', month=6, day=19, observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas Day', month=12, day=25, observance=nearest_workday)
+    ]
+
+
+class NYSECalendar(WeekdayCalendar):
+    """NYSECalendar treats weekends and NYSE holidays as non-trading days."""
+
+    def __init__(self):
+        self._holiday_calendar = NYSEHolidayCalendar()
+
+    def _closed(self, dates):
+        """Return a boolean array that is True for each date the market is closed."""
+        holidays = self._holiday_calendar.holidays(dates.min(), dates.max())
+        return super()._closed(dates) | dates.isin(holidays)
@@ -17,6 +17,9 @@ setuptools.setup(
     long_description=long_description,
     url='https://github.com/brettelliot/ecal',
     packages=['ecal'],
+    entry_points={
+        'console_scripts': ['ecal = ecal.cli:main']
+    },
     install_requires=[
         'pandas == 0.22.0',
         'requests >= 2.19.1',
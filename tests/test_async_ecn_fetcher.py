@@ -0,0 +1,67 @@
+import unittest
+import threading
+import time
+import ecal
+
+
+class SlowAsyncECNFetcher(ecal.AsyncECNFetcher):
+    """An AsyncECNFetcher that doesn't call the API. Each request takes ``latency`` seconds to respond.
+    """
+
+    def __init__(self, rate_limit, latency):
+        super().__init__(rate_limit=rate_limit)
+        self.latency = latency
+        self.start_times = []
+        self._lock = threading.Lock()
+
+    def _request_announcements(self, date_str):
+        with self._lock:
+            self.start_times.append(time.monotonic())
+        time.sleep(self.latency)
+        return [{'ticker': 'T' + date_str[-2:], 'when': 'bmo'}]
+
+
+class TestAsyncECNFetcher(unittest.TestCase):
+
+    def test_fetch_calendar_returns_a_row_per_announcement_in_date_order(self):
+        fetcher = SlowAsyncECNFetcher(rate_limit=0.01, latency=0.01)
+
+        actual_df = fetcher.fetch_calendar('2018-01-01', '2018-01-05')
+
+        self.assertListEqual(actual_df.index.tolist(),
+                             ['2018-01-01', '2018-01-02', '2018-01-03', '2018-01-04', '2018-01-05'])
+        self.assertListEqual(actual_df['ticker'].tolist(), ['T01', 'T02', 'T03', 'T04', 'T05'])
+        self.assertListEqual(actual_df['when'].tolist(), ['bmo'] * 5)
+
+    def test_requests_overlap_but_start_at_the_rate_limit(self):
+
+        # GIVEN responses that are much slower than the rate limit
+        fetcher = SlowAsyncECNFetcher(rate_limit=0.05, latency=0.3)
+
+        # WHEN five days are fetched
+        pre_call_time = time.monotonic()
+        fetcher.fetch_calendar('2018-01-01', '2018-01-05')
+        elapsed = time.monotonic() - pre_call_time
+
+        # THEN the requests are started one rate limit apart
+        gaps = [b - a for a, b in zip(fetcher.start_times, fetcher.start_times[1:])]
+        for gap in gaps:
+            self.assertGreaterEqual(gap, 0.04)
+
+        # AND a slow response doesn't hold back the next request
+        self.assertLess(elapsed, 5 * 0.3)
+
+    def test_fetch_calendar_works_inside_a_running_event_loop(self):
+        import asyncio
+
+        fetcher = SlowAsyncECNFetcher(rate_limit=0.01, latency=0.0)
+
+        async def call_sync_api():
+            return fetcher.fetch_calendar('2018-01-04')
+
+        actual_df = asyncio.run(call_sync_api())
+        self.assertListEqual(actual_df['ticker'].tolist(), ['T04'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import tempfile
+from benchmarks.runner import compare, measure
+from benchmarks.suite import make_benchmarks
+from benchmarks.synthetic_fetcher import SyntheticFetcher
+
+
+class TestSyntheticFetcher(unittest.TestCase):
+
+    def test_weekdays_get_the_same_announcements_every_time(self):
+        fetcher = SyntheticFetcher(announcements_per_day=20)
+
+        cal_df = fetcher.fetch_calendar('2018-01-05', '2018-01-08')
+
+        # Saturday and Sunday have no announcements
+        self.assertEqual(cal_df.index.unique().tolist(), ['2018-01-05', '2018-01-08'])
+        self.assertEqual(len(cal_df), 40)
+        self.assertTrue(cal_df.equals(SyntheticFetcher(announcements_per_day=20).fetch_calendar('2018-01-05',
+                                                                                                '2018-01-08')))
+
+    def test_weekend_is_empty(self):
+        cal_df = SyntheticFetcher().fetch_calendar('2018-01-06', '2018-01-07')
+
+        self.assertTrue(cal_df.empty)
+        self.assertEqual(cal_df.index.name, 'date')
+
+
+class TestRunner(unittest.TestCase):
+
+    def test_measure_quick_benchmarks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            benchmarks = [b for b in make_benchmarks(directory, quick=True) if 'range=7d' in b.name]
+            results = {b.name: measure(b, repeat=1) for b in benchmarks}
+
+        self.assertIn('runtime.cold_get[range=7d]', results)
+        self.assertIn('sqlite.warm_get[history=1y,range=7d]', results)
+        for result in results.values():
+            self.assertGreater(result['seconds'], 0)
+            self.assertGreaterEqual(result['peak_kib'], 0)
+
+    def test_compare_reports_regressions_beyond_the_tolerance(self):
+        baselines = {'a': {'seconds': 0.010, 'peak_kib': 1000},
+                     'b': {'seconds': 0.010, 'peak_kib': 1000},
+                     'c': {'seconds': 0.010, 'peak_kib': 1000}}
+        results = {'a': {'seconds': 0.012, 'peak_kib': 1100},
+                   'b': {'seconds': 0.030, 'peak_kib': 1000},
+                   'c': {'seconds': 0.010, 'peak_kib': 2000},
+                   'new': {'seconds': 1.0, 'peak_kib': 1000}}
+
+        regressions = compare(results, baselines, time_tolerance=0.5, memory_tolerance=0.25)
+
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('b:'))
+        self.assertTrue(regressions[1].startswith('c:'))
+
+    def test_compare_ignores_tiny_time_changes(self):
+        regressions = compare({'a': {'seconds': 0.0003, 'peak_kib': 1}}, {'a': {'seconds': 0.0001, 'peak_kib': 1}})
+
+        self.assertEqual(regressions, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
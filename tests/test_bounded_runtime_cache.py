@@ -0,0 +1,89 @@
+import unittest
+import ecal
+import pandas as pd
+
+
+def _calendar(date_strs, tickers_per_day):
+    dates = [date_str for date_str in date_strs for _ in range(tickers_per_day)]
+    tickers = ['T{}'.format(i) for _ in date_strs for i in range(tickers_per_day)]
+    return pd.DataFrame({'ticker': tickers, 'when': ['amc'] * len(dates)},
+                        index=pd.Index(dates, name='date'), columns=['ticker', 'when'])
+
+
+class TestBoundedRuntimeCache(unittest.TestCase):
+
+    def test_least_recently_used_dates_are_evicted_past_max_rows(self):
+        cache = ecal.BoundedRuntimeCache(max_rows=35)
+        for date_str in ['2018-01-01', '2018-01-02', '2018-01-03']:
+            cache.add([date_str], _calendar([date_str], 10))
+
+        # Reading 2018-01-01 makes 2018-01-02 the least recently used date
+        cache.fetch_calendar('2018-01-01')
+        cache.add(['2018-01-04'], _calendar(['2018-01-04'], 10))
+
+        self.assertEqual(cache.check_for_missing_dates(['2018-01-01', '2018-01-02', '2018-01-03', '2018-01-04']),
+                         ['2018-01-02'])
+        self.assertEqual(cache.fetched_at(['2018-01-02']), {})
+        self.assertTrue(cache.fetch_calendar('2018-01-02').empty)
+        self.assertEqual(len(cache.fetch_calendar('2018-01-01', '2018-01-04')), 30)
+        self.assertEqual((cache.rows, cache.evictions, cache.evicted_dates, cache.evicted_rows), (30, 1, 1, 10))
+
+    def test_evicted_dates_are_fetched_again(self):
+        cache = ecal.BoundedRuntimeCache(max_rows=20)
+        fetched = []
+
+        class Fetcher(ecal.AbstractFetcher):
+            def __init__(self):
+                pass
+
+            def fetch_calendar(self, start_date_str, end_date_str=None):
+                fetched.append((start_date_str, end_date_str))
+                return _calendar(pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d'), 10)
+
+        ecal.get('2018-01-01', '2018-01-02', fetcher=Fetcher(), cache=cache)
+        ecal.get('2018-01-03', '2018-01-04', fetcher=Fetcher(), cache=cache)
+        actual = ecal.get('2018-01-01', fetcher=Fetcher(), cache=cache)
+
+        self.assertEqual(len(actual), 10)
+        self.assertEqual(fetched, [('2018-01-01', '2018-01-02'), ('2018-01-03', '2018-01-04'),
+                                   ('2018-01-01', '2018-01-01')])
+
+    def test_dates_being_added_are_not_evicted(self):
+        cache = ecal.BoundedRuntimeCache(max_rows=5)
+
+        cache.add(['2018-01-01'], _calendar(['2018-01-01'], 10))
+
+        self.assertEqual(len(cache.fetch_calendar('2018-01-01')), 10)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_max_bytes(self):
+        cache = ecal.BoundedRuntimeCache(max_bytes=1)
+        cache.add(['2018-01-01'], _calendar(['2018-01-01'], 10))
+        self.assertGreater(cache.bytes, 0)
+
+        cache.add(['2018-01-02'], _calendar(['2018-01-02'], 10))
+
+        self.assertEqual(cache.check_for_missing_dates(['2018-01-01', '2018-01-02']), ['2018-01-01'])
+
+    def test_date_window(self):
+        cache = ecal.BoundedRuntimeCache(date_window=7, compact=True)
+        cache.add(['2018-01-01', '2018-01-05'], _calendar(['2018-01-01', '2018-01-05'], 2))
+
+        cache.add(['2018-01-10'], _calendar(['2018-01-10'], 2))
+
+        self.assertEqual(cache.check_for_missing_dates(['2018-01-01', '2018-01-05', '2018-01-10']), ['2018-01-01'])
+        self.assertEqual(cache.fetch_calendar('2018-01-01', '2018-01-31').index.strftime('%Y-%m-%d').tolist(),
+                         ['2018-01-05', '2018-01-05', '2018-01-10', '2018-01-10'])
+
+    def test_refreshing_a_date_replaces_its_size(self):
+        cache = ecal.BoundedRuntimeCache(max_rows=100)
+        cache.add(['2018-01-01'], _calendar(['2018-01-01'], 10))
+
+        cache.add(['2018-01-01'], _calendar(['2018-01-01'], 4))
+
+        self.assertEqual(cache.rows, 4)
+        self.assertEqual(len(cache.fetch_calendar('2018-01-01')), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
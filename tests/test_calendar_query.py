@@ -0,0 +1,114 @@
+import unittest
+import tempfile
+import ecal
+import pandas as pd
+
+
+class ThreeTickerMockFetcher(ecal.AbstractFetcher):
+    """Returns the same three announcements for every day it's asked for and remembers the days."""
+
+    def __init__(self):
+        self.fetched_dates = []
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        if end_date_str is None:
+            end_date_str = start_date_str
+        date_list = pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d').tolist()
+        self.fetched_dates.extend(date_list)
+        df = pd.DataFrame({'date': [d for d in date_list for _ in range(3)],
+                           'ticker': ['AAPL', 'IBM', 'MSFT'] * len(date_list),
+                           'when': ['amc', 'bmo', '--'] * len(date_list)})
+        return df.set_index('date')[['ticker', 'when']]
+
+
+class CalendarQueryTests(object):
+    """Tests that run against every cache. Subclasses set up self.cache."""
+
+    def setUp(self):
+        self.fetcher = ThreeTickerMockFetcher()
+
+    def query(self, start_date_str=None, end_date_str=None):
+        return ecal.query(start_date_str, end_date_str, fetcher=self.fetcher, cache=self.cache)
+
+    def test_query_without_filters_matches_get(self):
+        actual_df = self.query('2018-01-01', '2018-01-03').to_frame()
+
+        self.assertEqual(len(actual_df), 9)
+        self.assertListEqual(sorted(actual_df['ticker'].unique().tolist()), ['AAPL', 'IBM', 'MSFT'])
+
+    def test_tickers_and_when_filters(self):
+        query = self.query('2018-01-01', '2018-01-03')
+
+        tickers_df = query.tickers(['AAPL', 'MSFT']).to_frame()
+        when_df = query.when('bmo', '--').to_frame()
+        both_df = query.tickers(['AAPL', 'MSFT']).when('amc').to_frame()
+
+        self.assertListEqual(sorted(tickers_df['ticker'].unique().tolist()), ['AAPL', 'MSFT'])
+        self.assertEqual(len(tickers_df), 6)
+        self.assertListEqual(sorted(when_df['ticker'].unique().tolist()), ['IBM', 'MSFT'])
+        self.assertListEqual(both_df['ticker'].tolist(), ['AAPL'] * 3)
+        self.assertListEqual(both_df.index.tolist(), ['2018-01-01', '2018-01-02', '2018-01-03'])
+        self.assertListEqual(both_df.columns.tolist(), ['ticker', 'when'])
+
+    def test_between_changes_the_range_and_only_missing_dates_are_fetched(self):
+        query = self.query().tickers('IBM')
+
+        query.between('2018-01-01', '2018-01-02').to_frame()
+        actual_df = query.between('2018-01-02', '2018-01-04').to_frame()
+
+        self.assertListEqual(actual_df.index.tolist(), ['2018-01-02', '2018-01-03', '2018-01-04'])
+        self.assertListEqual(self.fetcher.fetched_dates, ['2018-01-01', '2018-01-02', '2018-01-03', '2018-01-04'])
+
+    def test_nothing_is_fetched_until_to_frame(self):
+        query = self.query('2018-01-01', '2018-01-31').tickers(['AAPL']).when('amc')
+
+        self.assertListEqual(self.fetcher.fetched_dates, [])
+        self.assertEqual(len(query.to_frame()), 31)
+
+
+class TestCalendarQueryWithRuntimeCache(CalendarQueryTests, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = ecal.RuntimeCache()
+
+
+class TestCalendarQueryWithSqliteCache(CalendarQueryTests, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db_file = tempfile.NamedTemporaryFile()
+        self.cache = ecal.SqliteCache(self.db_file.name)
+
+    def tearDown(self):
+        self.db_file.close()
+
+    def test_long_ticker_lists_are_filtered_outside_sql(self):
+        tickers = ['T{}'.format(i) for i in range(ecal.SqliteCache.MAX_SQL_TICKERS)] + ['IBM']
+
+        actual_df = self.query('2018-01-01', '2018-01-02').tickers(tickers).to_frame()
+
+        self.assertListEqual(actual_df['ticker'].tolist(), ['IBM', 'IBM'])
+
+
+class TestCalendarQueryArguments(unittest.TestCase):
+
+    def test_queries_are_immutable(self):
+        query = ecal.query('2018-01-01')
+
+        query.tickers(['AAPL']).when('amc')
+
+        self.assertEqual(repr(query),
+                         "CalendarQuery(start_date_str='2018-01-01', end_date_str=None, tickers=None, when=None)")
+
+    def test_unknown_when_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ecal.query('2018-01-01').when('noon')
+
+    def test_to_frame_needs_a_date_range(self):
+        with self.assertRaises(ValueError):
+            ecal.query().tickers(['AAPL']).to_frame()
+
+
+if __name__ == '__main__':
+    unittest.main()
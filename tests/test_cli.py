@@ -0,0 +1,76 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import ecal
+import pandas as pd
+from ecal.cli import backfill, main
+from ecal.stub_server import StubECNServer
+
+
+class DayMockFetcher(ecal.AbstractFetcher):
+    """Returns one announcement for each day and remembers the ranges it was asked for"""
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        self.calls.append((start_date_str, end_date_str))
+        dates = pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d').tolist()
+        return pd.DataFrame({'ticker': ['AAPL'] * len(dates), 'when': ['amc'] * len(dates)},
+                            index=pd.Index(dates, name='date'), columns=['ticker', 'when'])
+
+
+class TestBackfill(unittest.TestCase):
+
+    def test_backfill_fetches_only_missing_dates_and_reports_progress(self):
+        cache = ecal.RuntimeCache()
+        fetcher = DayMockFetcher()
+        backfill('2018-01-05', '2018-01-06', fetcher, cache)
+        fetcher.calls = []
+        updates = []
+
+        status = backfill('2018-01-01', '2018-01-15', fetcher, cache, progress=lambda s: updates.append(str(s)))
+
+        self.assertEqual(status.total_dates, 15)
+        self.assertEqual(status.cached_dates, 2)
+        self.assertEqual(status.fetched_dates, 13)
+        self.assertEqual(status.announcements, 13)
+        self.assertEqual(status.remaining_dates, 0)
+        self.assertEqual(fetcher.calls, [('2018-01-01', '2018-01-04'), ('2018-01-07', '2018-01-15')])
+        self.assertEqual(len(updates), 2)
+        self.assertTrue(updates[-1].startswith('15/15 dates (100.0%)'))
+
+
+class TestMain(unittest.TestCase):
+
+    def test_backfill_command_fills_a_sqlite_cache_and_resumes(self):
+        with tempfile.TemporaryDirectory() as directory, StubECNServer(seed=1) as server:
+            path = os.path.join(directory, 'ecal.db')
+            argv = ['backfill', '--start', '2018-01-01', '--end', '2018-01-10', '--cache', 'sqlite:' + path,
+                    '--calendar', 'weekday', '--rate-limit', '0', '--url', server.url]
+
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                self.assertEqual(main(argv), 0)
+                self.assertEqual(main(argv), 0)
+
+            cache = ecal.SqliteCache(path)
+            self.assertEqual(cache.check_for_missing_dates(['2018-01-01', '2018-01-06', '2018-01-10']), [])
+            self.assertEqual(len(cache.fetch_calendar('2018-01-01', '2018-01-10')), sum(
+                len(server.announcements_for_date(date_str)) for date_str in
+                pd.date_range('2018-01-01', '2018-01-10').strftime('%Y-%m-%d')))
+
+        summaries = stdout.getvalue().splitlines()
+        self.assertIn('0 dates were already cached, fetched 10 dates', summaries[0])
+        self.assertIn('10 dates were already cached, fetched 0 dates', summaries[1])
+        self.assertIn('10/10 dates (100.0%)', stderr.getvalue())
+
+    def test_bad_cache_is_a_usage_error(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(['backfill', '--start', '2018-01-01', '--cache', 'redis:localhost'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import ecal
+import pandas as pd
+
+
+def _calendar(rows):
+    return pd.DataFrame([(ticker, when) for _, ticker, when in rows], columns=['ticker', 'when'],
+                        index=pd.Index([date_str for date_str, _, _ in rows], name='date'))
+
+
+class TestColumnarCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ecal.ColumnarCache()
+        self.cache.add(['2018-01-04', '2018-01-05', '2018-01-06'], _calendar([
+            ('2018-01-04', 'CMC', 'bmo'), ('2018-01-04', 'LNDC', 'amc'),
+            ('2018-01-05', 'AAPL', '--'), ('2018-01-05', 'CMC', 'amc')]))
+
+    def test_check_for_missing_dates(self):
+        actual = self.cache.check_for_missing_dates(['2018-01-03', '2018-01-04', '2018-01-06', '2018-01-07'])
+
+        self.assertListEqual(actual, ['2018-01-03', '2018-01-07'])
+
+    def test_fetch_calendar_matches_runtime_cache(self):
+        runtime_cache = ecal.RuntimeCache()
+        runtime_cache.add(['2018-01-04', '2018-01-05', '2018-01-06'], self.cache.fetch_calendar('2018-01-01',
+                                                                                                 '2018-01-31'))
+
+        for start_date_str, end_date_str in [('2018-01-04', None), ('2018-01-04', '2018-01-05'),
+                                             ('2018-01-06', None), ('2017-12-01', '2017-12-31')]:
+            actual = self.cache.fetch_calendar(start_date_str, end_date_str)
+            expected = runtime_cache.fetch_calendar(start_date_str, end_date_str)
+            self.assertTrue(actual.equals(expected))
+            self.assertEqual(actual.index.name, 'date')
+
+    def test_add_out_of_order_and_replace(self):
+        self.cache.add(['2018-01-02'], _calendar([('2018-01-02', 'MSFT', 'amc')]))
+        self.cache.add(['2018-01-04'], _calendar([('2018-01-04', 'NEW', 'bmo')]))
+
+        actual = self.cache.fetch_calendar('2018-01-01', '2018-01-31')
+
+        self.assertListEqual(actual.index.tolist(), ['2018-01-02', '2018-01-04', '2018-01-05', '2018-01-05'])
+        self.assertListEqual(actual['ticker'].tolist(), ['MSFT', 'NEW', 'AAPL', 'CMC'])
+
+    def test_tickers_are_interned_and_rows_are_small(self):
+        self.assertListEqual(self.cache._symbols, ['CMC', 'LNDC', 'AAPL'])
+        self.assertEqual(self.cache.nbytes, 4 * 9)
+
+    def test_unknown_when_values_are_read_back_as_none(self):
+        self.cache.add(['2018-01-08'], _calendar([('2018-01-08', 'XYZ', 'dmh')]))
+
+        self.assertIsNone(self.cache.fetch_calendar('2018-01-08')['when'].iloc[0])
+
+    def test_query(self):
+        actual = self.cache.query('2018-01-01', '2018-01-31', tickers=['CMC', 'MISSING'], when=['amc'])
+
+        self.assertListEqual(actual.index.tolist(), ['2018-01-05'])
+        self.assertListEqual(actual['ticker'].tolist(), ['CMC'])
+
+    def test_next_and_previous_announcements(self):
+        next_df = self.cache.next_announcements(['CMC', 'LNDC', 'AAPL', 'MISSING'], '2018-01-05')
+        previous_df = self.cache.previous_announcements(['CMC', 'AAPL'], '2018-01-04', '2018-01-01')
+
+        self.assertListEqual(next_df.index.tolist(), ['CMC', 'AAPL'])
+        self.assertListEqual(next_df['date'].tolist(), ['2018-01-05', '2018-01-05'])
+        self.assertListEqual(previous_df.index.tolist(), ['CMC'])
+        self.assertListEqual(previous_df['when'].tolist(), ['bmo'])
+
+    def test_fetched_at(self):
+        actual = self.cache.fetched_at(['2018-01-04', '2018-01-07'])
+
+        self.assertListEqual(list(actual), ['2018-01-04'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import time
+import ecal
+import pandas as pd
+
+
+class FakeFetcher(ecal.AbstractFetcher):
+    """Returns the same announcements after ``latency`` seconds, or raises ``error`` if it's set."""
+
+    def __init__(self, tickers, latency=0.0, error=None):
+        self.tickers = tickers
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        df = pd.DataFrame({'date': [start_date_str] * len(self.tickers),
+                           'ticker': self.tickers,
+                           'when': ['bmo'] * len(self.tickers)})
+        return df.set_index('date')
+
+
+class TestCompositeFetcher(unittest.TestCase):
+
+    def test_uses_the_primary_fetcher_when_it_works(self):
+        primary = FakeFetcher(['CMC'])
+        secondary = FakeFetcher(['LNDC'])
+        fetcher = ecal.CompositeFetcher([primary, secondary])
+
+        actual_df = fetcher.fetch_calendar('2018-01-04')
+
+        self.assertListEqual(actual_df['ticker'].tolist(), ['CMC'])
+        self.assertEqual(secondary.calls, 0)
+
+    def test_falls_back_when_a_fetcher_fails(self):
+        primary = FakeFetcher(['CMC'], error=ValueError('down'))
+        secondary = FakeFetcher(['LNDC'])
+        fetcher = ecal.CompositeFetcher([primary, secondary])
+
+        actual_df = fetcher.fetch_calendar('2018-01-04')
+
+        self.assertListEqual(actual_df['ticker'].tolist(), ['LNDC'])
+        self.assertEqual(actual_df.index.tolist(), ['2018-01-04'])
+
+    def test_raises_the_last_error_when_every_fetcher_fails(self):
+        fetcher = ecal.CompositeFetcher([FakeFetcher([], error=ValueError('first')),
+                                         FakeFetcher([], error=KeyError('second'))])
+        with self.assertRaises(KeyError):
+            fetcher.fetch_calendar('2018-01-04')
+
+    def test_hedges_when_the_primary_is_slower_than_usual(self):
+
+        # GIVEN a primary that usually answers quickly
+        primary = FakeFetcher(['CMC'], latency=0.01)
+        secondary = FakeFetcher(['LNDC'])
+        fetcher = ecal.CompositeFetcher([primary, secondary], min_samples=3)
+        for _ in range(3):
+            fetcher.fetch_calendar('2018-01-04')
+        self.assertEqual(secondary.calls, 0)
+
+        # WHEN it becomes slow
+        primary.latency = 1.0
+        pre_call_time = time.monotonic()
+        actual_df = fetcher.fetch_calendar('2018-01-04')
+
+        # THEN the hedged request to the secondary answers first
+        self.assertListEqual(actual_df['ticker'].tolist(), ['LNDC'])
+        self.assertLess(time.monotonic() - pre_call_time, 0.5)
+
+    def test_merge_combines_and_dedupes_announcements(self):
+        fetcher = ecal.CompositeFetcher([FakeFetcher(['CMC', 'LNDC']),
+                                         FakeFetcher(['LNDC', 'NEOG']),
+                                         FakeFetcher([], error=ValueError('down'))], merge=True)
+
+        actual_df = fetcher.fetch_calendar('2018-01-04')
+
+        self.assertListEqual(actual_df['ticker'].tolist(), ['CMC', 'LNDC', 'NEOG'])
+        self.assertEqual(actual_df.index.name, 'date')
+
+
+if __name__ == '__main__':
+    unittest.main()
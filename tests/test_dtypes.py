@@ -0,0 +1,72 @@
+import unittest
+import ecal
+import pandas as pd
+from ecal.dtypes import WHEN_DTYPE, is_compact, to_compact, to_standard
+
+
+def make_calendar(dates, tickers, whens):
+    df = pd.DataFrame({'date': dates, 'ticker': tickers, 'when': whens})
+    return df.set_index('date')[['ticker', 'when']]
+
+
+class TestDtypes(unittest.TestCase):
+
+    def setUp(self):
+        self.cal_df = make_calendar(['2018-01-04', '2018-01-04', '2018-01-05'], ['CMC', 'LNDC', 'CMC'],
+                                    ['bmo', 'amc', '--'])
+
+    def test_to_compact(self):
+        compact_df = to_compact(self.cal_df)
+
+        self.assertTrue(is_compact(compact_df))
+        self.assertIsInstance(compact_df.index, pd.DatetimeIndex)
+        self.assertEqual(compact_df.index.name, 'date')
+        self.assertEqual(compact_df['when'].dtype, WHEN_DTYPE)
+        self.assertIsInstance(compact_df['ticker'].dtype, pd.CategoricalDtype)
+        self.assertListEqual(compact_df['ticker'].tolist(), ['CMC', 'LNDC', 'CMC'])
+
+    def test_round_trip(self):
+        actual_df = to_standard(to_compact(self.cal_df))
+
+        self.assertFalse(is_compact(actual_df))
+        self.assertTrue(actual_df.equals(self.cal_df))
+
+    def test_to_standard_returns_standard_frames_unchanged(self):
+        self.assertIs(to_standard(self.cal_df), self.cal_df)
+
+    def test_ticker_codes_are_stable_so_compact_frames_can_be_joined(self):
+        first_df = to_compact(self.cal_df)
+        second_df = to_compact(make_calendar(['2018-01-08'], ['ZZZNEW'], ['amc']))
+
+        # Bringing the first frame up to date doesn't change the codes of the tickers it already had
+        updated_first_df = to_compact(first_df)
+        self.assertListEqual(updated_first_df['ticker'].cat.codes.tolist(), first_df['ticker'].cat.codes.tolist())
+
+        joined_df = pd.concat([updated_first_df, second_df])
+        self.assertIsInstance(joined_df['ticker'].dtype, pd.CategoricalDtype)
+        self.assertListEqual(joined_df['ticker'].tolist(), ['CMC', 'LNDC', 'CMC', 'ZZZNEW'])
+
+    def test_empty_calendar(self):
+        empty_df = pd.DataFrame(columns=['date', 'ticker', 'when']).set_index('date')
+
+        compact_df = to_compact(empty_df)
+
+        self.assertTrue(compact_df.empty)
+        self.assertListEqual(compact_df.columns.tolist(), ['ticker', 'when'])
+        self.assertTrue(to_standard(compact_df).empty)
+
+    def test_compact_is_much_smaller(self):
+        tickers = ['T{:04d}'.format(i % 500) for i in range(5000)]
+        cal_df = make_calendar(['2018-01-04'] * 5000, tickers, ['bmo', 'amc'] * 2500)
+
+        standard_bytes = cal_df.memory_usage(deep=True).sum()
+        # The ticker categories are shared by every compact frame, so only count the codes
+        compact_df = to_compact(cal_df)
+        compact_bytes = (compact_df.index.nbytes + compact_df['ticker'].cat.codes.nbytes +
+                         compact_df['when'].cat.codes.nbytes)
+
+        self.assertLess(compact_bytes * 10, standard_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,10 @@
+import os
+import subprocess
+import sys
 import unittest
+import tempfile
+import threading
+import time
 import ecal
 import pandas as pd
 
@@ -44,5 +50,391 @@ class TestEcalGet(unittest.TestCase):
         assert(actual_df['when'].equals(expected_df['when']))
 
 
+class RangeMockFetcher(ecal.AbstractFetcher):
+    """Returns one announcement for each day it's asked for and remembers the days."""
+
+    def __init__(self):
+        self.fetched_dates = []
+        self.calls = []
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        if end_date_str is None:
+            end_date_str = start_date_str
+        self.calls.append((start_date_str, end_date_str))
+        date_list = pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d').tolist()
+        self.fetched_dates.extend(date_list)
+        df = pd.DataFrame({'date': date_list, 'ticker': ['T' + d[-2:] for d in date_list], 'when': 'bmo'})
+        return df.set_index('date')
+
+
+class TestEcalGetWithCalendar(unittest.TestCase):
+
+    def test_non_trading_days_are_cached_without_fetching(self):
+        fetcher = RangeMockFetcher()
+        cache = ecal.RuntimeCache()
+
+        # 2018-01-01 is a holiday and the 6th and 7th are a weekend
+        actual_df = ecal.get('2018-01-01', '2018-01-08', fetcher=fetcher, cache=cache, calendar=ecal.NYSECalendar())
+
+        self.assertListEqual(fetcher.fetched_dates, ['2018-01-02', '2018-01-03', '2018-01-04', '2018-01-05',
+                                                     '2018-01-08'])
+        self.assertListEqual(actual_df.index.tolist(), fetcher.fetched_dates)
+        self.assertListEqual(cache.check_for_missing_dates(['2018-01-01', '2018-01-06', '2018-01-07']), [])
+
+
+class TestEcalGetSpans(unittest.TestCase):
+
+    def test_fetcher_is_called_once_per_span_of_missing_dates(self):
+        fetcher = RangeMockFetcher()
+        cache = ecal.RuntimeCache()
+
+        # GIVEN a cache that has the 4th and 5th
+        ecal.get('2018-01-04', '2018-01-05', fetcher=fetcher, cache=cache)
+        fetcher.calls = []
+
+        # WHEN the week around them is requested
+        actual_df = ecal.get('2018-01-01', '2018-01-08', fetcher=fetcher, cache=cache)
+
+        # THEN the fetcher is asked for the span before and the span after the cached dates
+        self.assertListEqual(fetcher.calls, [('2018-01-01', '2018-01-03'), ('2018-01-06', '2018-01-08')])
+        self.assertListEqual(actual_df.index.tolist(), ['2018-01-0{}'.format(d) for d in range(1, 9)])
+
+    def test_trading_calendar_splits_spans_at_weekends(self):
+        fetcher = RangeMockFetcher()
+
+        ecal.get('2018-01-01', '2018-01-10', fetcher=fetcher, cache=ecal.RuntimeCache(), calendar=ecal.NYSECalendar())
+
+        self.assertListEqual(fetcher.calls, [('2018-01-02', '2018-01-05'), ('2018-01-08', '2018-01-10')])
+
+
+class TestEcalGetCompact(unittest.TestCase):
+
+    def test_get_can_return_compact_frames(self):
+        actual_df = ecal.get('2018-01-01', '2018-01-03', fetcher=RangeMockFetcher(), cache=ecal.RuntimeCache(),
+                             compact=True)
+
+        self.assertIsInstance(actual_df.index, pd.DatetimeIndex)
+        self.assertIsInstance(actual_df['ticker'].dtype, pd.CategoricalDtype)
+        self.assertListEqual(actual_df['ticker'].tolist(), ['T01', 'T02', 'T03'])
+
+    def test_get_returns_standard_frames_from_a_compact_cache(self):
+        actual_df = ecal.get('2018-01-01', '2018-01-03', fetcher=RangeMockFetcher(),
+                             cache=ecal.RuntimeCache(compact=True))
+
+        self.assertListEqual(actual_df.index.tolist(), ['2018-01-01', '2018-01-02', '2018-01-03'])
+        self.assertEqual(actual_df['ticker'].dtype, object)
+
+
+class FailingRangeMockFetcher(RangeMockFetcher):
+    """A RangeMockFetcher that raises instead of answering its Nth call, like a backfill that gets interrupted."""
+
+    def __init__(self, fail_on_call):
+        super().__init__()
+        self.fail_on_call = fail_on_call
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        if len(self.calls) + 1 == self.fail_on_call:
+            self.calls.append((start_date_str, end_date_str))
+            raise KeyboardInterrupt
+        return super().fetch_calendar(start_date_str, end_date_str)
+
+
+class TestEcalGetCheckpoints(unittest.TestCase):
+
+    def test_interrupted_backfill_keeps_finished_batches_and_resumes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_file_path = directory + '/ecal.db'
+
+            # GIVEN a backfill that is interrupted while fetching its third batch of days
+            fetcher = FailingRangeMockFetcher(fail_on_call=3)
+            with self.assertRaises(KeyboardInterrupt):
+                ecal.get('2018-01-01', '2018-01-25', fetcher=fetcher, cache=ecal.SqliteCache(db_file_path))
+
+            # THEN the batches that were fetched were saved
+            cache = ecal.SqliteCache(db_file_path)
+            self.assertListEqual(cache.check_for_missing_dates(['2018-01-01', '2018-01-20', '2018-01-21']),
+                                 ['2018-01-21'])
+
+            # AND running it again only fetches the rest
+            fetcher = RangeMockFetcher()
+            actual_df = ecal.get('2018-01-01', '2018-01-25', fetcher=fetcher, cache=cache)
+            self.assertListEqual(fetcher.calls, [('2018-01-21', '2018-01-25')])
+            self.assertEqual(len(actual_df), 25)
+
+    def test_batches_are_no_longer_than_checkpoint_days(self):
+        fetcher = RangeMockFetcher()
+
+        ecal.get('2018-01-01', '2018-01-25', fetcher=fetcher, cache=ecal.RuntimeCache())
+
+        self.assertListEqual(fetcher.calls, [('2018-01-01', '2018-01-10'), ('2018-01-11', '2018-01-20'),
+                                             ('2018-01-21', '2018-01-25')])
+
+
+class SlowRangeMockFetcher(RangeMockFetcher):
+    """A RangeMockFetcher that takes a while to answer, so concurrent calls overlap."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        time.sleep(0.05)
+        with self._lock:
+            return super().fetch_calendar(start_date_str, end_date_str)
+
+
+class TestEcalGetConcurrently(unittest.TestCase):
+
+    def _get_from_threads(self, cache, ranges):
+        fetcher = SlowRangeMockFetcher()
+        results = {}
+
+        def call(start_date_str, end_date_str):
+            results[(start_date_str, end_date_str)] = ecal.get(start_date_str, end_date_str, fetcher=fetcher,
+                                                               cache=cache)
+
+        threads = [threading.Thread(target=call, args=date_range) for date_range in ranges]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return fetcher, results
+
+    def test_overlapping_dates_are_fetched_once(self):
+        ranges = [('2018-01-01', '2018-01-05'), ('2018-01-03', '2018-01-08'), ('2018-01-01', '2018-01-08')] * 2
+
+        fetcher, results = self._get_from_threads(ecal.RuntimeCache(), ranges)
+
+        self.assertListEqual(sorted(fetcher.fetched_dates), sorted(set(fetcher.fetched_dates)))
+        self.assertEqual(len(fetcher.fetched_dates), 8)
+        self.assertEqual(len(results[('2018-01-01', '2018-01-08')]), 8)
+        self.assertEqual(len(results[('2018-01-03', '2018-01-08')]), 6)
+
+    def test_sqlite_cache_can_be_shared_between_threads(self):
+        f = tempfile.NamedTemporaryFile()
+        ranges = [('2018-01-01', '2018-01-05'), ('2018-01-03', '2018-01-08')] * 2
+
+        fetcher, results = self._get_from_threads(ecal.SqliteCache(f.name), ranges)
+
+        self.assertEqual(len(fetcher.fetched_dates), 8)
+        self.assertEqual(len(results[('2018-01-03', '2018-01-08')]), 6)
+        f.close()
+
+
+class TestEcalGetWithFreshness(unittest.TestCase):
+
+    def test_stale_dates_are_returned_and_refreshed_in_the_background(self):
+
+        # GIVEN a cache with dates that are stale straight away
+        fetcher = RangeMockFetcher()
+        cache = ecal.RuntimeCache()
+        freshness = ecal.FreshnessPolicy(future_ttl=-1, past_ttl=-1)
+        ecal.get('2018-01-01', '2018-01-02', fetcher=fetcher, cache=cache)
+        fetcher.fetched_dates = []
+
+        # WHEN they are requested with the freshness policy
+        actual_df = ecal.get('2018-01-01', '2018-01-02', fetcher=fetcher, cache=cache, freshness=freshness)
+
+        # THEN the cached announcements are returned
+        self.assertListEqual(actual_df['ticker'].tolist(), ['T01', 'T02'])
+
+        # AND the dates are fetched again in the background
+        deadline = time.monotonic() + 5
+        while len(fetcher.fetched_dates) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertListEqual(sorted(fetcher.fetched_dates), ['2018-01-01', '2018-01-02'])
+
+    def test_fresh_dates_are_not_refreshed(self):
+        fetcher = RangeMockFetcher()
+        cache = ecal.RuntimeCache()
+        ecal.get('2018-01-01', '2018-01-02', fetcher=fetcher, cache=cache)
+        fetcher.fetched_dates = []
+
+        ecal.get('2018-01-01', '2018-01-02', fetcher=fetcher, cache=cache, freshness=ecal.FreshnessPolicy())
+
+        time.sleep(0.05)
+        self.assertListEqual(fetcher.fetched_dates, [])
+
+
+class TestEcalIterGet(unittest.TestCase):
+
+    def setUp(self):
+        self.fetcher = RangeMockFetcher()
+        self.cache = ecal.RuntimeCache()
+
+    def test_iter_get_yields_a_frame_per_chunk(self):
+        chunks = list(ecal.iter_get('2018-01-01', '2018-01-10', chunk='week', fetcher=self.fetcher, cache=self.cache))
+
+        self.assertEqual(len(chunks), 2)
+        self.assertListEqual(chunks[0].index.tolist(), ['2018-01-0{}'.format(d) for d in range(1, 8)])
+        self.assertListEqual(chunks[1].index.tolist(), ['2018-01-08', '2018-01-09', '2018-01-10'])
+
+    def test_iter_get_yields_cached_chunks_first_and_caches_fetched_chunks(self):
+
+        # GIVEN a cache that already has the second month
+        ecal.get('2018-02-01', '2018-02-28', fetcher=self.fetcher, cache=self.cache)
+        self.fetcher.fetched_dates = []
+
+        # WHEN two months are requested
+        chunks = ecal.iter_get('2018-01-01', '2018-02-28', chunk='month', fetcher=self.fetcher, cache=self.cache)
+
+        # THEN the cached month comes first, before anything is fetched
+        first_chunk = next(chunks)
+        self.assertEqual(first_chunk.index[0], '2018-02-01')
+        self.assertListEqual(self.fetcher.fetched_dates, [])
+
+        # AND the uncached month is fetched and cached
+        second_chunk = next(chunks)
+        self.assertEqual(second_chunk.index[0], '2018-01-01')
+        self.assertEqual(len(self.fetcher.fetched_dates), 31)
+        self.assertListEqual(self.cache.check_for_missing_dates(['2018-01-15']), [])
+
+    def test_iter_get_rejects_unknown_chunks(self):
+        with self.assertRaises(ValueError):
+            next(ecal.iter_get('2018-01-01', chunk='year', fetcher=self.fetcher, cache=self.cache))
+
+
 if __name__ == '__main__':
     unittest.main()
+
+
+class ScheduleMockFetcher(ecal.AbstractFetcher):
+    """Returns announcements from a fixed schedule of (date, ticker, when) and remembers the days asked for."""
+
+    SCHEDULE = [('2018-01-03', 'AAPL', 'amc'), ('2018-01-03', 'MSFT', 'bmo'), ('2018-01-10', 'AAPL', 'bmo'),
+                ('2018-01-20', 'IBM', '--'), ('2018-02-15', 'MSFT', 'amc')]
+
+    def __init__(self):
+        self.fetched_dates = []
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        if end_date_str is None:
+            end_date_str = start_date_str
+        self.fetched_dates.extend(pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d').tolist())
+        rows = [row for row in self.SCHEDULE if start_date_str <= row[0] <= end_date_str]
+        df = pd.DataFrame(rows, columns=['date', 'ticker', 'when'])
+        return df.set_index('date')
+
+
+class NextAndPreviousAnnouncementTests(object):
+    """Tests that run against every cache. Subclasses set up self.cache."""
+
+    def setUp(self):
+        self.fetcher = ScheduleMockFetcher()
+
+    def test_next_announcement(self):
+        actual_df = ecal.next_announcement(['IBM', 'AAPL', 'XYZ', 'MSFT'], as_of='2018-01-03', days=30,
+                                           fetcher=self.fetcher, cache=self.cache)
+
+        self.assertListEqual(actual_df.index.tolist(), ['IBM', 'AAPL', 'XYZ', 'MSFT'])
+        self.assertListEqual(actual_df.loc[['IBM', 'AAPL', 'MSFT'], 'date'].tolist(),
+                             ['2018-01-20', '2018-01-03', '2018-01-03'])
+        self.assertListEqual(actual_df.loc[['IBM', 'AAPL', 'MSFT'], 'when'].tolist(), ['--', 'amc', 'bmo'])
+        self.assertTrue(actual_df.loc['XYZ'].isnull().all())
+        self.assertEqual(self.fetcher.fetched_dates[0], '2018-01-03')
+        self.assertEqual(self.fetcher.fetched_dates[-1], '2018-02-01')
+
+    def test_previous_announcement_excludes_as_of(self):
+        actual_df = ecal.previous_announcement(['AAPL', 'MSFT'], as_of='2018-01-10', days=30, fetcher=self.fetcher,
+                                               cache=self.cache)
+
+        self.assertListEqual(actual_df['date'].tolist(), ['2018-01-03', '2018-01-03'])
+        self.assertEqual(self.fetcher.fetched_dates[-1], '2018-01-09')
+
+    def test_lookups_without_days_only_use_the_cache(self):
+        ecal.get('2018-01-01', '2018-02-28', fetcher=self.fetcher, cache=self.cache)
+        self.fetcher.fetched_dates = []
+
+        next_df = ecal.next_announcement('MSFT', as_of='2018-01-04', days=None, fetcher=self.fetcher,
+                                         cache=self.cache)
+        previous_df = ecal.previous_announcement(['AAPL', 'IBM'], as_of='2018-02-28', days=None,
+                                                 fetcher=self.fetcher, cache=self.cache)
+
+        self.assertEqual(next_df.loc['MSFT', 'date'], '2018-02-15')
+        self.assertListEqual(previous_df['date'].tolist(), ['2018-01-10', '2018-01-20'])
+        self.assertListEqual(self.fetcher.fetched_dates, [])
+
+
+class TestNextAndPreviousAnnouncementWithRuntimeCache(NextAndPreviousAnnouncementTests, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = ecal.RuntimeCache()
+
+
+class TestNextAndPreviousAnnouncementWithColumnarCache(NextAndPreviousAnnouncementTests, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = ecal.ColumnarCache()
+
+
+class TestNextAndPreviousAnnouncementWithSqliteCache(NextAndPreviousAnnouncementTests, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db_file = tempfile.NamedTemporaryFile()
+        self.cache = ecal.SqliteCache(self.db_file.name)
+
+    def tearDown(self):
+        self.db_file.close()
+
+
+class DataFrameCache(ecal.AbstractCache):
+    """A cache that only implements the required methods, to test the default lookups of AbstractCache."""
+
+    def __init__(self):
+        super().__init__()
+        self.runtime_cache = ecal.RuntimeCache()
+
+    def check_for_missing_dates(self, date_list):
+        return self.runtime_cache.check_for_missing_dates(date_list)
+
+    def add(self, missing_dates, uncached_announcements):
+        self.runtime_cache.add(missing_dates, uncached_announcements)
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        return self.runtime_cache.fetch_calendar(start_date_str, end_date_str)
+
+    def fetched_at(self, date_list):
+        return self.runtime_cache.fetched_at(date_list)
+
+
+class TestNextAndPreviousAnnouncementWithAbstractCache(NextAndPreviousAnnouncementTests, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = DataFrameCache()
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def run_python(self, code):
+        root_directory = os.path.dirname(os.path.dirname(os.path.abspath(ecal.__file__)))
+        result = subprocess.run([sys.executable, '-c', code], cwd=root_directory, check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True)
+        return result.stdout.split()
+
+    def test_import_doesnt_import_heavy_dependencies(self):
+        loaded = self.run_python('import sys, ecal; '
+                                 'print(*[m for m in ("pandas", "requests", "sqlite3") if m in sys.modules])')
+
+        self.assertEqual(loaded, [])
+
+    def test_classes_and_defaults_are_loaded_on_first_use(self):
+        output = self.run_python('import sys, ecal; '
+                                 'print("sqlite3" in sys.modules, ecal.SqliteCache.__name__, "sqlite3" in sys.modules, '
+                                 'type(ecal.default_cache).__name__, ecal.default_cache is ecal.default_cache)')
+
+        self.assertEqual(output, ['False', 'SqliteCache', 'True', 'RuntimeCache', 'True'])
+
+    def test_defaults_can_be_replaced(self):
+        original_cache = ecal.default_cache
+        try:
+            ecal.default_cache = ecal.RuntimeCache()
+            ecal.get('2018-01-04', fetcher=MockFetcher())
+
+            self.assertEqual(ecal.default_cache.check_for_missing_dates(['2018-01-04']), [])
+        finally:
+            ecal.default_cache = original_cache
@@ -0,0 +1,38 @@
+import unittest
+import datetime
+import ecal
+
+
+class TestFreshnessPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.today = datetime.date(2018, 1, 10)
+        self.now = 1000000.0
+
+    def test_future_dates_expire_and_past_dates_never_do(self):
+        policy = ecal.FreshnessPolicy(future_ttl=100)
+        fetched_at = {'2018-01-01': 0.0, '2018-01-10': self.now - 101, '2018-01-11': self.now - 99,
+                      '2018-02-01': self.now - 1000}
+
+        actual = policy.stale_dates(fetched_at, now=self.now, today=self.today)
+
+        self.assertListEqual(actual, ['2018-01-10', '2018-02-01'])
+
+    def test_past_ttl_and_recent_days(self):
+        policy = ecal.FreshnessPolicy(future_ttl=100, past_ttl=10000, recent_days=2)
+        fetched_at = {'2018-01-01': self.now - 10001, '2018-01-02': self.now - 9999, '2018-01-08': self.now - 101}
+
+        actual = policy.stale_dates(fetched_at, now=self.now, today=self.today)
+
+        self.assertListEqual(actual, ['2018-01-01', '2018-01-08'])
+
+    def test_unknown_fetch_times_are_stale(self):
+        policy = ecal.FreshnessPolicy(future_ttl=100)
+
+        actual = policy.stale_dates({'2018-01-01': None, '2018-01-11': None}, now=self.now, today=self.today)
+
+        self.assertListEqual(actual, ['2018-01-11'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import requests
+import ecal
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError('{} error'.format(self.status_code))
+
+
+class FakeSession(object):
+    """Stands in for requests.Session. Each call to get returns (or raises) the next outcome."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params, timeout))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, FakeResponse):
+            return outcome
+        return FakeResponse(outcome)
+
+
+class CountingRateLimiter(ecal.AbstractRateLimiter):
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+        self.throttles = []
+        self.successes = 0
+
+    def reserve(self):
+        self.count += 1
+        return 0
+
+    def throttled(self, retry_after=None):
+        self.throttles.append(retry_after)
+
+    def succeeded(self):
+        self.successes += 1
+
+
+class TestHttpTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = ecal.HttpTransport(connect_timeout=1, read_timeout=2, max_retries=2, backoff_factor=0)
+
+    def test_get_passes_params_and_timeouts(self):
+        self.transport._session = FakeSession([200])
+
+        r = self.transport.get('http://example.com/', params={'date': '20180104'})
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(self.transport._session.calls, [('http://example.com/', {'date': '20180104'}, (1, 2))])
+
+    def test_get_retries_server_errors_and_connection_errors(self):
+        self.transport._session = FakeSession([503, requests.ConnectionError(), 200])
+        rate_limiter = CountingRateLimiter()
+
+        r = self.transport.get('http://example.com/', rate_limiter=rate_limiter)
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(self.transport._session.calls), 3)
+
+        # Only the retries wait for the rate limiter
+        self.assertEqual(rate_limiter.count, 2)
+
+    def test_get_does_not_retry_client_errors(self):
+        self.transport._session = FakeSession([404, 200])
+
+        r = self.transport.get('http://example.com/')
+
+        self.assertEqual(r.status_code, 404)
+        self.assertEqual(len(self.transport._session.calls), 1)
+
+    def test_get_raises_when_retries_are_used_up(self):
+        self.transport._session = FakeSession([500, 500, 500])
+        with self.assertRaises(requests.HTTPError):
+            self.transport.get('http://example.com/')
+
+        self.transport._session = FakeSession([requests.Timeout()] * 3)
+        with self.assertRaises(requests.Timeout):
+            self.transport.get('http://example.com/')
+
+    def test_get_reports_throttling_and_success_to_the_rate_limiter(self):
+        self.transport._session = FakeSession([FakeResponse(429, {'Retry-After': '2'}), FakeResponse(429), 200])
+        rate_limiter = CountingRateLimiter()
+
+        r = self.transport.get('http://example.com/', rate_limiter=rate_limiter)
+
+        self.assertEqual(r.status_code, 200)
+        self.assertListEqual(rate_limiter.throttles, [2.0, None])
+        self.assertEqual(rate_limiter.successes, 1)
+
+    def test_parse_retry_after(self):
+        from ecal.http_transport import _parse_retry_after
+
+        self.assertIsNone(_parse_retry_after(None))
+        self.assertIsNone(_parse_retry_after('soon'))
+        self.assertEqual(_parse_retry_after('3'), 3.0)
+        self.assertEqual(_parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+    def test_backoff_is_jittered_and_capped(self):
+        transport = ecal.HttpTransport(backoff_factor=1, max_backoff=5)
+        for attempt in range(10):
+            backoff = transport._backoff(attempt)
+            self.assertGreaterEqual(backoff, 0)
+            self.assertLessEqual(backoff, min(5, 2 ** attempt))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import ecal
+import pandas as pd
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_disabled_metrics_record_nothing(self):
+        metrics = ecal.Metrics()
+        calls = []
+        metrics.add_callback(lambda name, labels, value: calls.append(name))
+
+        metrics.increment('hits_total')
+        metrics.observe('read_seconds', 0.1)
+        with metrics.timer('write_seconds'):
+            pass
+
+        self.assertEqual(metrics.snapshot(), {'counters': {}, 'histograms': {}})
+        self.assertEqual(metrics.to_prometheus(), '')
+        self.assertEqual(calls, [])
+
+    def test_counters_add_up_per_label(self):
+        metrics = ecal.Metrics(enabled=True)
+
+        metrics.increment('hits_total', 2, cache='RuntimeCache')
+        metrics.increment('hits_total', 3, cache='RuntimeCache')
+        metrics.increment('hits_total', cache='SqliteCache')
+
+        counters = metrics.snapshot()['counters']
+        self.assertEqual(counters[('hits_total', (('cache', 'RuntimeCache'),))], 5)
+        self.assertEqual(counters[('hits_total', (('cache', 'SqliteCache'),))], 1)
+
+    def test_histograms_count_observations_into_cumulative_buckets(self):
+        metrics = ecal.Metrics(enabled=True, buckets=(0.1, 1.0))
+
+        metrics.observe('read_seconds', 0.05)
+        metrics.observe('read_seconds', 0.1)
+        metrics.observe('read_seconds', 0.5)
+        metrics.observe('read_seconds', 2.0)
+
+        histogram = metrics.snapshot()['histograms'][('read_seconds', ())]
+        self.assertEqual(histogram['count'], 4)
+        self.assertAlmostEqual(histogram['sum'], 2.65)
+        self.assertEqual(histogram['buckets'], [(0.1, 2), (1.0, 3), (float('inf'), 4)])
+
+    def test_timer_observes_the_time_spent_inside_it(self):
+        metrics = ecal.Metrics(enabled=True)
+
+        with metrics.timer('write_seconds', cache='RuntimeCache'):
+            pass
+
+        histogram = metrics.snapshot()['histograms'][('write_seconds', (('cache', 'RuntimeCache'),))]
+        self.assertEqual(histogram['count'], 1)
+        self.assertGreaterEqual(histogram['sum'], 0)
+
+    def test_callbacks_are_called_for_every_metric_until_removed(self):
+        metrics = ecal.Metrics(enabled=True)
+        calls = []
+
+        def callback(name, labels, value):
+            calls.append((name, labels, value))
+
+        metrics.add_callback(callback)
+        metrics.increment('hits_total', 2, cache='RuntimeCache')
+        metrics.observe('read_seconds', 0.5)
+        metrics.remove_callback(callback)
+        metrics.increment('hits_total')
+
+        self.assertEqual(calls, [('hits_total', {'cache': 'RuntimeCache'}, 2), ('read_seconds', {}, 0.5)])
+
+    def test_prometheus_text_format(self):
+        metrics = ecal.Metrics(enabled=True, buckets=(0.5,))
+        metrics.increment('ecal_cache_hits_total', 3)
+        metrics.observe('ecal_cache_read_seconds', 0.25, cache='RuntimeCache')
+
+        expected = ('# TYPE ecal_cache_hits_total counter\n'
+                    'ecal_cache_hits_total 3\n'
+                    '# TYPE ecal_cache_read_seconds histogram\n'
+                    'ecal_cache_read_seconds_bucket{cache="RuntimeCache",le="0.5"} 1\n'
+                    'ecal_cache_read_seconds_bucket{cache="RuntimeCache",le="+Inf"} 1\n'
+                    'ecal_cache_read_seconds_sum{cache="RuntimeCache"} 0.25\n'
+                    'ecal_cache_read_seconds_count{cache="RuntimeCache"} 1\n')
+        self.assertEqual(metrics.to_prometheus(), expected)
+
+    def test_reset_forgets_the_metrics(self):
+        metrics = ecal.Metrics(enabled=True)
+        metrics.increment('hits_total')
+
+        metrics.reset()
+
+        self.assertEqual(metrics.snapshot(), {'counters': {}, 'histograms': {}})
+
+
+class OneRowMockFetcher(ecal.AbstractFetcher):
+
+    def __init__(self):
+        pass
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        return pd.DataFrame({'ticker': ['AAPL'], 'when': ['amc']}, index=pd.Index([start_date_str], name='date'))
+
+
+class TestGetMetrics(unittest.TestCase):
+
+    def setUp(self):
+        ecal.metrics.reset()
+        ecal.metrics.enable()
+
+    def tearDown(self):
+        ecal.metrics.disable()
+        ecal.metrics.reset()
+
+    def test_get_records_hits_misses_and_timings(self):
+        cache = ecal.RuntimeCache()
+        fetcher = OneRowMockFetcher()
+
+        ecal.get('2018-01-01', '2018-01-03', fetcher=fetcher, cache=cache)
+        ecal.get('2018-01-02', '2018-01-04', fetcher=fetcher, cache=cache)
+
+        snapshot = ecal.metrics.snapshot()
+        counters = snapshot['counters']
+        histograms = snapshot['histograms']
+        self.assertEqual(counters[('ecal_cache_hits_total', ())], 2)
+        self.assertEqual(counters[('ecal_cache_misses_total', ())], 4)
+        self.assertEqual(histograms[('ecal_get_seconds', ())]['count'], 2)
+        # The missing dates are fetched a span at a time
+        self.assertEqual(histograms[('ecal_fetch_seconds', (('fetcher', 'OneRowMockFetcher'),))]['count'], 2)
+        self.assertEqual(histograms[('ecal_cache_write_seconds',
+                                     (('cache', 'RuntimeCache'), ('operation', 'add')))]['count'], 2)
+        self.assertEqual(histograms[('ecal_cache_read_seconds',
+                                     (('cache', 'RuntimeCache'), ('operation', 'fetch_calendar')))]['count'], 2)
+
+    def test_rate_limiter_records_sleep_time(self):
+        rate_limiter = ecal.RateLimiter(0.01)
+
+        rate_limiter.acquire()
+        rate_limiter.acquire()
+
+        histogram = ecal.metrics.snapshot()['histograms'][('ecal_rate_limit_sleep_seconds', ())]
+        self.assertEqual(histogram['count'], 2)
+        self.assertGreater(histogram['sum'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import datetime
+import threading
+import ecal
+import pandas as pd
+
+
+class CountingFetcher(ecal.AbstractFetcher):
+    """Returns no announcements and sets an event whenever it's called."""
+
+    def __init__(self):
+        self.fetched_dates = []
+        self.called = threading.Event()
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        if end_date_str is None:
+            end_date_str = start_date_str
+        self.fetched_dates.extend(pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d').tolist())
+        self.called.set()
+        return pd.DataFrame(columns=['date', 'ticker', 'when']).set_index('date')
+
+
+class TestPrefetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.fetcher = CountingFetcher()
+        self.cache = ecal.RuntimeCache()
+        self.prefetcher = ecal.Prefetcher(self.fetcher, self.cache, days_back=2, days_ahead=3, interval=60)
+
+    def test_window_is_centered_on_today(self):
+        actual = self.prefetcher.window(datetime.date(2018, 1, 4))
+        self.assertEqual(actual, ('2018-01-02', '2018-01-07'))
+
+    def test_warm_fills_the_window(self):
+        self.prefetcher.warm()
+
+        start_date_str, end_date_str = self.prefetcher.window()
+        date_list = pd.date_range(start_date_str, end_date_str).strftime('%Y-%m-%d').tolist()
+        self.assertEqual(len(self.fetcher.fetched_dates), 6)
+        self.assertListEqual(self.cache.check_for_missing_dates(date_list), [])
+
+        # A second pass has nothing left to fetch
+        self.prefetcher.warm()
+        self.assertEqual(len(self.fetcher.fetched_dates), 6)
+
+    def test_start_warms_in_the_background_until_stopped(self):
+        with self.prefetcher:
+            self.assertTrue(self.fetcher.called.wait(5))
+            self.assertTrue(self.prefetcher.is_running())
+
+        self.assertFalse(self.prefetcher.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import ecal
+
+
+def _reserve_slots(path, interval, count, queue):
+    limiter = ecal.FileRateLimiter(path, interval)
+    for _ in range(count):
+        limiter.acquire()
+        queue.put(time.time())
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_first_call_does_not_wait(self):
+        limiter = ecal.RateLimiter(interval=10)
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_reserve_only_waits_for_the_time_still_needed(self):
+
+        # GIVEN a limiter that was used a moment ago
+        limiter = ecal.RateLimiter(interval=0.2)
+        limiter.reserve()
+        time.sleep(0.15)
+
+        # WHEN the next slot is reserved
+        delay = limiter.reserve()
+
+        # THEN it only waits for the rest of the interval
+        self.assertGreater(delay, 0)
+        self.assertLess(delay, 0.1)
+
+    def test_throttling_backs_off_and_success_ramps_back(self):
+        limiter = ecal.RateLimiter(interval=1.0, backoff=2.0, recovery=0.5, recovery_calls=2)
+
+        limiter.throttled()
+        limiter.throttled()
+        self.assertEqual(limiter.interval, 4.0)
+
+        limiter.succeeded()
+        self.assertEqual(limiter.interval, 4.0)
+        limiter.succeeded()
+        self.assertEqual(limiter.interval, 2.0)
+        limiter.succeeded()
+        limiter.succeeded()
+        self.assertEqual(limiter.interval, 1.0)
+
+        # It never goes faster than the interval it was created with
+        limiter.succeeded()
+        limiter.succeeded()
+        self.assertEqual(limiter.interval, 1.0)
+
+    def test_retry_after_pushes_the_next_slot_back(self):
+        limiter = ecal.RateLimiter(interval=0.01)
+        limiter.throttled(retry_after=5)
+        self.assertGreater(limiter.reserve(), 4)
+
+    def test_threads_sharing_a_limiter_are_spaced_out(self):
+        limiter = ecal.RateLimiter(interval=0.05)
+        call_times = []
+        lock = threading.Lock()
+
+        def call():
+            limiter.acquire()
+            with lock:
+                call_times.append(time.monotonic())
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Five calls need four intervals
+        self.assertGreaterEqual(max(call_times) - min(call_times), 4 * 0.05 - 0.03)
+
+
+class TestFileRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'rate.lock')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_instances_sharing_a_file_share_the_rate_limit(self):
+
+        # GIVEN two limiters using the same file
+        limiter1 = ecal.FileRateLimiter(self.path, interval=10)
+        limiter2 = ecal.FileRateLimiter(self.path, interval=10)
+
+        # WHEN each reserves a slot
+        delay1 = limiter1.reserve()
+        delay2 = limiter2.reserve()
+
+        # THEN the second has to wait for the first
+        self.assertEqual(delay1, 0)
+        self.assertGreater(delay2, 9)
+
+    def test_instances_sharing_a_file_share_the_interval(self):
+        limiter1 = ecal.FileRateLimiter(self.path, interval=1.0, backoff=3.0)
+        limiter2 = ecal.FileRateLimiter(self.path, interval=1.0, backoff=3.0)
+
+        limiter1.throttled(retry_after=0)
+
+        self.assertEqual(limiter2.interval, 3.0)
+
+    def test_processes_sharing_a_file_are_spaced_out(self):
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_reserve_slots, args=(self.path, 0.05, 3, queue))
+                     for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        # Nine calls need eight intervals, no matter which process made them
+        call_times = [queue.get() for _ in range(9)]
+        self.assertGreaterEqual(max(call_times) - min(call_times), 8 * 0.05 - 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
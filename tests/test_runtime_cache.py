@@ -8,6 +8,8 @@ class MockRuntimeCache(ecal.RuntimeCache):
     """
 
     def __init__(self):
+        super().__init__()
+
         # Seed the cache with some data
         sample_dict = {'ticker': ['CMC', 'LNDC', 'NEOG', 'RAD', 'RECN', 'UNF'],
                          'when': ['bmo', 'amc', 'bmo', 'amc', 'amc', 'bmo'],
@@ -73,6 +75,103 @@ class TestRuntimeCache(unittest.TestCase):
         assert(actual_df['ticker'].equals(expected_df['ticker']))
         assert(actual_df['when'].equals(expected_df['when']))
 
+    def test_add_replaces_the_announcements_of_cached_dates(self):
+        refreshed = pd.DataFrame({'ticker': ['CMC', 'AAPL'], 'when': ['amc', 'amc'],
+                                  'date': ['2018-01-04', '2018-01-04']}).set_index('date')
+
+        self.cache.add(['2018-01-04'], refreshed)
+
+        actual_df = self.cache.fetch_calendar('2018-01-04')
+        self.assertListEqual(actual_df['ticker'].tolist(), ['CMC', 'AAPL'])
+        self.assertListEqual(actual_df['when'].tolist(), ['amc', 'amc'])
+
+    def test_fetched_at(self):
+        self.cache.add(['2018-01-05'], None)
+
+        actual = self.cache.fetched_at(['2018-01-03', '2018-01-04', '2018-01-05'])
+
+        # The seeded date has no fetch time and the missing date is left out
+        self.assertListEqual(sorted(actual), ['2018-01-04', '2018-01-05'])
+        self.assertIsNone(actual['2018-01-04'])
+        self.assertIsNotNone(actual['2018-01-05'])
+
 
 if __name__ == '__main__':
     unittest.main()
+
+
+class TestCompactRuntimeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ecal.RuntimeCache(compact=True)
+        self.cal_df = pd.DataFrame({'date': ['2018-01-04', '2018-01-04', '2018-01-05'],
+                                    'ticker': ['CMC', 'LNDC', 'CMC'],
+                                    'when': ['bmo', 'amc', '--']}).set_index('date')[['ticker', 'when']]
+        self.cache.add(['2018-01-04', '2018-01-05'], self.cal_df)
+
+    def test_fetch_calendar_returns_compact_frames(self):
+        actual = self.cache.fetch_calendar('2018-01-05')
+
+        self.assertIsInstance(actual.index, pd.DatetimeIndex)
+        self.assertIsInstance(actual['ticker'].dtype, pd.CategoricalDtype)
+        self.assertListEqual(actual['ticker'].tolist(), ['CMC'])
+
+    def test_add_keeps_columns_categorical_and_replaces_dates(self):
+        refreshed_df = pd.DataFrame({'date': ['2018-01-05'], 'ticker': ['NEWTICKER'],
+                                     'when': ['amc']}).set_index('date')[['ticker', 'when']]
+
+        self.cache.add(['2018-01-05'], refreshed_df)
+
+        actual = self.cache.fetch_calendar('2018-01-04', '2018-01-05')
+        self.assertIsInstance(actual['ticker'].dtype, pd.CategoricalDtype)
+        self.assertListEqual(actual['ticker'].tolist(), ['CMC', 'LNDC', 'NEWTICKER'])
+
+    def test_next_and_previous_announcements(self):
+        next_df = self.cache.next_announcements(['CMC'], '2018-01-05')
+        previous_df = self.cache.previous_announcements(['LNDC'], '2018-01-05')
+
+        self.assertEqual(next_df.loc['CMC', 'date'], '2018-01-05')
+        self.assertEqual(previous_df.loc['LNDC', 'date'], '2018-01-04')
+
+
+def _day_df(date_str, tickers):
+    return pd.DataFrame({'ticker': tickers, 'when': ['amc'] * len(tickers)},
+                        index=pd.Index([date_str] * len(tickers), name='date'), columns=['ticker', 'when'])
+
+
+class TestRuntimeCacheChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ecal.RuntimeCache()
+        self.cache.add(['2018-01-01', '2018-01-02'], pd.concat([_day_df('2018-01-01', ['A', 'B', 'C']),
+                                                                _day_df('2018-01-02', ['D', 'E', 'F'])]))
+
+    def test_small_adds_are_kept_as_chunks_until_they_are_merged(self):
+        self.cache.add(['2018-01-10'], _day_df('2018-01-10', ['G']))
+        self.cache.add(['2018-01-05'], _day_df('2018-01-05', ['H']))
+
+        self.assertEqual(len(self.cache._chunks), 2)
+        self.assertListEqual(self.cache.fetch_calendar('2018-01-02', '2018-01-10')['ticker'].tolist(),
+                             ['D', 'E', 'F', 'H', 'G'])
+
+        # Reading _cache_df merges the chunks
+        self.assertTrue(self.cache._cache_df.index.is_monotonic_increasing)
+        self.assertEqual(self.cache._chunks, [])
+
+    def test_chunks_are_merged_after_max_pending_chunks(self):
+        self.cache.add(['2018-01-31'], _day_df('2018-01-31', ['T{}'.format(i) for i in range(100)]))
+
+        for day in range(3, 3 + ecal.RuntimeCache.MAX_PENDING_CHUNKS + 1):
+            date_str = '2018-02-{:02d}'.format(day)
+            self.cache.add([date_str], _day_df(date_str, ['X']))
+
+        self.assertEqual(self.cache._chunks, [])
+        self.assertEqual(len(self.cache.fetch_calendar('2018-01-01', '2018-02-28')), 6 + 100 + 17)
+
+    def test_refreshing_a_date_in_a_pending_chunk_replaces_it(self):
+        self.cache.add(['2018-01-05'], _day_df('2018-01-05', ['H']))
+        self.cache.add(['2018-01-05', '2018-01-01'], pd.concat([_day_df('2018-01-05', ['I']),
+                                                               _day_df('2018-01-01', ['J'])]))
+
+        self.assertListEqual(self.cache.fetch_calendar('2018-01-01', '2018-01-31')['ticker'].tolist(),
+                             ['J', 'D', 'E', 'F', 'I'])
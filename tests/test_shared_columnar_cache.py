@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import pickle
+import tempfile
+import unittest
+import ecal
+import numpy as np
+import pandas as pd
+
+
+class LoggingFetcher(ecal.AbstractFetcher):
+    """Returns two announcements a day and appends every date it fetches to a log file"""
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+
+    def fetch_calendar(self, start_date_str, end_date_str=None):
+        date_strs = pd.date_range(start_date_str, end_date_str or start_date_str).strftime('%Y-%m-%d').tolist()
+        with open(self.log_path, 'a') as f:
+            f.write(''.join(date_str + '\n' for date_str in date_strs))
+        return pd.DataFrame({'ticker': ['AAPL', 'MSFT'] * len(date_strs), 'when': ['amc', 'bmo'] * len(date_strs)},
+                            index=pd.Index([d for d in date_strs for _ in range(2)], name='date'),
+                            columns=['ticker', 'when'])
+
+
+def _populate_and_read(args):
+    directory, log_path = args
+    cache = ecal.SharedColumnarCache(directory)
+    cache.populate('2018-01-01', '2018-01-31', fetcher=LoggingFetcher(log_path))
+    return len(cache.fetch_calendar('2018-01-01', '2018-01-31'))
+
+
+class TestSharedColumnarCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'cache')
+        self.log_path = os.path.join(self.temp_dir.name, 'fetched.log')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fetched_dates(self):
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path) as f:
+            return f.read().split()
+
+    def test_other_instances_see_added_dates_without_copying_them(self):
+        writer = ecal.SharedColumnarCache(self.directory)
+        reader = ecal.SharedColumnarCache(self.directory)
+
+        ecal.get('2018-01-01', '2018-01-05', fetcher=LoggingFetcher(self.log_path), cache=writer)
+
+        self.assertEqual(reader.check_for_missing_dates(['2018-01-01', '2018-01-05', '2018-01-06']), ['2018-01-06'])
+        self.assertTrue(reader.fetch_calendar('2018-01-01', '2018-01-05').equals(
+            writer.fetch_calendar('2018-01-01', '2018-01-05')))
+        self.assertIsInstance(reader._days, np.memmap)
+        self.assertEqual(set(reader.fetched_at(['2018-01-01'])), {'2018-01-01'})
+
+    def test_writers_start_from_the_newest_generation(self):
+        first = ecal.SharedColumnarCache(self.directory)
+        second = ecal.SharedColumnarCache(self.directory)
+        fetcher = LoggingFetcher(self.log_path)
+
+        first.add(['2018-01-01'], fetcher.fetch_calendar('2018-01-01'))
+        second.add(['2018-01-02'], fetcher.fetch_calendar('2018-01-02'))
+        first.add(['2018-01-01'], fetcher.fetch_calendar('2018-01-01').iloc[:1])
+
+        reopened = ecal.SharedColumnarCache(self.directory)
+        self.assertListEqual(reopened.fetch_calendar('2018-01-01', '2018-01-02')['ticker'].tolist(),
+                             ['AAPL', 'AAPL', 'MSFT'])
+        self.assertLessEqual(len([name for name in os.listdir(self.directory) if name.startswith('generation-')]), 2)
+
+    def test_next_and_previous_announcements(self):
+        cache = ecal.SharedColumnarCache(self.directory)
+        cache.populate('2018-01-01', '2018-01-03', fetcher=LoggingFetcher(self.log_path))
+
+        reader = ecal.SharedColumnarCache(self.directory)
+        self.assertEqual(reader.next_announcements(['MSFT'], '2018-01-02').loc['MSFT', 'date'], '2018-01-02')
+        self.assertEqual(reader.previous_announcements(['AAPL'], '2018-01-02').loc['AAPL', 'date'], '2018-01-02')
+
+    def test_pickled_cache_opens_the_same_directory(self):
+        cache = ecal.SharedColumnarCache(self.directory)
+        cache.populate('2018-01-01', fetcher=LoggingFetcher(self.log_path))
+
+        copy = pickle.loads(pickle.dumps(cache))
+
+        self.assertEqual(len(copy.fetch_calendar('2018-01-01')), 2)
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), 'needs fork')
+    def test_a_pool_of_workers_fetches_each_date_once(self):
+        with multiprocessing.get_context('fork').Pool(4) as pool:
+            row_counts = pool.map(_populate_and_read, [(self.directory, self.log_path)] * 8)
+
+        self.assertEqual(row_counts, [62] * 8)
+        fetched_dates = self.fetched_dates()
+        self.assertEqual(len(fetched_dates), 31)
+        self.assertEqual(len(set(fetched_dates)), 31)
+
+
+if __name__ == '__main__':
+    unittest.main()
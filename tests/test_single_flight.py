@@ -0,0 +1,32 @@
+import unittest
+import ecal.single_flight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.single_flight = ecal.single_flight.SingleFlight()
+
+    def test_claim_gives_each_key_to_one_caller(self):
+        claimed1, in_flight1 = self.single_flight.claim(['a', 'b'])
+        claimed2, in_flight2 = self.single_flight.claim(['b', 'c'])
+
+        self.assertListEqual(claimed1, ['a', 'b'])
+        self.assertListEqual(in_flight1, [])
+        self.assertListEqual(claimed2, ['c'])
+        self.assertEqual(len(in_flight2), 1)
+
+    def test_release_wakes_up_waiters_and_frees_the_key(self):
+        claimed, _ = self.single_flight.claim(['a'])
+        _, in_flight = self.single_flight.claim(['a'])
+        self.assertFalse(in_flight[0].is_set())
+
+        self.single_flight.release(claimed)
+
+        self.assertTrue(in_flight[0].is_set())
+        claimed, _ = self.single_flight.claim(['a'])
+        self.assertListEqual(claimed, ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,6 @@
+import multiprocessing
+import sqlite3
+import threading
 import unittest
 import tempfile
 import ecal
@@ -5,6 +8,12 @@ import pandas as pd
 from pandas.util.testing import assert_frame_equal
 
 
+def _add_dates_in_child(db_file_path, dates):
+    cache = ecal.SqliteCache(db_file_path)
+    for date in dates:
+        cache.add([date], pd.DataFrame({'ticker': [date[-2:]], 'when': ['amc']}, index=pd.Index([date], name='date')))
+
+
 class TestSqliteCache(unittest.TestCase):
 
     def test_cached_dates_table_created(self):
@@ -41,6 +50,18 @@ class TestSqliteCache(unittest.TestCase):
 
         f.close()
 
+    def test_ticker_date_index_created(self):
+        f = tempfile.NamedTemporaryFile()
+        cache = ecal.SqliteCache(f.name)
+
+        cursor = cache._conn.cursor()
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type='index' AND name='announcements_ticker_date';")
+        rows = cursor.fetchall()
+
+        self.assertEqual(len(rows), 1)
+        self.assertIn('(ticker, date)', rows[0][0])
+        f.close()
+
     def test_create_string_of_rows_for_VALUES_clause(self):
 
         # Given a SqliteCache and list of date strings
@@ -164,3 +185,200 @@ class TestSqliteCache(unittest.TestCase):
 
         # Then we get a dataframe containing it.
         assert_frame_equal(actual, uncached_announcements_df)
+
+    def test_add_replaces_the_announcements_of_cached_dates(self):
+
+        # Given an SqliteCache with a cached date
+        f = tempfile.NamedTemporaryFile()
+        cache = ecal.SqliteCache(f.name)
+        announcements_df = pd.DataFrame({'ticker': ['AEHR', 'ANGO'], 'when': ['amc', 'bmo'],
+                                         'date': ['2018-01-05', '2018-01-05']}).set_index('date')
+        cache.add(['2018-01-05'], announcements_df)
+
+        # When the date is added again with different announcements
+        refreshed_df = pd.DataFrame({'ticker': ['AEHR', 'FC'], 'when': ['bmo', 'amc'],
+                                     'date': ['2018-01-05', '2018-01-05']}).set_index('date')
+        cache.add(['2018-01-05'], refreshed_df)
+
+        # Then only the new announcements are in the cache
+        actual = cache.fetch_calendar('2018-01-05')
+        assert_frame_equal(actual, refreshed_df)
+
+        f.close()
+
+    def test_fetched_at(self):
+
+        # Given an SqliteCache with a date cached before fetch times were recorded and one cached after
+        f = tempfile.NamedTemporaryFile()
+        cache = ecal.SqliteCache(f.name)
+        cursor = cache._conn.cursor()
+        cursor.execute("insert into cached_dates values('2018-01-03')")
+        cache.add(['2018-01-04'], None)
+
+        # When we ask when dates were fetched
+        actual = cache.fetched_at(['2018-01-03', '2018-01-04', '2018-01-05'])
+
+        # Then the cached dates are returned with their fetch times
+        self.assertListEqual(sorted(actual), ['2018-01-03', '2018-01-04'])
+        self.assertIsNone(actual['2018-01-03'])
+        self.assertIsNotNone(actual['2018-01-04'])
+
+        f.close()
+
+
+class TestSqliteCacheConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        self.f = tempfile.NamedTemporaryFile()
+        self.cache = ecal.SqliteCache(self.f.name)
+
+    def tearDown(self):
+        self.cache.close()
+        self.f.close()
+
+    def _announcements(self, date, tickers):
+        index = pd.Index([date] * len(tickers), name='date')
+        return pd.DataFrame({'ticker': tickers, 'when': ['amc'] * len(tickers)}, index=index)
+
+    def test_wal_journal_mode_and_pragmas(self):
+
+        # Given an SqliteCache with some tuned pragmas
+        cache = ecal.SqliteCache(self.f.name, synchronous='OFF', cache_size=-2000, mmap_size=0)
+
+        # Then the database is in WAL mode and the pragmas are set on the connection
+        conn = cache._conn
+        self.assertEqual(conn.execute('PRAGMA journal_mode;').fetchone()[0], 'wal')
+        self.assertEqual(conn.execute('PRAGMA synchronous;').fetchone()[0], 0)
+        self.assertEqual(conn.execute('PRAGMA cache_size;').fetchone()[0], -2000)
+        self.assertEqual(conn.execute('PRAGMA mmap_size;').fetchone()[0], 0)
+        cache.close()
+
+    def test_each_thread_has_its_own_connection(self):
+
+        # When two threads use the cache
+        connections = []
+        thread = threading.Thread(target=lambda: connections.append(self.cache._conn))
+        thread.start()
+        thread.join()
+        connections.append(self.cache._conn)
+
+        # Then they use different connections, and the same one each time
+        self.assertIsNot(connections[0], connections[1])
+        self.assertIs(self.cache._conn, connections[1])
+
+    def test_connections_of_finished_threads_are_closed(self):
+
+        # Given a thread that used the cache and has finished
+        connections = []
+        thread = threading.Thread(target=lambda: connections.append(self.cache._conn))
+        thread.start()
+        thread.join()
+
+        # When another thread opens a connection
+        thread = threading.Thread(target=lambda: self.cache.fetch_calendar('2018-01-01'))
+        thread.start()
+        thread.join()
+
+        # Then the finished thread's connection was closed
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connections[0].execute('SELECT 1;')
+
+    def test_threads_add_at_the_same_time(self):
+
+        # When several threads add dates at the same time
+        def add_dates(first_day):
+            for day in range(first_day, 28, 4):
+                date = '2018-01-{:02d}'.format(day)
+                self.cache.add([date], self._announcements(date, ['T{}'.format(day)]))
+
+        threads = [threading.Thread(target=add_dates, args=(first_day,)) for first_day in range(1, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Then every date and announcement was added
+        dates = ['2018-01-{:02d}'.format(day) for day in range(1, 28)]
+        self.assertListEqual(self.cache.check_for_missing_dates(dates), [])
+        self.assertEqual(len(self.cache.fetch_calendar('2018-01-01', '2018-01-27')), 27)
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), 'needs fork')
+    def test_forked_process_opens_its_own_connection(self):
+
+        # Given a cache that the parent has used
+        parent_conn = self.cache._conn
+        self.cache.add(['2018-01-01'], self._announcements('2018-01-01', ['AAPL']))
+
+        # When a forked child adds dates through the cache it inherited
+        context = multiprocessing.get_context('fork')
+        child = context.Process(target=lambda: self.cache.add(['2018-01-02'],
+                                                              self._announcements('2018-01-02', ['MSFT'])))
+        child.start()
+        child.join()
+
+        # Then the child's dates are in the database and the parent's connection still works
+        self.assertEqual(child.exitcode, 0)
+        self.assertIs(self.cache._conn, parent_conn)
+        self.assertListEqual(self.cache.check_for_missing_dates(['2018-01-01', '2018-01-02']), [])
+        self.assertListEqual(self.cache.fetch_calendar('2018-01-01', '2018-01-02')['ticker'].tolist(),
+                             ['AAPL', 'MSFT'])
+
+    def test_processes_add_at_the_same_time(self):
+
+        # When several processes add dates to the same database at the same time
+        context = multiprocessing.get_context('spawn')
+        children = [context.Process(target=_add_dates_in_child,
+                                    args=(self.f.name, ['2018-01-{:02d}'.format(day)
+                                                        for day in range(first_day, 28, 3)]))
+                    for first_day in range(1, 4)]
+        for child in children:
+            child.start()
+        for child in children:
+            child.join()
+
+        # Then every date was added
+        self.assertListEqual([child.exitcode for child in children], [0, 0, 0])
+        dates = ['2018-01-{:02d}'.format(day) for day in range(1, 28)]
+        self.assertListEqual(self.cache.check_for_missing_dates(dates), [])
+        self.assertEqual(len(self.cache.fetch_calendar('2018-01-01', '2018-01-27')), 27)
+
+    def test_add_is_retried_while_the_database_is_locked(self):
+
+        # Given a cache that gives up waiting for the write lock straight away
+        cache = ecal.SqliteCache(self.f.name, busy_timeout=0.01, max_retries=20, retry_backoff=0.01)
+        ecal.metrics.reset()
+        ecal.metrics.enable()
+
+        # And another connection that holds the write lock for a moment
+        other = sqlite3.connect(self.f.name)
+        other.execute('BEGIN IMMEDIATE;')
+        timer = threading.Timer(0.1, other.commit)
+        timer.start()
+
+        # When a date is added
+        cache.add(['2018-01-01'], self._announcements('2018-01-01', ['AAPL']))
+        timer.join()
+        other.close()
+        counters = ecal.metrics.snapshot()['counters']
+        ecal.metrics.disable()
+        ecal.metrics.reset()
+
+        # Then the add was retried until the lock was released
+        self.assertListEqual(cache.check_for_missing_dates(['2018-01-01']), [])
+        self.assertGreater(counters[('ecal_sqlite_busy_retries_total', ())], 0)
+        cache.close()
+
+    def test_in_memory_database_is_shared_by_threads(self):
+
+        # Given an in-memory cache
+        cache = ecal.SqliteCache(':memory:')
+
+        # When a thread adds a date
+        thread = threading.Thread(target=lambda: cache.add(['2018-01-01'],
+                                                           self._announcements('2018-01-01', ['AAPL'])))
+        thread.start()
+        thread.join()
+
+        # Then other threads see it
+        self.assertListEqual(cache.check_for_missing_dates(['2018-01-01']), [])
+        cache.close()
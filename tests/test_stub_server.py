@@ -0,0 +1,93 @@
+import unittest
+import time
+import ecal
+import requests
+from ecal.stub_server import StubECNServer
+
+
+class TestStubECNServer(unittest.TestCase):
+    """
+    This class tests the fetchers against a local StubECNServer instead of the real API
+    """
+
+    RECORDED = {
+        '2017-03-30': [{'ticker': 'AEHR', 'when': 'amc', 'cap_mm': 50},
+                       {'ticker': 'ANGO', 'when': 'bmo', 'cap_mm': 700},
+                       {'ticker': 'BSET', 'when': '--', 'cap_mm': 200}]
+    }
+
+    def test_serves_recorded_announcements(self):
+        with StubECNServer(self.RECORDED) as server:
+            fetcher = ecal.ECNFetcher(rate_limit=0, url=server.url)
+
+            actual = fetcher._earnings_announcements_for_date('2017-03-30')
+
+        self.assertListEqual(actual, [{'ticker': 'AEHR', 'when': 'amc'}, {'ticker': 'ANGO', 'when': 'bmo'},
+                                      {'ticker': 'BSET', 'when': '--'}])
+
+    def test_synthetic_announcements_are_repeatable_and_skip_weekends(self):
+        server1 = StubECNServer(seed=1)
+        server2 = StubECNServer(seed=1)
+
+        self.assertEqual(server1.announcements_for_date('2018-01-04'), server2.announcements_for_date('2018-01-04'))
+        self.assertListEqual(server1.announcements_for_date('2018-01-06'), [])
+
+        server1.stop()
+        server2.stop()
+
+    def test_async_fetcher_fetches_a_range(self):
+        with StubECNServer(seed=1, latency=0.05) as server:
+            fetcher = ecal.AsyncECNFetcher(rate_limit=0.01, url=server.url)
+
+            actual_df = fetcher.fetch_calendar('2018-01-01', '2018-01-07')
+
+            expected = sum(len(server.announcements_for_date('2018-01-0{}'.format(d))) for d in range(1, 8))
+
+        self.assertEqual(len(actual_df), expected)
+        self.assertListEqual(sorted(set(actual_df['when'])), sorted(set(actual_df['when']) & {'bmo', 'amc', '--'}))
+
+    def test_fetcher_backs_off_when_throttled(self):
+
+        # GIVEN a server that throttles calls closer than 0.1 s and a fetcher that calls it too often
+        with StubECNServer(self.RECORDED, rate_limit=0.1, retry_after=0.1) as server:
+            fetcher = ecal.ECNFetcher(rate_limit=0.01, url=server.url)
+
+            # WHEN it makes several calls
+            results = [fetcher._earnings_announcements_for_date('2017-03-30') for _ in range(4)]
+
+        # THEN every call still gets its announcements and the fetcher slowed down
+        for actual in results:
+            self.assertEqual(len(actual), 3)
+        self.assertGreater(server.throttled_count, 0)
+        self.assertGreater(fetcher._rate_limiter.interval, 0.01)
+
+    def test_malformed_bodies_return_no_announcements(self):
+        with StubECNServer(self.RECORDED, malformed_rate=1.0) as server:
+            fetcher = ecal.ECNFetcher(rate_limit=0, url=server.url)
+
+            actual = fetcher._earnings_announcements_for_date('2017-03-30')
+
+        self.assertListEqual(actual, [])
+
+    def test_dropped_connections_are_retried_then_raised(self):
+        transport = ecal.HttpTransport(max_retries=2, backoff_factor=0)
+        with StubECNServer(self.RECORDED, drop_rate=1.0) as server:
+            fetcher = ecal.ECNFetcher(rate_limit=0, url=server.url, transport=transport)
+
+            with self.assertRaises(requests.ConnectionError):
+                fetcher._earnings_announcements_for_date('2017-03-30')
+
+        self.assertEqual(server.request_count, 3)
+
+    def test_latency_can_be_a_distribution(self):
+        with StubECNServer(self.RECORDED, latency=lambda: 0.1) as server:
+            fetcher = ecal.ECNFetcher(rate_limit=0, url=server.url)
+
+            pre_call_time = time.monotonic()
+            fetcher._earnings_announcements_for_date('2017-03-30')
+
+        self.assertGreaterEqual(time.monotonic() - pre_call_time, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
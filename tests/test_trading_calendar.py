@@ -0,0 +1,45 @@
+import unittest
+import ecal
+import pandas as pd
+
+
+class TestWeekdayCalendar(unittest.TestCase):
+
+    def test_non_trading_days_are_weekends(self):
+        calendar = ecal.WeekdayCalendar()
+        date_list = pd.date_range('2018-01-01', '2018-01-08').strftime('%Y-%m-%d').tolist()
+
+        actual = calendar.non_trading_days(date_list)
+
+        self.assertListEqual(actual, ['2018-01-06', '2018-01-07'])
+
+    def test_non_trading_days_of_nothing_is_nothing(self):
+        self.assertListEqual(ecal.WeekdayCalendar().non_trading_days([]), [])
+
+
+class TestNYSECalendar(unittest.TestCase):
+
+    def setUp(self):
+        self.calendar = ecal.NYSECalendar()
+
+    def test_non_trading_days_include_nyse_holidays(self):
+        date_list = pd.date_range('2018-01-01', '2018-12-31').strftime('%Y-%m-%d').tolist()
+
+        actual = [date_str for date_str in self.calendar.non_trading_days(date_list)
+                  if pd.Timestamp(date_str).dayofweek < 5]
+
+        expected = ['2018-01-01', '2018-01-15', '2018-02-19', '2018-03-30', '2018-05-28', '2018-07-04',
+                    '2018-09-03', '2018-11-22', '2018-12-25']
+        self.assertListEqual(actual, expected)
+
+    def test_observed_holidays(self):
+
+        # Juneteenth 2022 was a Sunday so it was observed on the Monday
+        self.assertListEqual(self.calendar.non_trading_days(['2022-06-17', '2022-06-20']), ['2022-06-20'])
+
+        # New Year's Day 2022 was a Saturday and the NYSE stayed open on the Friday before
+        self.assertListEqual(self.calendar.non_trading_days(['2021-12-31']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()